@@ -0,0 +1,214 @@
+import hashlib
+import json
+import time
+
+import frappe
+from frappe.utils import getdate
+
+# Umur maksimum hasil prediksi di cache (detik)
+RESULT_CACHE_TTL = 15 * 60
+
+# Jumlah maksimum hasil yang disimpan; entry tertua dibuang lebih dulu
+RESULT_CACHE_MAX_ENTRIES = 200
+
+RESULT_INDEX = "data_analyst:result_index"
+RESULT_PREFIX = "data_analyst:result:"
+STATS_PREFIX = "data_analyst:result_stats:"
+
+
+def result_params(
+	kind,
+	company,
+	date_from,
+	date_to,
+	prediction_days=None,
+	pos_profiles=None,
+	customer_group=None,
+	territory=None,
+	method=None,
+	group_by_profile=False,
+	sections=None,
+):
+	"""Parameter ternormalisasi yang menentukan isi hasil (kunci cache)"""
+	params = {
+		"kind": kind,
+		"company": company,
+		"date_from": str(getdate(date_from)),
+		"date_to": str(getdate(date_to)),
+		"prediction_days": prediction_days,
+	}
+	if kind.startswith("pos"):
+		params["pos_profiles"] = sorted(pos_profiles or [])
+	else:
+		params["customer_group"] = customer_group or None
+		params["territory"] = territory or None
+	# Metode default tidak ikut kunci supaya request tanpa method dan method=linear berbagi hasil
+	if method and method != "linear":
+		params["method"] = method
+	if group_by_profile:
+		params["group_by_profile"] = 1
+	# Hanya diisi untuk permintaan sebagian section
+	if sections:
+		params["sections"] = sorted(sections)
+	return params
+
+
+def result_key(params):
+	digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+	return f"{RESULT_PREFIX}{params['kind']}:{digest}"
+
+
+def get_cached_result(params):
+	"""Hasil dari cache dengan status 'hit', atau None jika belum ada / kadaluarsa"""
+	if frappe.flags.skip_result_cache:
+		return None
+
+	key = result_key(params)
+	entry = frappe.cache.get_value(key)
+	if not entry:
+		_count("miss")
+		return None
+
+	_count("hit")
+	result = dict(entry["result"])
+	result["cache"] = {"status": "hit", "age_seconds": int(time.time() - entry["created"])}
+	return result
+
+
+def set_cached_result(params, result):
+	"""Simpan hasil ke cache lalu kembalikan dengan status 'miss'; hasil dengan section error tidak disimpan"""
+	has_error = any(isinstance(v, dict) and v.get("status") == "error" for v in result.values())
+	if not has_error:
+		key = result_key(params)
+		created = time.time()
+		frappe.cache.set_value(key, {"result": result, "created": created}, expires_in_sec=RESULT_CACHE_TTL)
+		frappe.cache.hset(RESULT_INDEX, key, dict(params, created=created))
+		_evict()
+
+	result = dict(result)
+	result["cache"] = {"status": "miss", "age_seconds": 0}
+	return result
+
+
+def _evict():
+	"""Buang entry index yang sudah kadaluarsa lalu entry tertua di atas RESULT_CACHE_MAX_ENTRIES"""
+	index = _index()
+	if len(index) <= RESULT_CACHE_MAX_ENTRIES:
+		return
+
+	now = time.time()
+	entries = sorted(index.items(), key=lambda kv: kv[1]["created"], reverse=True)
+	stale = [
+		key
+		for i, (key, meta) in enumerate(entries)
+		if i >= RESULT_CACHE_MAX_ENTRIES or now - meta["created"] > RESULT_CACHE_TTL
+	]
+	_delete(stale)
+
+
+def _index():
+	return {frappe.safe_decode(key): meta for key, meta in (frappe.cache.hgetall(RESULT_INDEX) or {}).items()}
+
+
+def _delete(keys):
+	for key in keys:
+		frappe.cache.delete_value(key)
+		frappe.cache.hdel(RESULT_INDEX, key)
+
+
+def invalidate_results(
+	kind, company, posting_date=None, pos_profile=None, customer_group=None, territory=None
+):
+	"""
+	Hapus hasil yang bisa terpengaruh oleh satu dokumen.
+
+	Hasil POS hanya dihapus jika profile dan tanggal posting termasuk dalam
+	parameternya. Hasil Sales Invoice dihapus tanpa melihat tanggal karena
+	aging analysis pada payment prediction mencakup semua outstanding.
+	"""
+	posting_date = str(getdate(posting_date)) if posting_date else None
+	index = _index()
+
+	affected = []
+	for key, meta in index.items():
+		if meta["kind"] != kind or meta["company"] != company:
+			continue
+
+		if kind == "pos":
+			if pos_profile and pos_profile not in meta["pos_profiles"]:
+				continue
+			if posting_date and not (meta["date_from"] <= posting_date <= meta["date_to"]):
+				continue
+		else:
+			if meta["customer_group"] and customer_group and meta["customer_group"] != customer_group:
+				continue
+			if meta["territory"] and territory and meta["territory"] != territory:
+				continue
+
+		affected.append(key)
+
+	_delete(affected)
+
+
+def _count(status):
+	frappe.cache.incrby(frappe.cache.make_key(STATS_PREFIX + status), 1)
+
+
+@frappe.whitelist()
+def get_result_cache_stats():
+	"""Jumlah hit/miss cache hasil prediksi dan hit rate-nya"""
+	frappe.only_for("System Manager")
+
+	hits, misses = (
+		int(frappe.cache.get(frappe.cache.make_key(STATS_PREFIX + status)) or 0) for status in ("hit", "miss")
+	)
+	total = hits + misses
+	return {
+		"hits": hits,
+		"misses": misses,
+		"hit_rate": round(hits / total * 100, 2) if total else 0,
+		"entries": len(_index()),
+	}
+
+
+# ========================== Doc Events ===============================
+# Invalidasi dijalankan setelah commit supaya request lain tidak meng-cache ulang data lama.
+# Selama rollup aktif predictor membaca rollup yang di-update job background, jadi
+# invalidasi dilakukan job tersebut setelah commit-nya (lihat data_analyst.api.rollup).
+def on_pos_invoice_change(doc, method=None):
+	from data_analyst.api.rollup import use_pos_rollup
+
+	if use_pos_rollup():
+		return
+
+	frappe.db.after_commit.add(
+		lambda: invalidate_results(
+			"pos", doc.company, posting_date=doc.posting_date, pos_profile=doc.pos_profile
+		)
+	)
+
+
+def on_sales_invoice_change(doc, method=None):
+	from data_analyst.api.rollup import use_sales_invoice_rollup
+
+	if use_sales_invoice_rollup():
+		return
+
+	frappe.db.after_commit.add(
+		lambda: invalidate_results(
+			"sales_invoice", doc.company, customer_group=doc.customer_group, territory=doc.territory
+		)
+	)
+
+
+def on_payment_change(doc, method=None):
+	# Payment / journal mengubah outstanding invoice pada filter apa pun
+	if doc.doctype == "Payment Entry" and doc.party_type != "Customer":
+		return
+
+	from data_analyst.api.rollup import use_sales_invoice_rollup
+
+	if use_sales_invoice_rollup():
+		return
+
+	frappe.db.after_commit.add(lambda: invalidate_results("sales_invoice", doc.company))
@@ -0,0 +1,143 @@
+"""
+Encoding response prediksi yang ringkas (`format=columnar`).
+
+- List of dict dengan field yang sama menjadi array paralel per field:
+  {"$columns": ["date", "revenue"], "$values": [["2025-01-01", ...], [100.0, ...]]}
+- List yang merupakan awalan list lain di dict yang sama (mis. top_bestsellers
+  dari all_bestsellers) menjadi {"$slice": "all_bestsellers", "$limit": 10}
+- Field legacy predict_profit yang nilainya sama dengan struktur baru dibuang
+  dan dicatat di "$aliases" (field -> path bertitik)
+
+Body dikirim sebagai msgpack jika client menerima application/msgpack dan
+package msgpack terpasang, selain itu JSON ter-gzip jika client menerima gzip.
+"""
+
+import gzip
+import json
+
+import frappe
+from frappe import _
+
+from data_analyst.api.etag import etag_headers
+
+RESPONSE_FORMATS = ("json", "columnar")
+
+# Field legacy predict_profit -> field struktur baru dengan nilai yang sama
+LEGACY_ALIASES = {
+	"current_total_revenue": "historical.revenue",
+	"current_total_cost": "historical.cost",
+	"current_total_profit": "historical.profit",
+	"current_profit_margin": "historical.margin",
+	"data_period_days": "historical.days",
+	"avg_daily_revenue": "daily_average.revenue",
+	"avg_daily_cost": "daily_average.cost",
+	"avg_daily_profit": "daily_average.profit",
+	"predicted_total_revenue": "prediction.revenue",
+	"predicted_total_cost": "prediction.cost",
+	"predicted_total_profit": "prediction.profit",
+	"predicted_profit_margin": "prediction.margin",
+	"prediction_days": "prediction.days",
+}
+
+# Body di bawah ukuran ini tidak di-gzip
+MIN_GZIP_BYTES = 1024
+
+
+def validate_format(response_format):
+	response_format = response_format or "json"
+	if response_format not in RESPONSE_FORMATS:
+		frappe.throw(_("Parameter 'format' harus salah satu dari: {0}").format(", ".join(RESPONSE_FORMATS)))
+	return response_format
+
+
+def columnar(value):
+	"""Bentuk columnar dari hasil prediksi (lihat docstring modul)"""
+	if isinstance(value, dict):
+		aliases = _aliases(value)
+		encoded = {key: columnar(v) for key, v in value.items() if key not in aliases}
+		encoded.update(_slices(value, aliases))
+		if aliases:
+			encoded["$aliases"] = aliases
+		return encoded
+
+	if isinstance(value, list | tuple):
+		if _is_table(value):
+			fields = list(value[0])
+			return {
+				"$columns": fields,
+				"$values": [[columnar(row[field]) for row in value] for field in fields],
+			}
+		return [columnar(v) for v in value]
+
+	return value
+
+
+def _is_table(rows):
+	if not rows or not isinstance(rows[0], dict):
+		return False
+	fields = list(rows[0])
+	return all(isinstance(row, dict) and list(row) == fields for row in rows)
+
+
+def _aliases(value):
+	aliases = {}
+	for key, path in LEGACY_ALIASES.items():
+		if key not in value:
+			continue
+		target = value
+		for part in path.split("."):
+			target = target.get(part) if isinstance(target, dict) else None
+		if target is not None and target == value[key]:
+			aliases[key] = path
+	return aliases
+
+
+def _slices(value, skip):
+	"""Referensi slice untuk list yang merupakan awalan list lain yang lebih panjang"""
+	lists = sorted(
+		((key, v) for key, v in value.items() if key not in skip and isinstance(v, list) and v),
+		key=lambda kv: len(kv[1]),
+		reverse=True,
+	)
+	refs = {}
+	for i, (key, rows) in enumerate(lists):
+		for source, source_rows in lists[:i]:
+			if source not in refs and source_rows[: len(rows)] == rows:
+				refs[key] = {"$slice": source, "$limit": len(rows)}
+				break
+	return refs
+
+
+def encode_response(result, response_format=None, etag=None):
+	"""
+	Hasil endpoint apa adanya (format json tanpa ETag), atau Response dengan
+	header ETag dan body columnar msgpack / gzip sesuai header Accept dan
+	Accept-Encoding request.
+	"""
+	if not frappe.request or (response_format != "columnar" and not etag):
+		return result
+
+	from frappe.utils.response import json_handler
+	from werkzeug.wrappers import Response
+
+	payload = {"message": columnar(result) if response_format == "columnar" else result}
+	headers = etag_headers(etag) if etag else {"Vary": "Accept, Accept-Encoding"}
+
+	msgpack = _msgpack() if "application/msgpack" in (frappe.request.headers.get("Accept") or "") else None
+	if msgpack and response_format == "columnar":
+		body = msgpack.packb(payload, default=json_handler, use_bin_type=True)
+		return Response(body, status=200, headers=headers, content_type="application/msgpack")
+
+	body = json.dumps(payload, default=json_handler, separators=(",", ":")).encode()
+	if len(body) >= MIN_GZIP_BYTES and "gzip" in (frappe.request.headers.get("Accept-Encoding") or ""):
+		body = gzip.compress(body, compresslevel=6)
+		headers["Content-Encoding"] = "gzip"
+	return Response(body, status=200, headers=headers, content_type="application/json")
+
+
+def _msgpack():
+	try:
+		import msgpack
+	except ImportError:
+		return None
+	return msgpack
@@ -0,0 +1,134 @@
+"""
+ETag / 304 untuk endpoint analytics.
+
+Versi data = MAX(modified) tabel sumber (dibaca lewat index `modified` bawaan
+Frappe, tanpa scan tabel), termasuk tabel turunan (rollup, trend state) yang
+dibaca selama setting-nya aktif, ditambah waktu ubah Data Analyst Settings dan
+tanggal hari ini (aging memakai CURDATE()). ETag adalah hash versi data,
+parameter request ternormalisasi dan representasi response (format, header
+Accept). Request dengan If-None-Match yang cocok dijawab 304 sebelum cache
+atau predictor dibaca.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import get_datetime, today
+
+# Item: cost fallback (valuation_rate / last_purchase_rate) dan nama item;
+# POS Profile: warehouse per profile
+POS_SOURCES = ("POS Invoice", "Stock Ledger Entry", "Bin", "Item", "POS Profile")
+
+# Payment Entry / Journal Entry mengubah outstanding yang dipakai payment prediction
+SALES_INVOICE_SOURCES = (
+	"Sales Invoice",
+	"Stock Ledger Entry",
+	"Bin",
+	"Payment Entry",
+	"Journal Entry",
+	"Item",
+)
+
+# Tabel turunan per tabel sumber yang dibaca predictor selama setting Data Analyst Settings aktif
+DERIVED_SOURCES = {
+	"POS Invoice": {
+		"use_pos_rollup": ("POS Daily Sales", "POS Daily Item Sales"),
+		"use_trend_state": ("Sales Trend State",),
+	},
+	"Sales Invoice": {
+		"use_sales_invoice_rollup": ("Sales Invoice Daily Summary", "Sales Invoice Daily Item Sketch"),
+		"use_trend_state": ("Sales Trend State",),
+	},
+}
+
+
+def source_doctypes(doctypes):
+	"""Tabel sumber ditambah tabel turunan yang sedang dibaca menurut Data Analyst Settings"""
+	settings = frappe.get_cached_doc("Data Analyst Settings")
+	sources = list(doctypes)
+	for doctype in doctypes:
+		for fieldname, derived in DERIVED_SOURCES.get(doctype, {}).items():
+			if settings.get(fieldname):
+				sources.extend(d for d in derived if d not in sources)
+	return sources
+
+
+def source_modified(doctypes):
+	"""MAX(modified) setiap tabel sumber (lihat source_doctypes) dan Data Analyst Settings"""
+	rows = frappe.db.sql(
+		" UNION ALL ".join(
+			f"SELECT MAX(modified) FROM `tab{doctype}`" for doctype in source_doctypes(doctypes)
+		)
+	)
+	modified = [row[0] for row in rows]
+	modified.append(frappe.get_cached_doc("Data Analyst Settings").modified)
+	return modified
+
+
+def last_modified(doctypes):
+	"""Waktu perubahan terakhir data sumber, None jika semua tabel kosong"""
+	modified = [get_datetime(m) for m in source_modified(doctypes) if m]
+	return max(modified) if modified else None
+
+
+def data_version(doctypes):
+	version = [str(m) for m in source_modified(doctypes)]
+	version.append(today())
+	return version
+
+
+def request_etag(params, doctypes, response_format=None):
+	"""Weak ETag untuk request ini; None di luar HTTP request (job, command)"""
+	if not frappe.request or frappe.flags.in_prediction_job:
+		return None
+
+	fingerprint = {
+		"params": params,
+		"format": response_format,
+		"accept": frappe.get_request_header("Accept"),
+		"version": data_version(doctypes),
+	}
+	digest = hashlib.sha1(json.dumps(fingerprint, sort_keys=True, default=str).encode()).hexdigest()
+	return f'W/"{digest}"'
+
+
+def not_modified(etag):
+	"""Response 304 jika If-None-Match request memuat etag, selain itu None"""
+	if not etag:
+		return None
+
+	tags = [tag.strip() for tag in (frappe.get_request_header("If-None-Match") or "").split(",")]
+	# Perbandingan weak: proxy boleh menghapus / menambah prefix W/
+	if etag.removeprefix("W/") not in {tag.removeprefix("W/") for tag in tags}:
+		return None
+
+	from werkzeug.wrappers import Response
+
+	return Response(status=304, headers=etag_headers(etag))
+
+
+def result_etag(result, etag):
+	"""ETag tidak dikirim untuk hasil dengan section error supaya request berikutnya menghitung ulang"""
+	if has_section_error(result):
+		return None
+	return etag
+
+
+def has_section_error(result, depth=3):
+	"""Apakah hasil memuat section berstatus error, termasuk di blok bersarang (entities / consolidated batch)"""
+	for value in result.values():
+		if not isinstance(value, dict):
+			continue
+		if value.get("status") == "error" or (depth > 1 and has_section_error(value, depth - 1)):
+			return True
+	return False
+
+
+def etag_headers(etag):
+	return {
+		"ETag": etag,
+		# Browser selalu revalidasi; response hanya untuk user ini
+		"Cache-Control": "private, no-cache",
+		"Vary": "Accept, Accept-Encoding",
+	}
@@ -0,0 +1,404 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import frappe
+import numpy as np
+from frappe import _
+
+from data_analyst.api.jobs import enqueue_prediction, should_run_async
+from data_analyst.api.pos_facts import COST_SOURCES, load_pos_facts
+
+# Jumlah invoice per halaman; memory export dibatasi oleh ukuran halaman, bukan periode
+EXPORT_PAGE_SIZE = 2000
+
+LINE_COLUMNS = (
+	"invoice",
+	"posting_date",
+	"posting_time",
+	"pos_profile",
+	"warehouse",
+	"item_code",
+	"item_name",
+	"qty",
+	"rate",
+	"amount",
+	"cost_per_unit",
+	"cost",
+	"profit",
+	"cost_source",
+)
+DAILY_COLUMNS = ("date", "revenue", "cost", "profit", "margin", "qty")
+
+# Tipe kolom Parquet (nama factory tipe pyarrow); schema tetap untuk semua halaman
+COLUMN_TYPES = {
+	"invoice": "string",
+	"posting_date": "date32",
+	"posting_time": "string",
+	"pos_profile": "string",
+	"warehouse": "string",
+	"item_code": "string",
+	"item_name": "string",
+	"qty": "float64",
+	"rate": "float64",
+	"amount": "float64",
+	"cost_per_unit": "float64",
+	"cost": "float64",
+	"profit": "float64",
+	"cost_source": "string",
+	"date": "date32",
+	"revenue": "float64",
+	"margin": "float64",
+}
+
+EXPORT_LEVELS = ("line", "daily")
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+@frappe.whitelist(allow_guest=False, methods=["GET", "POST"])
+def export_profit(
+	company=None,
+	pos_profiles=None,
+	date_from=None,
+	date_to=None,
+	level="line",
+	file_format="csv",
+	delivery="file",
+	run_async=None,
+):
+	"""
+	Export breakdown predict_profit (per baris atau per hari) ke CSV / Parquet.
+
+	Data dibaca per halaman invoice dan cost di-resolve per halaman, sehingga
+	export periode panjang tidak memuat seluruh baris ke memory.
+
+	Args:
+	    company: Nama company
+	    pos_profiles: List POS Profile (opsional, default ambil 3 teratas)
+	    date_from: Tanggal mulai (default: 90 hari yang lalu)
+	    date_to: Tanggal akhir (default: hari ini)
+	    level: 'line' (per baris invoice) atau 'daily' (per hari)
+	    file_format: 'csv' atau 'parquet' (butuh pyarrow)
+	    delivery: 'file' simpan sebagai File private, 'stream' kirim langsung
+	        sebagai response CSV ter-chunk
+	    run_async: '1' / 'auto' seperti endpoint prediksi (hanya delivery 'file')
+
+	Usage:
+	    GET: /api/method/data_analyst.api.export.export_profit?company=ABC&level=daily&delivery=stream
+	    POST: Body JSON atau Form Data
+	"""
+
+	# Handle JSON request body for POST
+	if not company and frappe.request and frappe.request.data:
+		try:
+			data = json.loads(frappe.request.data)
+			company = data.get("company")
+			pos_profiles = data.get("pos_profiles")
+			date_from = data.get("date_from")
+			date_to = data.get("date_to")
+			level = data.get("level", "line")
+			file_format = data.get("file_format", "csv")
+			delivery = data.get("delivery", "file")
+			run_async = data.get("run_async")
+		except ValueError:
+			frappe.throw(_("Body request bukan JSON yang valid"))
+
+	if not company:
+		frappe.throw(_("Parameter 'company' wajib diisi"))
+
+	frappe.has_permission("POS Invoice", "read", throw=True)
+
+	if level not in EXPORT_LEVELS:
+		frappe.throw(_("Parameter 'level' harus salah satu dari: {0}").format(", ".join(EXPORT_LEVELS)))
+	if file_format not in EXPORT_FORMATS:
+		frappe.throw(
+			_("Parameter 'file_format' harus salah satu dari: {0}").format(", ".join(EXPORT_FORMATS))
+		)
+	if delivery == "stream" and file_format != "csv":
+		frappe.throw(_("Export stream hanya mendukung format CSV"))
+
+	if not date_to:
+		date_to = datetime.now().strftime("%Y-%m-%d")
+
+	if not date_from:
+		date_from = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+
+	if not pos_profiles:
+		pos_profiles = frappe.get_all(
+			"POS Profile", filters={"company": company, "disabled": 0}, pluck="name", limit=3
+		)
+	elif isinstance(pos_profiles, str):
+		pos_profiles = json.loads(pos_profiles)
+
+	if not pos_profiles:
+		frappe.throw(_("Tidak ada POS Profile aktif untuk company ini"))
+
+	file_name = f"profit-{level}-{frappe.scrub(company)}-{date_from}-{date_to}.{file_format}"
+
+	if delivery == "stream":
+		return stream_csv(company, pos_profiles, date_from, date_to, level, file_name)
+
+	if should_run_async(
+		run_async,
+		"POS Invoice",
+		{
+			"company": company,
+			"pos_profile": ["in", pos_profiles],
+			"posting_date": ["between", [date_from, date_to]],
+		},
+	):
+		return enqueue_prediction(
+			"data_analyst.api.export.export_profit",
+			company=company,
+			pos_profiles=pos_profiles,
+			date_from=date_from,
+			date_to=date_to,
+			level=level,
+			file_format=file_format,
+		)
+
+	return write_export_file(company, pos_profiles, date_from, date_to, level, file_format, file_name)
+
+
+# ========================== Sumber data ===============================
+def iter_profit_facts(company, pos_profiles, date_from, date_to, page_size=EXPORT_PAGE_SIZE):
+	"""
+	POSFacts per halaman invoice, urut (posting_date, name).
+
+	Halaman dibaca dengan keyset pagination, bukan cursor unbuffered, karena
+	resolusi cost (SLE as-of) butuh query lain di koneksi yang sama di sela
+	pembacaan. Window SLE setiap halaman hanya rentang tanggal halaman itu.
+	"""
+	last = None
+	while True:
+		after = ""
+		if last:
+			after = """AND (posting_date > %(last_date)s
+                OR (posting_date = %(last_date)s AND name > %(last_name)s))"""
+
+		invoices = frappe.db.sql(
+			f"""
+            SELECT name, posting_date
+            FROM `tabPOS Invoice`
+            WHERE company = %(company)s
+                AND pos_profile IN %(pos_profiles)s
+                AND docstatus = 1
+                AND posting_date BETWEEN %(date_from)s AND %(date_to)s
+                {after}
+            ORDER BY posting_date, name
+            LIMIT %(limit)s
+        """,
+			{
+				"company": company,
+				"pos_profiles": pos_profiles,
+				"date_from": date_from,
+				"date_to": date_to,
+				"last_date": last and last[1],
+				"last_name": last and last[0],
+				"limit": page_size,
+			},
+		)
+		if not invoices:
+			return
+
+		facts = load_pos_facts(
+			company,
+			pos_profiles,
+			str(invoices[0][1]),
+			str(invoices[-1][1]),
+			invoice_names=[name for name, _date in invoices],
+		)
+		if facts.line_count:
+			yield facts
+
+		if len(invoices) < page_size:
+			return
+		last = invoices[-1]
+
+
+def line_rows(facts):
+	"""Baris export level 'line' untuk satu halaman fakta"""
+	cost_per_unit, cost_source = facts.line_costs()
+	line_cost = facts.qty * cost_per_unit
+	invoice = facts.line_invoice
+
+	return zip(
+		np.array(facts.invoice_names, dtype=object)[invoice].tolist(),
+		facts.line_date.astype(object).tolist(),
+		[str(facts.invoice_posting_time[i]) for i in invoice.tolist()],
+		np.array(facts.profile_names, dtype=object)[facts.invoice_profile[invoice]].tolist(),
+		np.array(facts.warehouse_names, dtype=object)[facts.invoice_warehouse[invoice]].tolist(),
+		np.array(facts.item_codes, dtype=object)[facts.line_item].tolist(),
+		np.array(facts.item_names, dtype=object)[facts.line_item].tolist(),
+		facts.qty.tolist(),
+		facts.rate.tolist(),
+		facts.amount.tolist(),
+		cost_per_unit.round(4).tolist(),
+		line_cost.round(2).tolist(),
+		(facts.amount - line_cost).round(2).tolist(),
+		np.array(COST_SOURCES, dtype=object)[cost_source].tolist(),
+		strict=False,
+	)
+
+
+def accumulate_daily(facts, daily):
+	"""Tambahkan revenue/cost/qty per hari dari satu halaman ke `daily`"""
+	cost_per_unit, _cost_source = facts.line_costs()
+	line_cost = facts.qty * cost_per_unit
+
+	days, day_idx = np.unique(facts.line_date, return_inverse=True)
+	revenue = np.bincount(day_idx, weights=facts.amount, minlength=len(days))
+	cost = np.bincount(day_idx, weights=line_cost, minlength=len(days))
+	qty = np.bincount(day_idx, weights=facts.qty, minlength=len(days))
+
+	for date, r, c, q in zip(
+		days.astype(object).tolist(), revenue.tolist(), cost.tolist(), qty.tolist(), strict=False
+	):
+		totals = daily.setdefault(date, [0.0, 0.0, 0.0])
+		totals[0] += r
+		totals[1] += c
+		totals[2] += q
+
+
+def daily_rows(daily):
+	for date in sorted(daily):
+		revenue, cost, qty = daily[date]
+		profit = revenue - cost
+		margin = (profit / revenue * 100) if revenue > 0 else 0
+		yield date, round(revenue, 2), round(cost, 2), round(profit, 2), round(margin, 2), qty
+
+
+def iter_export_batches(company, pos_profiles, date_from, date_to, level):
+	"""
+	Batch baris export. Level 'line' per halaman invoice; level 'daily'
+	diakumulasi per tanggal (memory sebanding jumlah hari) lalu dikirim sekali.
+	"""
+	if level == "line":
+		for facts in iter_profit_facts(company, pos_profiles, date_from, date_to):
+			yield list(line_rows(facts))
+		return
+
+	daily = {}
+	for facts in iter_profit_facts(company, pos_profiles, date_from, date_to):
+		accumulate_daily(facts, daily)
+	yield list(daily_rows(daily))
+
+
+def export_columns(level):
+	return LINE_COLUMNS if level == "line" else DAILY_COLUMNS
+
+
+# ========================== Output ===============================
+def write_export_file(company, pos_profiles, date_from, date_to, level, file_format, file_name):
+	"""Tulis export langsung ke private files lalu daftarkan sebagai File"""
+	file_name = f"{frappe.generate_hash(length=8)}-{file_name}"
+	path = frappe.get_site_path("private", "files", file_name)
+	columns = export_columns(level)
+	batches = iter_export_batches(company, pos_profiles, date_from, date_to, level)
+
+	if file_format == "parquet":
+		row_count = _write_parquet(path, columns, batches)
+	else:
+		row_count = _write_csv(path, columns, batches)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+			"file_size": os.path.getsize(path),
+		}
+	).insert(ignore_permissions=True)
+
+	return {
+		"status": "success",
+		"file_url": file_doc.file_url,
+		"file_name": file_doc.file_name,
+		"rows": row_count,
+		"level": level,
+		"file_format": file_format,
+	}
+
+
+def _write_csv(path, columns, batches):
+	row_count = 0
+	with open(path, "w", newline="") as f:
+		writer = csv.writer(f)
+		writer.writerow(columns)
+		for rows in batches:
+			writer.writerows(rows)
+			row_count += len(rows)
+	return row_count
+
+
+def _write_parquet(path, columns, batches):
+	try:
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+	except ImportError:
+		frappe.throw(_("Export Parquet membutuhkan package pyarrow"))
+
+	# Schema eksplisit: halaman dengan kolom yang seluruhnya NULL tidak mengubah tipe
+	schema = pa.schema([(c, getattr(pa, COLUMN_TYPES[c])()) for c in columns])
+
+	row_count = 0
+	writer = None
+	try:
+		for rows in batches:
+			if not rows:
+				continue
+			# Satu row group per halaman
+			table = pa.Table.from_pydict(
+				dict(zip(columns, map(list, zip(*rows, strict=True)), strict=True)), schema=schema
+			)
+			if writer is None:
+				writer = pq.ParquetWriter(path, schema)
+			writer.write_table(table)
+			row_count += len(rows)
+	finally:
+		if writer is not None:
+			writer.close()
+
+	if writer is None:
+		pq.write_table(schema.empty_table(), path)
+	return row_count
+
+
+def stream_csv(company, pos_profiles, date_from, date_to, level, file_name):
+	"""
+	Response CSV ter-chunk, satu chunk per halaman invoice.
+
+	Generator berjalan setelah request selesai (context frappe sudah di-destroy),
+	jadi membuka context dan koneksi sendiri seperti section paralel.
+	"""
+	from werkzeug.wrappers import Response
+
+	site, sites_path, user = frappe.local.site, frappe.local.sites_path, frappe.session.user
+	columns = export_columns(level)
+
+	def generate():
+		frappe.init(site=site, sites_path=sites_path)
+		frappe.connect()
+		try:
+			frappe.set_user(user)
+			yield _csv_chunk([columns])
+			for rows in iter_export_batches(company, pos_profiles, date_from, date_to, level):
+				yield _csv_chunk(rows)
+		finally:
+			frappe.destroy()
+
+	return Response(
+		generate(),
+		mimetype="text/csv",
+		headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+		direct_passthrough=True,
+	)
+
+
+def _csv_chunk(rows):
+	buffer = io.StringIO()
+	csv.writer(buffer).writerows(rows)
+	return buffer.getvalue()
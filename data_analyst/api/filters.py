@@ -0,0 +1,36 @@
+"""
+Filter customer_group / territory opsional untuk query Sales Invoice dan ringkasannya.
+
+Template query memakai placeholder `{customer_group_filter}` dan
+`{territory_filter}` serta parameter bernama %(company)s, %(docstatus)s,
+%(date_from)s, %(date_to)s, %(customer_group)s, %(territory)s.
+"""
+
+
+def sales_invoice_filters(filters, alias=None):
+	"""
+	Klausa untuk placeholder filter; kosong jika filter tidak diisi.
+
+	Args:
+	    filters: dict dengan opsional customer_group, territory
+	    alias: alias tabel Sales Invoice di query (mis. 'si')
+	"""
+	prefix = f"{alias}." if alias else ""
+	return {
+		"customer_group_filter": f"AND {prefix}customer_group = %(customer_group)s"
+		if filters.get("customer_group")
+		else "",
+		"territory_filter": f"AND {prefix}territory = %(territory)s" if filters.get("territory") else "",
+	}
+
+
+def sales_invoice_values(filters, date_from=None, date_to=None):
+	"""Parameter bernama untuk template query"""
+	return {
+		"company": filters["company"],
+		"docstatus": filters.get("docstatus", 1),
+		"date_from": date_from,
+		"date_to": date_to,
+		"customer_group": filters.get("customer_group"),
+		"territory": filters.get("territory"),
+	}
@@ -0,0 +1,182 @@
+from itertools import product
+
+import numpy as np
+from frappe.utils import getdate
+
+FORECAST_METHODS = ("linear", "holt_winters")
+
+# Panjang musim Holt-Winters (siklus hari dalam seminggu)
+WEEK = 7
+
+# Grid parameter smoothing; kombinasi dengan error one-step terkecil dipilih per series
+HW_ALPHAS = (0.1, 0.3, 0.5)
+HW_BETAS = (0.01, 0.1)
+HW_GAMMAS = (0.05, 0.2, 0.4)
+
+WEEKDAYS = ("Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu")
+
+
+def day_range(date_from, date_to):
+	"""Tanggal awal (datetime64[D]) dan jumlah hari periode, inklusif"""
+	start = np.datetime64(str(getdate(date_from)), "D")
+	end = np.datetime64(str(getdate(date_to)), "D")
+	return start, max(int((end - start).astype(int)) + 1, 0)
+
+
+def series_day_matrix(series_idx, dates, values, n_series, date_from, date_to):
+	"""
+	Matriks series x hari dalam satu pass; hari tanpa transaksi bernilai 0.
+
+	Args:
+	    series_idx: kode integer series per baris (mis. line_item)
+	    dates: tanggal per baris (datetime64[D])
+	    values: nilai per baris yang dijumlahkan
+	    n_series: jumlah series
+	"""
+	start, n_days = day_range(date_from, date_to)
+	day_idx = (np.asarray(dates, dtype="datetime64[D]") - start).astype(np.int64)
+	in_range = (day_idx >= 0) & (day_idx < n_days)
+
+	cells = np.asarray(series_idx, dtype=np.int64)[in_range] * n_days + day_idx[in_range]
+	matrix = np.bincount(
+		cells, weights=np.asarray(values, dtype=float)[in_range], minlength=n_series * n_days
+	)
+	return matrix.reshape(n_series, n_days)
+
+
+def fit_linear_trends(matrix, horizon):
+	"""
+	Regresi linear (level + slope) untuk setiap baris matriks sekaligus.
+
+	Slope dan intercept dihitung dengan perkalian matriks terhadap sumbu hari
+	yang di-center; sebaran residual memakai bentuk tertutup
+	SSR = Σy² - n·ȳ² - slope²·Sxx tanpa membentuk matriks residual.
+
+	Returns:
+	    dict array per series: slope, mean, level (nilai fit hari terakhir),
+	    residual_std, daily_forecast (series x horizon, tidak negatif) dan
+	    forecast (total horizon)
+	"""
+	n_series, n_days = matrix.shape
+	x = np.arange(n_days, dtype=float)
+	x_mean = x.mean() if n_days else 0.0
+	xc = x - x_mean
+	sxx = float(xc @ xc)
+
+	mean = matrix.mean(axis=1) if n_days else np.zeros(n_series)
+	slope = (matrix @ xc) / sxx if sxx > 0 else np.zeros(n_series)
+	intercept = mean - slope * x_mean
+
+	ssr = np.einsum("ij,ij->i", matrix, matrix) - n_days * mean**2 - slope**2 * sxx
+	residual_std = np.sqrt(np.maximum(ssr, 0) / max(n_days - 2, 1))
+
+	future = n_days + np.arange(horizon, dtype=float)
+	daily_forecast = np.maximum(intercept[:, None] + slope[:, None] * future, 0)
+
+	return {
+		"slope": slope,
+		"mean": mean,
+		"level": intercept + slope * max(n_days - 1, 0),
+		"residual_std": residual_std,
+		"daily_forecast": daily_forecast,
+		"forecast": daily_forecast.sum(axis=1),
+	}
+
+
+def trend_label(slope):
+	return "naik" if slope > 0 else "turun" if slope < 0 else "stabil"
+
+
+def fit_holt_winters(matrix, horizon, season=WEEK):
+	"""
+	Holt-Winters aditif dengan musim mingguan untuk setiap baris matriks sekaligus.
+
+	Semua series dan semua kombinasi grid (alpha, beta, gamma) di-update bersama
+	per langkah waktu, jadi biaya loop Python sebanding jumlah hari saja.
+	History kurang dari dua musim memakai fit_linear_trends.
+
+	Returns:
+	    dict seperti fit_linear_trends ditambah seasonal (series x season,
+	    index 0 = hari pertama periode) dan params (alpha, beta, gamma terpilih)
+	"""
+	n_series, n_days = matrix.shape
+	if n_days < 2 * season:
+		return fit_linear_trends(matrix, horizon)
+
+	grid = np.array(list(product(HW_ALPHAS, HW_BETAS, HW_GAMMAS)))
+	n_grid = len(grid)
+	y = np.repeat(matrix, n_grid, axis=0)
+	alpha, beta, gamma = np.tile(grid, (n_series, 1)).T
+
+	level = y[:, :season].mean(axis=1)
+	trend = (y[:, season : 2 * season].mean(axis=1) - level) / season
+	seasonal = y[:, :season] - level[:, None]
+	sse = np.zeros(len(y))
+
+	for t in range(season, n_days):
+		j = t % season
+		observed = y[:, t]
+		previous = seasonal[:, j]
+		error = observed - (level + trend + previous)
+		sse += error * error
+
+		new_level = alpha * (observed - previous) + (1 - alpha) * (level + trend)
+		trend = beta * (new_level - level) + (1 - beta) * trend
+		seasonal[:, j] = gamma * (observed - new_level) + (1 - gamma) * previous
+		level = new_level
+
+	best = np.arange(n_series) * n_grid + sse.reshape(n_series, n_grid).argmin(axis=1)
+	level, trend, seasonal = level[best], trend[best], seasonal[best]
+
+	steps = np.arange(1, horizon + 1)
+	season_idx = (n_days + steps - 1) % season
+	daily_forecast = np.maximum(level[:, None] + trend[:, None] * steps + seasonal[:, season_idx], 0)
+
+	return {
+		"slope": trend,
+		"mean": matrix.mean(axis=1),
+		"level": level,
+		"residual_std": np.sqrt(sse[best] / (n_days - season)),
+		"seasonal": seasonal,
+		"params": grid[best % n_grid],
+		"daily_forecast": daily_forecast,
+		"forecast": daily_forecast.sum(axis=1),
+	}
+
+
+def forecast_breakdown(labels, matrix, date_from, horizon, method="holt_winters"):
+	"""
+	Forecast harian total (jumlah semua baris) dan setiap baris dalam satu batch.
+
+	Args:
+	    labels: nama per baris matriks (mis. POS Profile, Territory)
+	    matrix: series x hari dari series_day_matrix
+
+	Returns:
+	    (fit, breakdown): fit per series dengan baris 0 = total, dan dict
+	    siap chart berisi dates, total, series per label serta pola mingguan total
+	"""
+	stacked = np.vstack([matrix.sum(axis=0, keepdims=True), matrix])
+	fit = (
+		fit_holt_winters(stacked, horizon)
+		if method == "holt_winters"
+		else fit_linear_trends(stacked, horizon)
+	)
+
+	first_day = np.datetime64(str(getdate(date_from)), "D") + matrix.shape[1]
+	breakdown = {
+		"dates": [str(first_day + k) for k in range(horizon)],
+		"total": fit["daily_forecast"][0].round(2).tolist(),
+		"series": {
+			label: row.round(2).tolist()
+			for label, row in zip(labels, fit["daily_forecast"][1:], strict=False)
+		},
+	}
+
+	if "seasonal" in fit:
+		first_weekday = getdate(date_from).weekday()
+		breakdown["weekly_pattern"] = {
+			WEEKDAYS[(first_weekday + j) % WEEK]: round(float(value), 2)
+			for j, value in enumerate(fit["seasonal"][0])
+		}
+	return fit, breakdown
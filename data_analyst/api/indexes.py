@@ -0,0 +1,259 @@
+"""
+Index komposit untuk bentuk query analytics dan advisor EXPLAIN-nya.
+
+Query predictor POS memfilter (company, pos_profile, docstatus, posting_date),
+predictor Sales Invoice memfilter (company, docstatus, posting_date,
+customer_group, territory), dan resolusi cost membaca Stock Ledger Entry per
+(item_code, warehouse, posting_date, posting_time). ERPNext standar tidak
+punya index komposit untuk bentuk ini; patch add_analytics_indexes membuatnya.
+"""
+
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+
+import frappe
+from frappe import _
+
+from data_analyst.api.perf import wrap_db_sql
+
+# (doctype, nama index, kolom)
+ANALYTICS_INDEXES = (
+	("POS Invoice", "da_company_profile_date", ("company", "pos_profile", "docstatus", "posting_date")),
+	(
+		"Sales Invoice",
+		"da_company_date_group_territory",
+		("company", "docstatus", "posting_date", "customer_group", "territory"),
+	),
+	(
+		"Stock Ledger Entry",
+		"da_item_warehouse_posting",
+		("item_code", "warehouse", "posting_date", "posting_time"),
+	),
+)
+
+# `tabDoctype` [AS] alias di klausa FROM / JOIN
+_TABLE_ALIAS = re.compile(
+	r"`(tab[^`]+)`(?:\s+(?:as\s+)?(?!on\b|where\b|inner\b|left\b|join\b|group\b|order\b)(\w+))?", re.I
+)
+
+# Full scan / filesort di bawah perkiraan baris ini tidak dilaporkan (tabel master kecil)
+MIN_REPORTED_ROWS = 1000
+
+
+def ensure_analytics_indexes():
+	"""Buat index ANALYTICS_INDEXES yang belum ada (idempotent berdasarkan nama index)"""
+	for doctype, index_name, fields in ANALYTICS_INDEXES:
+		frappe.db.add_index(doctype, list(fields), index_name=index_name)
+
+
+def index_status():
+	return [
+		{
+			"doctype": doctype,
+			"index_name": index_name,
+			"fields": list(fields),
+			"exists": bool(frappe.db.has_index(f"tab{doctype}", index_name)),
+		}
+		for doctype, index_name, fields in ANALYTICS_INDEXES
+	]
+
+
+@frappe.whitelist(allow_guest=False, methods=["GET", "POST"])
+def get_index_advice(
+	company=None,
+	pos_profiles=None,
+	date_from=None,
+	date_to=None,
+	customer_group=None,
+	territory=None,
+	prediction_days=30,
+):
+	"""
+	Jalankan setiap predictor, EXPLAIN semua SELECT yang dieksekusinya, lalu
+	laporkan full scan, full index scan, filesort dan temporary table (hanya System Manager).
+
+	Cache hasil dilewati dan predictor dijalankan berurutan di koneksi request
+	supaya semua query tertangkap.
+
+	Usage:
+	    GET: /api/method/data_analyst.api.indexes.get_index_advice?company=ABC
+	"""
+	frappe.only_for("System Manager")
+
+	# Handle JSON request body for POST
+	if not company and frappe.request and frappe.request.data:
+		try:
+			data = json.loads(frappe.request.data)
+			company = data.get("company")
+			pos_profiles = data.get("pos_profiles")
+			date_from = data.get("date_from")
+			date_to = data.get("date_to")
+			customer_group = data.get("customer_group")
+			territory = data.get("territory")
+			prediction_days = data.get("prediction_days", 30)
+		except ValueError:
+			frappe.throw(_("Body request bukan JSON yang valid"))
+
+	if not company:
+		frappe.throw(_("Parameter 'company' wajib diisi"))
+
+	if not date_to:
+		date_to = datetime.now().strftime("%Y-%m-%d")
+
+	if not date_from:
+		date_from = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+
+	if not pos_profiles:
+		pos_profiles = frappe.get_all(
+			"POS Profile", filters={"company": company, "disabled": 0}, pluck="name", limit=3
+		)
+	elif isinstance(pos_profiles, str):
+		pos_profiles = json.loads(pos_profiles)
+
+	filters = {"company": company, "docstatus": 1, "posting_date": ["between", [date_from, date_to]]}
+	if customer_group:
+		filters["customer_group"] = customer_group
+	if territory:
+		filters["territory"] = territory
+
+	report = {}
+	frappe.flags.skip_result_cache = True
+	try:
+		for name, fn in predictor_targets(
+			company, pos_profiles, date_from, date_to, int(prediction_days), filters
+		).items():
+			with capture_queries() as queries:
+				fn()
+			report[name] = explain_queries(queries)
+	finally:
+		frappe.flags.skip_result_cache = False
+
+	return {"indexes": index_status(), "predictors": report}
+
+
+def predictor_targets(company, pos_profiles, date_from, date_to, prediction_days, filters):
+	from data_analyst.api import pos
+
+	targets = {}
+	if pos_profiles:
+		args = (company, pos_profiles, date_from, date_to, prediction_days)
+		targets.update(
+			{
+				"pos.sales_prediction": partial(pos.predict_sales, *args),
+				"pos.product_demand_prediction": partial(pos.predict_product_demand, *args),
+				"pos.profit_prediction": partial(pos.predict_profit, *args),
+				"pos.active_customer_prediction": partial(pos.predict_active_customers, *args),
+				"pos.bestseller_prediction": partial(pos.predict_bestsellers, *args),
+				"pos.stock_prediction": partial(pos.predict_stock_needs, *args),
+			}
+		)
+
+	args = (filters, date_from, date_to, prediction_days)
+	targets.update(
+		{
+			"sales_invoice.sales_prediction": partial(pos.predict_sales_revenue, *args),
+			"sales_invoice.product_demand_prediction": partial(pos.predict_product_demand_si, *args),
+			"sales_invoice.profit_prediction": partial(pos.predict_profit_si, *args),
+			"sales_invoice.customer_analysis": partial(pos.analyze_customers, *args),
+			"sales_invoice.bestseller_prediction": partial(pos.predict_bestsellers_si, *args),
+			"sales_invoice.payment_prediction": partial(pos.predict_payment_collection, *args),
+		}
+	)
+	return targets
+
+
+@contextmanager
+def capture_queries():
+	"""Kumpulkan (query, values) SELECT yang dieksekusi lewat frappe.db.sql selama blok berjalan"""
+	queries = []
+
+	def sql(original_sql, query, values=(), *args, **kwargs):
+		if str(query).lstrip().upper().startswith("SELECT"):
+			queries.append((query, values))
+		return original_sql(query, values, *args, **kwargs)
+
+	with wrap_db_sql(sql):
+		yield queries
+
+
+def explain_queries(queries):
+	"""Ringkasan EXPLAIN per query unik; hanya query dengan masalah yang dirinci"""
+	missing = {f'tab{row["doctype"]}': row["index_name"] for row in index_status() if not row["exists"]}
+
+	seen = set()
+	issues = []
+	for query, values in queries:
+		normalized = " ".join(str(query).split())
+		if normalized in seen:
+			continue
+		seen.add(normalized)
+
+		plan = frappe.db.sql(f"EXPLAIN {query}", values, as_dict=1)
+		problems = plan_issues(plan)
+		if problems:
+			tables = table_aliases(normalized)
+			issues.append(
+				{
+					"query": normalized[:500],
+					"issues": problems,
+					"missing_indexes": sorted(
+						{
+							missing[tables.get(p["table"], p["table"])]
+							for p in problems
+							if tables.get(p["table"], p["table"]) in missing
+						}
+					),
+				}
+			)
+
+	return {"queries": len(seen), "issues": issues}
+
+
+def table_aliases(query):
+	"""alias (atau nama tabel) -> nama tabel untuk mencocokkan kolom `table` EXPLAIN"""
+	aliases = {}
+	for table, alias in _TABLE_ALIAS.findall(query):
+		aliases[table] = table
+		if alias:
+			aliases[alias] = table
+	return aliases
+
+
+def plan_issues(plan):
+	"""Baris EXPLAIN yang full scan, full index scan, filesort atau temporary table"""
+	problems = []
+	for row in plan:
+		table = row.get("table") or ""
+		if table.startswith("<"):
+			# Derived table / union hasil subquery
+			continue
+
+		rows = int(row.get("rows") or 0)
+		if rows < MIN_REPORTED_ROWS:
+			continue
+
+		extra = row.get("Extra") or ""
+		found = []
+		if row.get("type") == "ALL":
+			found.append("full_scan")
+		elif row.get("type") == "index":
+			found.append("full_index_scan")
+		if "Using filesort" in extra:
+			found.append("filesort")
+		if "Using temporary" in extra:
+			found.append("temporary")
+
+		if found:
+			problems.append(
+				{
+					"table": table,
+					"issues": found,
+					"rows": rows,
+					"key": row.get("key"),
+					"possible_keys": row.get("possible_keys"),
+				}
+			)
+	return problems
@@ -0,0 +1,185 @@
+import frappe
+from frappe import _
+
+from data_analyst.api.encoding import encode_response, validate_format
+
+# Di atas jumlah invoice ini prediksi dijalankan di background (mode 'auto')
+ASYNC_INVOICE_THRESHOLD = 20000
+
+# Lama status/hasil job disimpan di cache (detik)
+JOB_RESULT_TTL = 60 * 60
+
+JOB_TIMEOUT = 30 * 60
+JOB_PREFIX = "data_analyst:job:"
+JOB_EVENT = "data_analyst_prediction_job"
+
+
+def should_run_async(run_async, doctype, filters):
+	"""
+	Tentukan apakah prediksi dijalankan di background.
+
+	Args:
+	    run_async: '1' selalu async, 'auto' async jika estimasi jumlah invoice
+	        melewati ASYNC_INVOICE_THRESHOLD, selain itu sinkron
+	    doctype: 'POS Invoice' atau 'Sales Invoice'
+	    filters: filter frappe.db.count untuk estimasi
+	"""
+	if frappe.flags.in_prediction_job:
+		return False
+
+	run_async = str(run_async or "0").lower()
+	if run_async in ("1", "true"):
+		return True
+	if run_async != "auto":
+		return False
+
+	return estimate_invoice_count(doctype, filters) > ASYNC_INVOICE_THRESHOLD
+
+
+def estimate_invoice_count(doctype, filters):
+	return frappe.db.count(doctype, filters=dict(filters, docstatus=1))
+
+
+def enqueue_prediction(method, **kwargs):
+	"""Jalankan method prediksi di queue 'long' dan kembalikan job id"""
+	job_id = frappe.generate_hash(length=16)
+	user = frappe.session.user
+
+	_set_job(job_id, {"status": "queued", "user": user, "method": method})
+	frappe.enqueue(
+		"data_analyst.api.jobs.run_prediction_job",
+		queue="long",
+		timeout=JOB_TIMEOUT,
+		job_id=f"{JOB_PREFIX}{job_id}",
+		enqueue_after_commit=True,
+		prediction_job_id=job_id,
+		prediction_method=method,
+		user=user,
+		method_kwargs=kwargs,
+	)
+
+	return {"job_id": job_id, "status": "queued"}
+
+
+def run_prediction_job(prediction_job_id, prediction_method, user, method_kwargs):
+	if _is_final(prediction_job_id):
+		return
+
+	_set_job(prediction_job_id, {"status": "running", "user": user, "method": prediction_method})
+	if _is_final(prediction_job_id):
+		# Dibatalkan di antara pengecekan dan status 'running' di atas
+		_set_job(prediction_job_id, {"status": "cancelled", "user": user, "method": prediction_method})
+		return
+
+	frappe.flags.in_prediction_job = True
+
+	try:
+		result = frappe.get_attr(prediction_method)(**method_kwargs)
+	except Exception:
+		frappe.log_error(title=_("Prediction job gagal"))
+		job = {
+			"status": "failed",
+			"user": user,
+			"method": prediction_method,
+			"error": _("Prediksi gagal diproses"),
+		}
+	else:
+		job = {"status": "finished", "user": user, "method": prediction_method, "result": result}
+	finally:
+		frappe.flags.in_prediction_job = False
+
+	# Job yang dibatalkan tepat sebelum selesai tidak menimpa status 'cancelled'
+	if not _claim_final(prediction_job_id):
+		return
+
+	_set_job(prediction_job_id, job)
+	frappe.publish_realtime(
+		JOB_EVENT, {"job_id": prediction_job_id, "status": job["status"]}, user=user, after_commit=True
+	)
+
+
+@frappe.whitelist(allow_guest=False, methods=["GET", "POST"])
+def get_prediction_job(job_id=None, format=None):
+	"""
+	Status job prediksi async; hasil ikut dikembalikan jika job selesai
+
+	Args:
+	    job_id: id dari response endpoint prediksi
+	    format: 'columnar' untuk response ringkas (lihat data_analyst.api.encoding)
+
+	Usage:
+	    GET: /api/method/data_analyst.api.jobs.get_prediction_job?job_id=abc123
+	"""
+	if not job_id:
+		frappe.throw(_("Parameter 'job_id' wajib diisi"))
+
+	response_format = validate_format(format)
+
+	job = _get_user_job(job_id)
+
+	response = {"job_id": job_id, "status": job["status"]}
+	if job["status"] == "finished":
+		response["result"] = job["result"]
+	elif job["status"] == "failed":
+		response["error"] = job["error"]
+	return encode_response(response, response_format)
+
+
+@frappe.whitelist(allow_guest=False, methods=["POST"])
+def cancel_prediction_job(job_id=None):
+	"""
+	Batalkan job prediksi yang belum selesai, mis. saat request di browser
+	digantikan request baru. Job yang masih antre dibuang dari queue, job
+	yang sedang berjalan dihentikan.
+
+	Usage:
+	    POST: /api/method/data_analyst.api.jobs.cancel_prediction_job (job_id=abc123)
+	"""
+	if not job_id:
+		frappe.throw(_("Parameter 'job_id' wajib diisi"))
+
+	job = _get_user_job(job_id)
+	if job["status"] not in ("queued", "running") or not _claim_final(job_id):
+		# Sudah selesai / dibatalkan, atau selesai bersamaan dengan request ini
+		return {"job_id": job_id, "status": _get_user_job(job_id)["status"]}
+
+	_set_job(job_id, {"status": "cancelled", "user": job["user"], "method": job["method"]})
+
+	from frappe.utils.background_jobs import get_job, get_redis_conn
+	from rq.command import send_stop_job_command
+
+	rq_job = get_job(f"{JOB_PREFIX}{job_id}")
+	if rq_job:
+		if rq_job.get_status() == "started":
+			send_stop_job_command(get_redis_conn(), rq_job.id)
+		else:
+			rq_job.cancel()
+
+	return {"job_id": job_id, "status": "cancelled"}
+
+
+def _get_user_job(job_id):
+	job = frappe.cache.get_value(JOB_PREFIX + job_id)
+	if not job or job["user"] != frappe.session.user:
+		frappe.throw(_("Job prediksi tidak ditemukan atau sudah kadaluarsa"), frappe.DoesNotExistError)
+	return job
+
+
+def _final_key(job_id):
+	return frappe.cache.make_key(f"{JOB_PREFIX}{job_id}:final")
+
+
+def _claim_final(job_id):
+	"""
+	Klaim atomik (SET NX) hak menulis status akhir job. Hanya satu dari
+	cancel_prediction_job dan selesainya run_prediction_job yang berhasil.
+	"""
+	return bool(frappe.cache.set(_final_key(job_id), 1, ex=JOB_RESULT_TTL, nx=True))
+
+
+def _is_final(job_id):
+	return bool(frappe.cache.exists(_final_key(job_id)))
+
+
+def _set_job(job_id, job):
+	frappe.cache.set_value(JOB_PREFIX + job_id, job, expires_in_sec=JOB_RESULT_TTL)
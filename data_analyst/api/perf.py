@@ -0,0 +1,121 @@
+import json
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import frappe
+from frappe.utils import cint
+
+# Rolling log JSON per request: sites/<site>/logs/data_analyst_perf.log
+PERF_LOG_MAX_SIZE = 5 * 1024 * 1024
+PERF_LOG_FILE_COUNT = 10
+
+# Jumlah statement SQL paling lambat yang dilaporkan per section
+SLOWEST_SQL_LIMIT = 3
+
+
+def start_perf(perf, endpoint, params=None):
+	"""PerfRecorder jika instrumentasi diminta (perf=1) oleh System Manager, selain itu None"""
+	if not cint(perf) or "System Manager" not in frappe.get_roles():
+		return None
+	return PerfRecorder(endpoint, params)
+
+
+@contextmanager
+def wrap_db_sql(wrapper):
+	"""
+	Bungkus `frappe.db.sql` koneksi yang aktif selama blok berjalan.
+
+	wrapper(sql, query, *args, **kwargs) menerima fungsi sql yang berlaku sebelum
+	blok, jadi blok bersarang saling membungkus. Atribut sebelumnya dipulihkan
+	apa adanya saat keluar, termasuk wrapper milik blok luar.
+	"""
+	db = frappe.db
+	previous = vars(db).get("sql")
+	db.sql = partial(wrapper, db.sql)
+	try:
+		yield
+	finally:
+		if previous is None:
+			del db.sql
+		else:
+			db.sql = previous
+
+
+@contextmanager
+def perf_section(perf, name):
+	"""Ukur blok sebagai section jika perf aktif"""
+	if not perf:
+		yield
+		return
+	with perf.section(name):
+		yield
+
+
+class PerfRecorder:
+	"""
+	Instrumentasi per section: wall time, jumlah statement SQL, waktu SQL,
+	baris yang diambil, dan sisa waktu untuk post-processing Python.
+
+	Query dihitung dengan membungkus `frappe.db.sql` koneksi yang aktif selama
+	section berjalan, jadi section paralel (thread dengan koneksi sendiri)
+	tetap terukur terpisah.
+	"""
+
+	def __init__(self, endpoint, params=None):
+		self.endpoint = endpoint
+		self.params = params or {}
+		self.started = time.perf_counter()
+		self.sections = {}
+
+	@contextmanager
+	def section(self, name):
+		stats = {"sql_count": 0, "sql_ms": 0.0, "rows": 0, "slowest_sql": []}
+
+		def sql(original_sql, query, *args, **kwargs):
+			start = time.perf_counter()
+			result = original_sql(query, *args, **kwargs)
+			elapsed = (time.perf_counter() - start) * 1000
+
+			stats["sql_count"] += 1
+			stats["sql_ms"] += elapsed
+			stats["rows"] += len(result) if isinstance(result, list | tuple) else 0
+			stats["slowest_sql"].append((elapsed, " ".join(str(query).split())[:300]))
+			stats["slowest_sql"] = sorted(stats["slowest_sql"], reverse=True)[:SLOWEST_SQL_LIMIT]
+			return result
+
+		start = time.perf_counter()
+		try:
+			with wrap_db_sql(sql):
+				yield
+		finally:
+			wall_ms = (time.perf_counter() - start) * 1000
+			self.sections[name] = {
+				"wall_ms": round(wall_ms, 2),
+				"sql_count": stats["sql_count"],
+				"sql_ms": round(stats["sql_ms"], 2),
+				"rows": stats["rows"],
+				"python_ms": round(wall_ms - stats["sql_ms"], 2),
+				"slowest_sql": [{"ms": round(ms, 2), "query": q} for ms, q in stats["slowest_sql"]],
+			}
+
+	def finish(self, result):
+		"""Tambahkan blok `_perf` ke hasil dan tulis ringkasannya ke rolling log"""
+		block = {
+			"endpoint": self.endpoint,
+			"total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+			"sql_count": sum(s["sql_count"] for s in self.sections.values()),
+			"sections": self.sections,
+		}
+
+		log_entry = dict(block, user=frappe.session.user, params=self.params)
+		log_entry["sections"] = {
+			name: {k: v for k, v in s.items() if k != "slowest_sql"} for name, s in self.sections.items()
+		}
+		frappe.logger(
+			"data_analyst_perf", allow_site=True, max_size=PERF_LOG_MAX_SIZE, file_count=PERF_LOG_FILE_COUNT
+		).info(json.dumps(log_entry, default=str))
+
+		result = dict(result)
+		result["_perf"] = block
+		return result
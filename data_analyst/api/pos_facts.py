@@ -0,0 +1,404 @@
+import frappe
+import numpy as np
+from frappe.utils import getdate
+
+from data_analyst.api.forecast import fit_linear_trends, series_day_matrix
+from data_analyst.api.valuation import AsOfValuation, to_timestamp_us
+
+COST_SOURCES = ("SLE Valuation Rate", "Item Valuation", "Last Purchase", "No Cost")
+
+# Kolom fakta per baris POS Invoice Item, urutannya mengikuti POSFacts.__init__
+FACT_COLUMNS = """
+            pi.name,
+            DATE(pi.posting_date) as date,
+            pi.posting_time,
+            pi.pos_profile,
+            pi.set_warehouse,
+            pi.customer,
+            pi.customer_name,
+            pi.grand_total,
+            pii.item_code,
+            pii.item_name,
+            pii.item_group,
+            pii.uom,
+            pii.qty,
+            pii.amount,
+            pii.rate,
+            item.valuation_rate,
+            item.last_purchase_rate"""
+
+
+def load_pos_facts(company, pos_profiles, date_from, date_to, invoice_names=None):
+	"""
+	Ambil fakta per baris POS Invoice Item dalam satu kali scan.
+
+	Hasilnya dipakai bersama oleh semua predictor POS sehingga join
+	`tabPOS Invoice` / `tabPOS Invoice Item` tidak di-scan ulang per section.
+	`invoice_names` membatasi scan ke invoice tertentu (export per halaman).
+	"""
+	rows = _fact_rows(company, pos_profiles, date_from, date_to, invoice_names)
+	return POSFacts(rows, date_from, date_to)
+
+
+def load_pos_facts_by_profile(company, pos_profiles, date_from, date_to):
+	"""
+	Seperti load_pos_facts, ditambah POSFacts per POS Profile dari scan yang sama.
+
+	Returns:
+	    (total, by_profile)
+	"""
+	rows = _fact_rows(company, pos_profiles, date_from, date_to)
+	return group_pos_facts(rows, [r[3] for r in rows], date_from, date_to)
+
+
+def _fact_rows(company, pos_profiles, date_from, date_to, invoice_names=None):
+	return frappe.db.sql(
+		"""
+        SELECT {columns}
+        FROM `tabPOS Invoice Item` pii
+        INNER JOIN `tabPOS Invoice` pi ON pii.parent = pi.name
+        LEFT JOIN `tabItem` item ON pii.item_code = item.name
+        WHERE pi.company = %s
+            AND pi.pos_profile IN %s
+            AND pi.docstatus = 1
+            AND pi.posting_date BETWEEN %s AND %s
+            {invoice_filter}
+        ORDER BY pi.posting_date, pi.name, pii.idx
+    """.format(columns=FACT_COLUMNS, invoice_filter="AND pi.name IN %s" if invoice_names else ""),
+		(company, pos_profiles, date_from, date_to) + ((invoice_names,) if invoice_names else ()),
+	)
+
+
+def load_pos_facts_batch(companies, pos_profiles, date_from, date_to):
+	"""
+	Fakta POS beberapa company dalam satu kali scan.
+
+	Returns:
+	    (total, by_company): POSFacts gabungan dan POSFacts per company
+	"""
+	rows = frappe.db.sql(
+		f"""
+        SELECT pi.company, {FACT_COLUMNS}
+        FROM `tabPOS Invoice Item` pii
+        INNER JOIN `tabPOS Invoice` pi ON pii.parent = pi.name
+        LEFT JOIN `tabItem` item ON pii.item_code = item.name
+        WHERE pi.company IN %s
+            AND pi.pos_profile IN %s
+            AND pi.docstatus = 1
+            AND pi.posting_date BETWEEN %s AND %s
+        ORDER BY pi.posting_date, pi.name, pii.idx
+    """,
+		(companies, pos_profiles, date_from, date_to),
+	)
+
+	return group_pos_facts([r[1:] for r in rows], [r[0] for r in rows], date_from, date_to)
+
+
+def group_pos_facts(rows, keys, date_from, date_to):
+	"""
+	POSFacts gabungan dan per kunci grup dari baris fakta yang sama.
+
+	Cost per baris (SLE as-of) hanya di-resolve sekali pada fakta gabungan lalu
+	diiris untuk setiap grup.
+
+	Args:
+	    rows: baris fakta (kolom FACT_COLUMNS)
+	    keys: kunci grup per baris (mis. company, pos_profile)
+	"""
+	total = POSFacts(rows, date_from, date_to)
+
+	positions = {}
+	for i, key in enumerate(keys):
+		positions.setdefault(key, []).append(i)
+
+	groups = {}
+	for key, lines in positions.items():
+		facts = POSFacts([rows[i] for i in lines], date_from, date_to)
+		facts.cost_parent = (total, np.array(lines, dtype=np.int64))
+		groups[key] = facts
+	return total, groups
+
+
+def invoice_facts(doc):
+	"""Fakta POS untuk satu dokumen POS Invoice (dipakai oleh hook rollup)"""
+
+	item_rates = {
+		item.name: item
+		for item in frappe.get_all(
+			"Item",
+			filters={"name": ["in", list({d.item_code for d in doc.items})]},
+			fields=["name", "valuation_rate", "last_purchase_rate"],
+		)
+	}
+
+	posting_date = getdate(doc.posting_date)
+	rows = [
+		(
+			doc.name,
+			posting_date,
+			doc.posting_time,
+			doc.pos_profile,
+			doc.set_warehouse,
+			doc.customer,
+			doc.customer_name,
+			doc.grand_total,
+			d.item_code,
+			d.item_name,
+			d.item_group,
+			d.uom,
+			d.qty,
+			d.amount,
+			d.rate,
+			item_rates[d.item_code].valuation_rate if d.item_code in item_rates else None,
+			item_rates[d.item_code].last_purchase_rate if d.item_code in item_rates else None,
+		)
+		for d in doc.items
+	]
+
+	return POSFacts(rows, str(posting_date), str(posting_date))
+
+
+class POSFacts:
+	"""
+	Frame kolom NumPy dari fakta POS Invoice Item.
+
+	Kolom level invoice (tanggal, customer, grand_total, ...) disimpan sekali per
+	invoice dan dihubungkan ke baris item lewat `line_invoice`. String di-encode
+	menjadi kode integer supaya group-by cukup memakai np.bincount.
+	"""
+
+	def __init__(self, rows, date_from, date_to):
+		self._cache = {}
+		# (POSFacts induk, posisi baris di induk) jika cost diambil dari fakta gabungan
+		self.cost_parent = None
+		self.date_from = date_from
+		self.date_to = date_to
+		self.line_count = len(rows)
+
+		cols = list(zip(*rows, strict=False)) if rows else [()] * 17
+		(
+			invoice,
+			posting_date,
+			posting_time,
+			pos_profile,
+			warehouse,
+			customer,
+			customer_name,
+			grand_total,
+			item_code,
+			item_name,
+			item_group,
+			uom,
+			qty,
+			amount,
+			rate,
+			valuation_rate,
+			last_purchase_rate,
+		) = cols
+
+		# Level invoice
+		self.line_invoice, self.invoice_names = _encode(invoice)
+		first = _first_index(self.line_invoice, len(self.invoice_names))
+
+		self.invoice_date = np.array([posting_date[i] for i in first], dtype="datetime64[D]")
+		self.invoice_posting_time = [posting_time[i] for i in first]
+		self.invoice_warehouse, self.warehouse_names = _encode([warehouse[i] for i in first])
+		self.invoice_grand_total = _floats([grand_total[i] for i in first])
+		self.invoice_profile, self.profile_names = _encode([pos_profile[i] for i in first])
+		self.invoice_customer, self.customer_codes = _encode([customer[i] for i in first])
+
+		customer_first = _first_index(self.invoice_customer, len(self.customer_codes))
+		self.customer_names = [customer_name[first[i]] for i in customer_first]
+
+		# Level baris item
+		self.line_item, self.item_codes = _encode(item_code)
+		item_first = _first_index(self.line_item, len(self.item_codes))
+		self.item_names = [item_name[i] for i in item_first]
+		self.item_groups = [item_group[i] for i in item_first]
+		self.item_uoms = [uom[i] for i in item_first]
+		self.item_valuation_rate = [valuation_rate[i] for i in item_first]
+		self.item_last_purchase_rate = [last_purchase_rate[i] for i in item_first]
+
+		self.line_date = self.invoice_date[self.line_invoice]
+		self.qty = _floats(qty)
+		self.amount = _floats(amount)
+		self.rate = _floats(rate)
+
+	def daily_sales(self):
+		"""Total grand_total dan jumlah invoice per hari (urut tanggal)"""
+		if "daily_sales" not in self._cache:
+			days, day_idx = np.unique(self.invoice_date, return_inverse=True)
+			self._cache["daily_sales"] = {
+				"date": days,
+				"total_sales": np.bincount(day_idx, weights=self.invoice_grand_total, minlength=len(days)),
+				"transaction_count": np.bincount(day_idx, minlength=len(days)),
+			}
+		return self._cache["daily_sales"]
+
+	def profile_daily_sales(self):
+		"""Nama POS Profile dan matriks grand_total per profile x hari periode (hari kosong = 0)"""
+		if "profile_daily_sales" not in self._cache:
+			matrix = series_day_matrix(
+				self.invoice_profile,
+				self.invoice_date,
+				self.invoice_grand_total,
+				len(self.profile_names),
+				self.date_from,
+				self.date_to,
+			)
+			self._cache["profile_daily_sales"] = (self.profile_names, matrix)
+		return self._cache["profile_daily_sales"]
+
+	def item_summary(self):
+		"""Agregat per item_code, setara GROUP BY pii.item_code"""
+		if "item_summary" not in self._cache:
+			n_items = len(self.item_codes)
+			n_invoices = len(self.invoice_names)
+
+			line_count = np.bincount(self.line_item, minlength=n_items)
+			total_qty = np.bincount(self.line_item, weights=self.qty, minlength=n_items)
+			total_amount = np.bincount(self.line_item, weights=self.amount, minlength=n_items)
+			total_rate = np.bincount(self.line_item, weights=self.rate, minlength=n_items)
+
+			# COUNT(DISTINCT pi.name) per item
+			item_invoice = np.unique(self.line_item.astype(np.int64) * n_invoices + self.line_invoice)
+			transaction_count = np.bincount(item_invoice // max(n_invoices, 1), minlength=n_items)
+
+			# COUNT(DISTINCT pi.customer) per item, NULL tidak dihitung
+			n_customers = len(self.customer_codes)
+			line_customer = self.invoice_customer[self.line_invoice]
+			has_customer = _not_null_mask(self.customer_codes)[line_customer]
+			item_customer = np.unique(
+				self.line_item[has_customer].astype(np.int64) * n_customers + line_customer[has_customer]
+			)
+			unique_customers = np.bincount(item_customer // max(n_customers, 1), minlength=n_items)
+
+			safe_count = np.maximum(line_count, 1)
+			self._cache["item_summary"] = {
+				"total_qty": total_qty,
+				"total_amount": total_amount,
+				"transaction_count": transaction_count,
+				"unique_customers": unique_customers,
+				"avg_qty": total_qty / safe_count,
+				"avg_rate": total_rate / safe_count,
+			}
+		return self._cache["item_summary"]
+
+	def top_items(self, key, limit):
+		"""Index item terurut menurun berdasarkan kolom item_summary (ORDER BY ... DESC LIMIT)"""
+		values = self.item_summary()[key]
+		return np.argsort(-values, kind="stable")[:limit].tolist()
+
+	def unique_customers(self, indices):
+		"""COUNT(DISTINCT customer) untuk item pada index yang diminta"""
+		unique_customers = self.item_summary()["unique_customers"]
+		return [int(unique_customers[i]) for i in indices]
+
+	def item_trends(self, horizon):
+		"""Trend qty harian per item untuk seluruh katalog (lihat fit_linear_trends)"""
+		key = ("item_trends", horizon)
+		if key not in self._cache:
+			matrix = series_day_matrix(
+				self.line_item, self.line_date, self.qty, len(self.item_codes), self.date_from, self.date_to
+			)
+			self._cache[key] = fit_linear_trends(matrix, horizon)
+		return self._cache[key]
+
+	def customer_summary(self):
+		"""Agregat per customer (customer kosong diabaikan), urut transaksi terbanyak"""
+		if "customer_summary" not in self._cache:
+			n_customers = len(self.customer_codes)
+			valid = np.array([bool(c) for c in self.customer_codes], dtype=bool)
+			mask = valid[self.invoice_customer] if n_customers else np.zeros(0, dtype=bool)
+			invoice_customer = self.invoice_customer[mask]
+
+			transaction_count = np.bincount(invoice_customer, minlength=n_customers)
+			total_spent = np.bincount(
+				invoice_customer, weights=self.invoice_grand_total[mask], minlength=n_customers
+			)
+
+			present = np.flatnonzero(transaction_count)
+			order = present[np.argsort(-transaction_count[present], kind="stable")]
+			self._cache["customer_summary"] = {
+				"order": order.tolist(),
+				"transaction_count": transaction_count,
+				"total_spent": total_spent,
+			}
+		return self._cache["customer_summary"]
+
+	def line_costs(self):
+		"""
+		Cost per unit dan sumber cost per baris.
+
+		Cost diambil dari SLE terakhir (as-of waktu transaksi) di set_warehouse invoice,
+		dengan fallback yang sama seperti COALESCE(SLE, item.valuation_rate,
+		item.last_purchase_rate, 0). Sumber cost adalah index ke COST_SOURCES.
+		"""
+		if "line_costs" not in self._cache and self.cost_parent:
+			parent, lines = self.cost_parent
+			cost, source = parent.line_costs()
+			self._cache["line_costs"] = (cost[lines], source[lines])
+
+		if "line_costs" not in self._cache:
+			# Pasangan (item, warehouse) unik cukup di-resolve sekali
+			n_warehouses = max(len(self.warehouse_names), 1)
+			pair_keys, line_pair = np.unique(
+				self.line_item * n_warehouses + self.invoice_warehouse[self.line_invoice], return_inverse=True
+			)
+			pairs = [
+				(self.item_codes[key // n_warehouses], self.warehouse_names[key % n_warehouses])
+				for key in pair_keys.tolist()
+			]
+
+			valuation = AsOfValuation(pairs, self.date_from, self.date_to)
+			timestamp = to_timestamp_us(self.invoice_date, self.invoice_posting_time)[self.line_invoice]
+			sle_rate, has_sle = valuation.lookup(valuation.pair_codes(pairs)[line_pair], timestamp)
+
+			valuation_rate = _nullable_floats(self.item_valuation_rate)[self.line_item]
+			last_purchase_rate = _nullable_floats(self.item_last_purchase_rate)[self.line_item]
+
+			cost = np.where(
+				~np.isnan(sle_rate),
+				sle_rate,
+				np.where(
+					~np.isnan(valuation_rate),
+					valuation_rate,
+					np.where(~np.isnan(last_purchase_rate), last_purchase_rate, 0.0),
+				),
+			)
+
+			source = np.select(
+				[has_sle, np.nan_to_num(valuation_rate) > 0, np.nan_to_num(last_purchase_rate) > 0],
+				[0, 1, 2],
+				default=3,
+			)
+
+			self._cache["line_costs"] = (cost, source)
+		return self._cache["line_costs"]
+
+
+def _encode(values):
+	"""Dictionary-encode nilai menjadi kode integer (urutan kemunculan pertama)"""
+	index = {}
+	codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+	return codes, list(index)
+
+
+def _first_index(codes, n):
+	"""Posisi kemunculan pertama setiap kode"""
+	if not n:
+		return []
+	return np.unique(codes, return_index=True)[1].tolist()
+
+
+def _floats(values):
+	return np.fromiter((v or 0 for v in values), dtype=float, count=len(values))
+
+
+def _nullable_floats(values):
+	"""Float array dengan NULL sebagai NaN"""
+	return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _not_null_mask(values):
+	return np.array([v is not None for v in values], dtype=bool)
@@ -0,0 +1,1003 @@
+import hashlib
+import json
+from contextlib import contextmanager
+from functools import partial
+
+import frappe
+import numpy as np
+from frappe import _
+from frappe.utils import add_days, getdate, now_datetime
+
+from data_analyst.api.cache import invalidate_results
+from data_analyst.api.filters import sales_invoice_filters, sales_invoice_values
+from data_analyst.api.forecast import fit_linear_trends, series_day_matrix
+from data_analyst.api.pos_facts import invoice_facts, load_pos_facts
+from data_analyst.api.sketches import (
+	HyperLogLog,
+	approximate_distinct,
+	group_sketches,
+	pos_customer_count,
+	pos_item_customer_counts,
+)
+from data_analyst.api.topk import apply_pos_top_items, day_top_items
+
+# Jumlah baris per statement INSERT ... ON DUPLICATE KEY UPDATE
+UPSERT_BATCH_SIZE = 1000
+
+# Panjang window (hari) per langkah backfill
+BACKFILL_CHUNK_DAYS = 31
+
+# Waktu tunggu maksimum (detik) lock rebuild ringkasan Sales Invoice per company-hari
+DAY_LOCK_TIMEOUT = 60
+
+# Berapa kali refresh dijadwalkan ulang jika lock company-hari tidak didapat
+DAY_LOCK_RETRIES = 5
+
+POS_ITEM_ROLLUP = {
+	"doctype": "POS Daily Item Sales",
+	"keys": ("company", "pos_profile", "posting_date", "item_code"),
+	"attributes": ("item_name", "item_group", "uom"),
+	"measures": ("qty", "amount", "cost", "line_count", "invoice_count", "rate_sum"),
+}
+
+POS_DAILY_ROLLUP = {
+	"doctype": "POS Daily Sales",
+	"keys": ("company", "pos_profile", "posting_date"),
+	"attributes": (),
+	"measures": ("grand_total", "invoice_count"),
+}
+
+
+# Invoice yang sudah masuk rollup POS beserta cost per baris yang ditambahkan
+POS_ROLLUP_ENTRY = {
+	"doctype": "POS Rollup Entry",
+	"keys": ("pos_invoice",),
+	"attributes": ("company", "pos_profile", "posting_date", "line_cost"),
+	"measures": (),
+}
+
+SALES_INVOICE_ROLLUP = {
+	"doctype": "Sales Invoice Daily Summary",
+	"keys": ("company", "posting_date", "customer_group", "territory"),
+	"attributes": ("customer_sketch",),
+	"measures": (
+		"grand_total",
+		"base_grand_total",
+		"net_total",
+		"taxes",
+		"discount",
+		"outstanding",
+		"paid",
+		"invoice_count",
+	),
+}
+
+SALES_INVOICE_ITEM_SKETCH = {
+	"doctype": "Sales Invoice Daily Item Sketch",
+	"keys": ("company", "posting_date", "customer_group", "territory", "item_code"),
+	"attributes": ("customer_sketch",),
+	"measures": (),
+}
+
+
+def with_sketch(rollup, *attributes):
+	"""Konfigurasi rollup POS yang juga menulis kolom customer_sketch dan `attributes` lain (backfill)"""
+	return dict(rollup, attributes=rollup["attributes"] + ("customer_sketch",) + attributes)
+
+
+def use_pos_rollup():
+	"""Apakah predictor POS membaca dari rollup harian (Data Analyst Settings)"""
+	return bool(frappe.db.get_single_value("Data Analyst Settings", "use_pos_rollup"))
+
+
+def use_sales_invoice_rollup():
+	"""Apakah predictor Sales Invoice membaca dari ringkasan harian (Data Analyst Settings)"""
+	return bool(frappe.db.get_single_value("Data Analyst Settings", "use_sales_invoice_rollup"))
+
+
+# ========================== Doc Events ===============================
+def on_pos_invoice_submit(doc, method=None):
+	enqueue_pos_invoice(doc, 1)
+
+
+def on_pos_invoice_cancel(doc, method=None):
+	enqueue_pos_invoice(doc, -1)
+
+
+def enqueue_pos_invoice(doc, sign):
+	"""
+	Update rollup di background setelah transaksi checkout commit, hanya selama
+	use_pos_rollup aktif (rollup dibangun ulang saat setting diaktifkan kembali).
+	"""
+	if not use_pos_rollup():
+		return
+
+	frappe.enqueue(
+		"data_analyst.api.rollup.apply_pos_invoice",
+		queue="short",
+		enqueue_after_commit=True,
+		invoice=doc.name,
+		sign=sign,
+	)
+
+
+def apply_pos_invoice(invoice, sign):
+	"""
+	Tambahkan (sign=1) atau kurangi (sign=-1) kontribusi satu POS Invoice ke rollup.
+
+	Cost per baris yang ditambahkan saat submit disimpan di POS Rollup Entry dan
+	dikurangkan apa adanya saat cancel, jadi cost rollup tidak bergeser walaupun
+	valuation berubah di antaranya. Entry juga menandai invoice yang sudah masuk
+	rollup: submit yang sudah diterapkan dan cancel tanpa submit dilewati.
+	Cache hasil POS dihapus setelah commit job ini, bukan setelah commit invoice,
+	supaya request di antaranya tidak meng-cache hasil dari rollup lama.
+	"""
+	doc = frappe.get_doc("POS Invoice", invoice)
+	entry = frappe.db.sql(
+		"""
+        SELECT line_cost
+        FROM `tabPOS Rollup Entry`
+        WHERE pos_invoice = %s
+        FOR UPDATE
+    """,
+		invoice,
+	)
+
+	facts = invoice_facts(doc)
+	if sign > 0:
+		if entry or doc.docstatus != 1:
+			return
+		line_cost = facts.qty * facts.line_costs()[0]
+		upsert_rollup(POS_ROLLUP_ENTRY, pos_rollup_entries(facts, doc.company, line_cost))
+	else:
+		if not entry:
+			return
+		line_cost = np.array(json.loads(entry[0][0] or "[]"), dtype=float)
+		frappe.db.sql("DELETE FROM `tabPOS Rollup Entry` WHERE pos_invoice = %s", invoice)
+
+	item_rows, daily_rows = pos_rollup_rows(facts, doc.company, line_cost=line_cost)
+	upsert_rollup(POS_ITEM_ROLLUP, item_rows, sign)
+	upsert_rollup(POS_DAILY_ROLLUP, daily_rows, sign)
+	apply_pos_sketches(doc, sign)
+	apply_pos_top_items(doc, sign)
+
+	frappe.db.after_commit.add(
+		lambda: invalidate_results(
+			"pos", doc.company, posting_date=doc.posting_date, pos_profile=doc.pos_profile
+		)
+	)
+
+
+def apply_pos_sketches(doc, sign):
+	"""
+	Perbarui sketch customer baris rollup yang disentuh invoice ini.
+
+	Submit cukup menambahkan customer ke sketch yang ada. HyperLogLog tidak bisa
+	menghapus, jadi cancel menghitung ulang sketch hari itu dari invoice yang
+	masih submit. Baris rollup sudah terkunci oleh upsert di transaksi yang sama.
+	"""
+	item_codes = list({d.item_code for d in doc.items if d.item_code})
+	values = (doc.company, doc.pos_profile, getdate(doc.posting_date))
+	if not item_codes:
+		return
+
+	if sign > 0:
+		if not doc.customer:
+			return
+
+		item_sketches = {
+			item_code: HyperLogLog.decode(sketch)
+			for item_code, sketch in frappe.db.sql(
+				"""
+                SELECT item_code, customer_sketch
+                FROM `tabPOS Daily Item Sales`
+                WHERE company = %s AND pos_profile = %s AND posting_date = %s AND item_code IN %s
+            """,
+				(*values, item_codes),
+			)
+		}
+		daily = frappe.db.sql(
+			"""
+            SELECT customer_sketch
+            FROM `tabPOS Daily Sales`
+            WHERE company = %s AND pos_profile = %s AND posting_date = %s
+        """,
+			values,
+		)
+		daily_sketch = HyperLogLog.decode(daily[0][0] if daily else None)
+
+		for sketch in [*list(item_sketches.values()), daily_sketch]:
+			sketch.add(doc.customer)
+	else:
+		item_sketches = {item_code: HyperLogLog() for item_code in item_codes}
+		for item_code, customer in frappe.db.sql(
+			"""
+            SELECT DISTINCT pii.item_code, pi.customer
+            FROM `tabPOS Invoice Item` pii
+            INNER JOIN `tabPOS Invoice` pi ON pii.parent = pi.name
+            WHERE pi.company = %s AND pi.pos_profile = %s AND pi.posting_date = %s
+                AND pi.docstatus = 1 AND pii.item_code IN %s
+        """,
+			(*values, item_codes),
+		):
+			if customer:
+				item_sketches[item_code].add(customer)
+
+		daily_sketch = HyperLogLog.from_customers(
+			frappe.db.sql_list(
+				"""
+            SELECT DISTINCT customer
+            FROM `tabPOS Invoice`
+            WHERE company = %s AND pos_profile = %s AND posting_date = %s AND docstatus = 1
+        """,
+				values,
+			)
+		)
+
+	for item_code, sketch in item_sketches.items():
+		frappe.db.sql(
+			"""
+            UPDATE `tabPOS Daily Item Sales`
+            SET customer_sketch = %s
+            WHERE company = %s AND pos_profile = %s AND posting_date = %s AND item_code = %s
+        """,
+			(sketch.encode(), *values, item_code),
+		)
+
+	frappe.db.sql(
+		"""
+        UPDATE `tabPOS Daily Sales`
+        SET customer_sketch = %s
+        WHERE company = %s AND pos_profile = %s AND posting_date = %s
+    """,
+		(daily_sketch.encode(), *values),
+	)
+
+
+def on_sales_invoice_change(doc, method=None):
+	invoices = [doc.name]
+	# Credit note mengubah outstanding invoice asalnya
+	if doc.get("is_return") and doc.get("return_against"):
+		invoices.append(doc.return_against)
+	enqueue_sales_invoice_refresh(invoices)
+
+
+def on_payment_entry_change(doc, method=None):
+	enqueue_sales_invoice_refresh(
+		[d.reference_name for d in doc.get("references") or [] if d.reference_doctype == "Sales Invoice"]
+	)
+
+
+def on_journal_entry_change(doc, method=None):
+	enqueue_sales_invoice_refresh(
+		[d.reference_name for d in doc.get("accounts") or [] if d.reference_type == "Sales Invoice"]
+	)
+
+
+def enqueue_sales_invoice_refresh(invoices):
+	"""
+	Hitung ulang ringkasan di background setelah transaksi dokumen commit, hanya
+	selama use_sales_invoice_rollup aktif (dibangun ulang saat setting diaktifkan kembali).
+	"""
+	invoices = list({name for name in invoices if name})
+	if not invoices or not use_sales_invoice_rollup():
+		return
+
+	_enqueue_sales_invoice_refresh(invoices)
+
+
+def _enqueue_sales_invoice_refresh(invoices, attempt=0):
+	frappe.enqueue(
+		"data_analyst.api.rollup.refresh_sales_invoice_rollup",
+		queue="short",
+		enqueue_after_commit=True,
+		invoices=invoices,
+		attempt=attempt,
+	)
+
+
+def refresh_sales_invoice_rollup(invoices, attempt=0):
+	"""
+	Hitung ulang ringkasan harian untuk tanggal posting invoice-invoice ini.
+
+	Outstanding dan paid berubah setelah submit (payment, journal, credit note),
+	jadi hari yang terdampak dihitung ulang dari `tabSales Invoice` alih-alih
+	menambahkan delta. Rebuild satu company-hari diserialisasi (day_lock) supaya
+	dua job tidak saling menimpa hasil yang dihitung dari data yang berbeda.
+	Cache hasil Sales Invoice yang terdampak dihapus setelah rebuild di-commit.
+	Hari yang lock-nya tidak didapat dalam DAY_LOCK_TIMEOUT dijadwalkan ulang
+	di job baru (maksimal DAY_LOCK_RETRIES kali) supaya ringkasannya tidak tertinggal.
+	"""
+	invoices = list({name for name in invoices if name})
+	if not invoices:
+		return
+
+	rows = frappe.db.sql(
+		"""
+        SELECT name, company, posting_date, customer_group, territory
+        FROM `tabSales Invoice`
+        WHERE name IN %s
+    """,
+		[invoices],
+	)
+
+	days = {}
+	for name, company, posting_date, customer_group, territory in rows:
+		day = days.setdefault((company, posting_date), {"invoices": [], "groups": set()})
+		day["invoices"].append(name)
+		day["groups"].add((customer_group, territory))
+
+	retry = []
+	for (company, posting_date), day in days.items():
+		with day_lock(company, posting_date) as locked:
+			if not locked:
+				retry.extend(day["invoices"])
+				continue
+
+			rebuild_sales_invoice_rollup(company, posting_date, posting_date)
+			# Dijalankan saat day_lock meng-commit rebuild
+			for customer_group, territory in day["groups"]:
+				frappe.db.after_commit.add(
+					partial(
+						invalidate_results,
+						"sales_invoice",
+						company,
+						customer_group=customer_group,
+						territory=territory,
+					)
+				)
+
+	if not retry:
+		return
+	if attempt >= DAY_LOCK_RETRIES:
+		frappe.log_error(
+			title=_("Ringkasan Sales Invoice tidak dihitung ulang"),
+			message=_("Lock company-hari tidak didapat untuk invoice: {0}").format(", ".join(retry)),
+		)
+		return
+	_enqueue_sales_invoice_refresh(retry, attempt + 1)
+
+
+@contextmanager
+def day_lock(company, posting_date):
+	"""
+	Named lock (GET_LOCK) per company-hari yang dipegang sampai rebuild di-commit.
+	Nilai yang di-yield False jika lock tidak didapat dalam DAY_LOCK_TIMEOUT.
+
+	Tidak ada satu baris per hari yang bisa dikunci dengan SELECT ... FOR UPDATE,
+	jadi dipakai named lock. Transaksi dimulai ulang setelah lock didapat supaya
+	rebuild membaca semua invoice yang sudah di-commit, termasuk oleh rebuild
+	sebelumnya.
+	"""
+	lock = "data_analyst:" + hashlib.sha1(f"{company}|{posting_date}".encode()).hexdigest()[:40]
+	if not frappe.db.sql("SELECT GET_LOCK(%s, %s)", (lock, DAY_LOCK_TIMEOUT))[0][0]:
+		yield False
+		return
+
+	try:
+		frappe.db.commit()
+		yield True
+		frappe.db.commit()
+	finally:
+		frappe.db.sql("SELECT RELEASE_LOCK(%s)", lock)
+
+
+def rebuild_sales_invoice_rollup(company, date_from, date_to):
+	delete_rollup(SALES_INVOICE_ROLLUP, company, date_from, date_to)
+
+	rows = frappe.db.sql(
+		"""
+        SELECT
+            company,
+            posting_date,
+            IFNULL(customer_group, '') as customer_group,
+            IFNULL(territory, '') as territory,
+            SUM(grand_total) as grand_total,
+            SUM(base_grand_total) as base_grand_total,
+            SUM(net_total) as net_total,
+            SUM(total_taxes_and_charges) as taxes,
+            SUM(discount_amount) as discount,
+            SUM(outstanding_amount) as outstanding,
+            SUM(paid_amount) as paid,
+            COUNT(name) as invoice_count
+        FROM `tabSales Invoice`
+        WHERE company = %s
+            AND docstatus = 1
+            AND posting_date BETWEEN %s AND %s
+        GROUP BY posting_date, IFNULL(customer_group, ''), IFNULL(territory, '')
+    """,
+		(company, date_from, date_to),
+		as_dict=1,
+	)
+
+	# Sketch distinct customer per baris ringkasan dan per item
+	customers = frappe.db.sql(
+		"""
+        SELECT posting_date, IFNULL(customer_group, ''), IFNULL(territory, ''), customer
+        FROM `tabSales Invoice`
+        WHERE company = %s
+            AND docstatus = 1
+            AND posting_date BETWEEN %s AND %s
+        GROUP BY posting_date, IFNULL(customer_group, ''), IFNULL(territory, ''), customer
+    """,
+		(company, date_from, date_to),
+	)
+	sketches = group_sketches([tuple(r[:3]) for r in customers], [r[3] for r in customers])
+	for row in rows:
+		row["customer_sketch"] = sketches.get((row.posting_date, row.customer_group, row.territory))
+
+	upsert_rollup(SALES_INVOICE_ROLLUP, rows)
+	rebuild_sales_invoice_item_sketches(company, date_from, date_to)
+
+
+def rebuild_sales_invoice_item_sketches(company, date_from, date_to):
+	delete_rollup(SALES_INVOICE_ITEM_SKETCH, company, date_from, date_to)
+
+	customers = frappe.db.sql(
+		"""
+        SELECT
+            si.posting_date,
+            IFNULL(si.customer_group, ''),
+            IFNULL(si.territory, ''),
+            sii.item_code,
+            si.customer
+        FROM `tabSales Invoice Item` sii
+        INNER JOIN `tabSales Invoice` si ON sii.parent = si.name
+        WHERE si.company = %s
+            AND si.docstatus = 1
+            AND si.posting_date BETWEEN %s AND %s
+            AND sii.item_code IS NOT NULL
+        GROUP BY si.posting_date, IFNULL(si.customer_group, ''), IFNULL(si.territory, ''), sii.item_code, si.customer
+    """,
+		(company, date_from, date_to),
+	)
+
+	sketches = group_sketches([tuple(r[:4]) for r in customers], [r[4] for r in customers])
+	upsert_rollup(
+		SALES_INVOICE_ITEM_SKETCH,
+		[
+			{
+				"company": company,
+				"posting_date": posting_date,
+				"customer_group": customer_group,
+				"territory": territory,
+				"item_code": item_code,
+				"customer_sketch": sketch,
+			}
+			for (posting_date, customer_group, territory, item_code), sketch in sketches.items()
+		],
+	)
+
+
+def pos_rollup_rows(facts, company, with_sketches=False, line_cost=None):
+	"""
+	Agregasi fakta POS ke grain rollup.
+
+	Args:
+	    with_sketches: sertakan `customer_sketch` per baris dan `top_items` per hari (backfill)
+	    line_cost: total cost (qty x cost per unit) per baris; default dari facts.line_costs()
+
+	Returns:
+	    (item_rows, daily_rows): list dict per (pos_profile, tanggal, item) dan per (pos_profile, tanggal)
+	"""
+	if not facts.line_count:
+		return [], []
+
+	days = np.unique(facts.invoice_date)
+	invoice_day = np.searchsorted(days, facts.invoice_date)
+	n_days = len(days)
+	n_items = len(facts.item_codes)
+	n_invoices = len(facts.invoice_names)
+	day_values = days.astype(object).tolist()
+
+	# Grain item: (pos_profile, tanggal, item)
+	line_key = (
+		facts.invoice_profile[facts.line_invoice] * n_days + invoice_day[facts.line_invoice]
+	) * n_items + facts.line_item
+	keys, group = np.unique(line_key, return_inverse=True)
+	n_groups = len(keys)
+
+	if line_cost is None:
+		line_cost = facts.qty * facts.line_costs()[0]
+	measures = {
+		"qty": np.bincount(group, weights=facts.qty, minlength=n_groups),
+		"amount": np.bincount(group, weights=facts.amount, minlength=n_groups),
+		"cost": np.bincount(group, weights=line_cost, minlength=n_groups),
+		"line_count": np.bincount(group, minlength=n_groups),
+		"invoice_count": np.bincount(
+			np.unique(group * n_invoices + facts.line_invoice) // n_invoices, minlength=n_groups
+		),
+		"rate_sum": np.bincount(group, weights=facts.rate, minlength=n_groups),
+	}
+	measures = {field: values.tolist() for field, values in measures.items()}
+
+	if with_sketches:
+		invoice_customers = np.array(facts.customer_codes, dtype=object)[facts.invoice_customer]
+		item_sketches = group_sketches(group.tolist(), invoice_customers[facts.line_invoice].tolist())
+
+	item_rows = []
+	for g, key in enumerate(keys.tolist()):
+		item = key % n_items
+		profile, day = divmod(key // n_items, n_days)
+		row = {
+			"company": company,
+			"pos_profile": facts.profile_names[profile],
+			"posting_date": day_values[day],
+			"item_code": facts.item_codes[item],
+			"item_name": facts.item_names[item],
+			"item_group": facts.item_groups[item],
+			"uom": facts.item_uoms[item],
+		}
+		row.update({field: values[g] for field, values in measures.items()})
+		if with_sketches:
+			row["customer_sketch"] = item_sketches[g]
+		item_rows.append(row)
+
+	# Grain harian: (pos_profile, tanggal)
+	invoice_key = facts.invoice_profile * n_days + invoice_day
+	keys, group = np.unique(invoice_key, return_inverse=True)
+	grand_total = np.bincount(group, weights=facts.invoice_grand_total, minlength=len(keys)).tolist()
+	invoice_count = np.bincount(group, minlength=len(keys)).tolist()
+	if with_sketches:
+		daily_sketches = group_sketches(group.tolist(), invoice_customers.tolist())
+		day_items = {}
+		for row in item_rows:
+			day_items.setdefault((row["pos_profile"], row["posting_date"]), []).append(row)
+
+	daily_rows = []
+	for g, key in enumerate(keys.tolist()):
+		profile, day = divmod(key, n_days)
+		row = {
+			"company": company,
+			"pos_profile": facts.profile_names[profile],
+			"posting_date": day_values[day],
+			"grand_total": grand_total[g],
+			"invoice_count": invoice_count[g],
+		}
+		if with_sketches:
+			row["customer_sketch"] = daily_sketches[g]
+			row["top_items"] = day_top_items(day_items.get((row["pos_profile"], row["posting_date"]), []))
+		daily_rows.append(row)
+
+	return item_rows, daily_rows
+
+
+def pos_rollup_entries(facts, company, line_cost=None):
+	"""Baris POS Rollup Entry per invoice: cost per baris item yang ditambahkan ke rollup"""
+	if not facts.line_count:
+		return []
+
+	if line_cost is None:
+		line_cost = facts.qty * facts.line_costs()[0]
+
+	invoice_lines = {}
+	for invoice, cost in zip(facts.line_invoice.tolist(), line_cost.tolist(), strict=True):
+		invoice_lines.setdefault(invoice, []).append(cost)
+
+	invoice_dates = facts.invoice_date.astype(object).tolist()
+	return [
+		{
+			"pos_invoice": facts.invoice_names[invoice],
+			"company": company,
+			"pos_profile": facts.profile_names[facts.invoice_profile[invoice]],
+			"posting_date": invoice_dates[invoice],
+			"line_cost": json.dumps(costs),
+		}
+		for invoice, costs in invoice_lines.items()
+	]
+
+
+def upsert_rollup(rollup, rows, sign=1):
+	"""
+	INSERT ... ON DUPLICATE KEY UPDATE ke tabel rollup.
+
+	Measure dijumlahkan (dikali sign), attribute ditimpa nilai terbaru. Nama dokumen
+	diturunkan dari kunci sehingga operasi ini idempotent terhadap unique constraint.
+	"""
+	if not rows:
+		return
+
+	keys, attributes, measures = rollup["keys"], rollup["attributes"], rollup["measures"]
+	columns = (
+		"name",
+		"creation",
+		"modified",
+		"modified_by",
+		"owner",
+		"docstatus",
+		"idx",
+		*keys,
+		*attributes,
+		*measures,
+	)
+	now = now_datetime()
+	user = frappe.session.user
+
+	updates = [f"`{m}` = `{m}` + VALUES(`{m}`)" for m in measures]
+	updates += [f"`{a}` = VALUES(`{a}`)" for a in attributes]
+	updates.append("`modified` = VALUES(`modified`)")
+
+	for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+		batch = rows[start : start + UPSERT_BATCH_SIZE]
+		values = []
+		for row in batch:
+			values.extend([rollup_name(rollup, row), now, now, user, user, 0, 0])
+			values.extend(row[k] for k in keys)
+			values.extend(row.get(a) for a in attributes)
+			values.extend(sign * (row[m] or 0) for m in measures)
+
+		placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(batch))
+		frappe.db.sql(
+			"""
+            INSERT INTO `tab{doctype}` ({columns})
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE {updates}
+        """.format(
+				doctype=rollup["doctype"],
+				columns=", ".join(f"`{c}`" for c in columns),
+				placeholders=placeholders,
+				updates=", ".join(updates),
+			),
+			values,
+		)
+
+
+def rollup_name(rollup, row):
+	key = "|".join(str(row[k]) for k in rollup["keys"])
+	return hashlib.sha1(f"{rollup['doctype']}|{key}".encode()).hexdigest()[:20]
+
+
+# ========================== Backfill ===============================
+def backfill_pos_rollup(company=None, date_from=None, date_to=None):
+	"""
+	Bangun ulang rollup POS dari POS Invoice yang sudah submit.
+
+	Rollup pada periode yang di-backfill dihapus lalu diisi ulang per window
+	BACKFILL_CHUNK_DAYS hari, jadi aman dijalankan berulang.
+	"""
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+
+	for company in companies:
+		pos_profiles = frappe.get_all("POS Profile", filters={"company": company}, pluck="name")
+		if not pos_profiles:
+			continue
+
+		for start, end in backfill_windows("POS Invoice", company, date_from, date_to):
+			delete_rollup(POS_ITEM_ROLLUP, company, start, end)
+			delete_rollup(POS_DAILY_ROLLUP, company, start, end)
+			delete_rollup(POS_ROLLUP_ENTRY, company, start, end)
+
+			facts = load_pos_facts(company, pos_profiles, str(start), str(end))
+			item_rows, daily_rows = pos_rollup_rows(facts, company, with_sketches=True)
+			upsert_rollup(with_sketch(POS_ITEM_ROLLUP), item_rows)
+			upsert_rollup(with_sketch(POS_DAILY_ROLLUP, "top_items"), daily_rows)
+			upsert_rollup(POS_ROLLUP_ENTRY, pos_rollup_entries(facts, company))
+			frappe.db.commit()
+
+
+def backfill_sales_invoice_rollup(company=None, date_from=None, date_to=None):
+	"""Bangun ulang ringkasan harian Sales Invoice per window BACKFILL_CHUNK_DAYS hari"""
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+
+	for company in companies:
+		for start, end in backfill_windows("Sales Invoice", company, date_from, date_to):
+			rebuild_sales_invoice_rollup(company, start, end)
+			frappe.db.commit()
+
+
+def backfill_windows(source_doctype, company, date_from=None, date_to=None):
+	"""Window tanggal (start, end) sepanjang BACKFILL_CHUNK_DAYS hari, default seluruh periode dokumen"""
+	bounds = frappe.db.sql(
+		f"""
+        SELECT MIN(posting_date), MAX(posting_date)
+        FROM `tab{source_doctype}`
+        WHERE company = %s AND docstatus = 1
+    """,
+		company,
+	)[0]
+
+	start = date_from or bounds[0]
+	end = date_to or bounds[1]
+	if not start or not end:
+		return
+
+	start, end = getdate(start), getdate(end)
+	while start <= end:
+		chunk_end = min(getdate(add_days(start, BACKFILL_CHUNK_DAYS - 1)), end)
+		yield start, chunk_end
+		start = getdate(add_days(chunk_end, 1))
+
+
+def delete_rollup(rollup, company, date_from, date_to):
+	frappe.db.sql(
+		"""
+        DELETE FROM `tab{doctype}`
+        WHERE company = %s AND posting_date BETWEEN %s AND %s
+    """.format(doctype=rollup["doctype"]),
+		(company, date_from, date_to),
+	)
+
+
+# ========================== Reader ===============================
+class POSRollup:
+	"""
+	Sumber data predictor POS dari rollup harian.
+
+	Menyediakan antarmuka yang sama dengan POSFacts untuk agregat harian dan
+	per item, sehingga biaya query mengikuti jumlah hari x item, bukan jumlah
+	baris invoice.
+	"""
+
+	def __init__(self, company, pos_profiles, date_from, date_to, item_codes=None):
+		"""
+		Args:
+		    item_codes: batasi agregat per item ke item ini saja (mis. kandidat
+		        dari top_item_candidates); None = semua item
+		"""
+		self.company = company
+		self.pos_profiles = pos_profiles
+		self.date_from = date_from
+		self.date_to = date_to
+		self.candidates = item_codes
+		self._cache = {}
+		self._load_items()
+
+	def _values(self):
+		return (self.company, self.pos_profiles, self.date_from, self.date_to)
+
+	def _item_filter(self):
+		"""(klausa, values) pembatas kandidat item untuk query POS Daily Item Sales"""
+		if self.candidates is None:
+			return "", ()
+		return "AND item_code IN %s", (self.candidates or [""],)
+
+	def _load_items(self):
+		item_filter, item_values = self._item_filter()
+		rows = frappe.db.sql(
+			f"""
+            SELECT
+                item_code,
+                MAX(item_name) as item_name,
+                MAX(item_group) as item_group,
+                MAX(uom) as uom,
+                SUM(qty) as total_qty,
+                SUM(amount) as total_amount,
+                SUM(invoice_count) as transaction_count,
+                SUM(line_count) as line_count,
+                SUM(rate_sum) as rate_sum
+            FROM `tabPOS Daily Item Sales`
+            WHERE company = %s
+                AND pos_profile IN %s
+                AND posting_date BETWEEN %s AND %s
+                {item_filter}
+            GROUP BY item_code
+            HAVING SUM(line_count) > 0
+            ORDER BY item_code
+        """,
+			self._values() + item_values,
+			as_dict=1,
+		)
+
+		self.item_codes = [r.item_code for r in rows]
+		self.item_names = [r.item_name for r in rows]
+		self.item_groups = [r.item_group for r in rows]
+		self.item_uoms = [r.uom for r in rows]
+
+		line_count = np.array([r.line_count or 0 for r in rows], dtype=float)
+		total_qty = np.array([r.total_qty or 0 for r in rows], dtype=float)
+		safe_count = np.maximum(line_count, 1)
+		self._item_summary = {
+			"total_qty": total_qty,
+			"total_amount": np.array([r.total_amount or 0 for r in rows], dtype=float),
+			"transaction_count": np.array([r.transaction_count or 0 for r in rows], dtype=np.int64),
+			"avg_qty": total_qty / safe_count,
+			"avg_rate": np.array([r.rate_sum or 0 for r in rows], dtype=float) / safe_count,
+		}
+
+	def daily_sales(self):
+		"""Total grand_total dan jumlah invoice per hari (urut tanggal)"""
+		if "daily_sales" not in self._cache:
+			rows = frappe.db.sql(
+				"""
+                SELECT
+                    posting_date,
+                    SUM(grand_total) as total_sales,
+                    SUM(invoice_count) as transaction_count
+                FROM `tabPOS Daily Sales`
+                WHERE company = %s
+                    AND pos_profile IN %s
+                    AND posting_date BETWEEN %s AND %s
+                GROUP BY posting_date
+                HAVING SUM(invoice_count) > 0
+                ORDER BY posting_date
+            """,
+				self._values(),
+				as_dict=1,
+			)
+
+			self._cache["daily_sales"] = {
+				"date": np.array([r.posting_date for r in rows], dtype="datetime64[D]"),
+				"total_sales": np.array([r.total_sales or 0 for r in rows], dtype=float),
+				"transaction_count": np.array([r.transaction_count or 0 for r in rows], dtype=np.int64),
+			}
+		return self._cache["daily_sales"]
+
+	def profile_daily_sales(self):
+		"""Nama POS Profile dan matriks grand_total per profile x hari periode (hari kosong = 0)"""
+		if "profile_daily_sales" not in self._cache:
+			rows = frappe.db.sql(
+				"""
+                SELECT pos_profile, posting_date, SUM(grand_total)
+                FROM `tabPOS Daily Sales`
+                WHERE company = %s
+                    AND pos_profile IN %s
+                    AND posting_date BETWEEN %s AND %s
+                GROUP BY pos_profile, posting_date
+            """,
+				self._values(),
+			)
+
+			profiles = sorted({r[0] for r in rows})
+			index = {profile: i for i, profile in enumerate(profiles)}
+			matrix = series_day_matrix(
+				[index[r[0]] for r in rows],
+				np.array([r[1] for r in rows], dtype="datetime64[D]"),
+				[r[2] or 0 for r in rows],
+				len(profiles),
+				self.date_from,
+				self.date_to,
+			)
+			self._cache["profile_daily_sales"] = (profiles, matrix)
+		return self._cache["profile_daily_sales"]
+
+	def item_summary(self):
+		return self._item_summary
+
+	def top_items(self, key, limit):
+		"""Index item terurut menurun berdasarkan kolom item_summary (ORDER BY ... DESC LIMIT)"""
+		values = self.item_summary()[key]
+		return np.argsort(-values, kind="stable")[:limit].tolist()
+
+	def unique_customers(self, indices):
+		"""
+		COUNT(DISTINCT customer) per item; rollup harian tidak bisa dijumlah untuk
+		distinct count, jadi dihitung exact hanya untuk item yang diminta
+		"""
+		item_codes = [self.item_codes[i] for i in indices]
+		if not item_codes:
+			return []
+
+		if approximate_distinct():
+			counts = pos_item_customer_counts(*self._values(), item_codes)
+			return [counts.get(item_code, 0) for item_code in item_codes]
+
+		counts = dict(
+			frappe.db.sql(
+				"""
+            SELECT pii.item_code, COUNT(DISTINCT pi.customer)
+            FROM `tabPOS Invoice Item` pii
+            INNER JOIN `tabPOS Invoice` pi ON pii.parent = pi.name
+            WHERE pii.item_code IN %s
+                AND pi.company = %s
+                AND pi.pos_profile IN %s
+                AND pi.docstatus = 1
+                AND pi.posting_date BETWEEN %s AND %s
+            GROUP BY pii.item_code
+        """,
+				(item_codes, *self._values()),
+			)
+		)
+		return [counts.get(item_code, 0) for item_code in item_codes]
+
+	def item_trends(self, horizon):
+		"""Trend qty harian per item dari rollup (lihat fit_linear_trends)"""
+		key = ("item_trends", horizon)
+		if key not in self._cache:
+			item_filter, item_values = self._item_filter()
+			rows = frappe.db.sql(
+				f"""
+                SELECT item_code, posting_date, SUM(qty)
+                FROM `tabPOS Daily Item Sales`
+                WHERE company = %s
+                    AND pos_profile IN %s
+                    AND posting_date BETWEEN %s AND %s
+                    {item_filter}
+                GROUP BY item_code, posting_date
+            """,
+				self._values() + item_values,
+			)
+
+			index = {item_code: i for i, item_code in enumerate(self.item_codes)}
+			rows = [r for r in rows if r[0] in index]
+			matrix = series_day_matrix(
+				[index[r[0]] for r in rows],
+				np.array([r[1] for r in rows], dtype="datetime64[D]"),
+				[r[2] or 0 for r in rows],
+				len(self.item_codes),
+				self.date_from,
+				self.date_to,
+			)
+			self._cache[key] = fit_linear_trends(matrix, horizon)
+		return self._cache[key]
+
+	def dashboard_summary(self):
+		"""Summary untuk get_pos_dashboard"""
+		totals = frappe.db.sql(
+			"""
+            SELECT
+                SUM(invoice_count) as total_invoices,
+                SUM(grand_total) as total_sales
+            FROM `tabPOS Daily Sales`
+            WHERE company = %s
+                AND pos_profile IN %s
+                AND posting_date BETWEEN %s AND %s
+        """,
+			self._values(),
+			as_dict=1,
+		)[0]
+
+		# Distinct customer tidak bisa dijumlah dari rollup: gabungan sketch atau scan header invoice
+		if approximate_distinct():
+			unique_customers = pos_customer_count(*self._values())
+		else:
+			unique_customers = frappe.db.sql(
+				"""
+                SELECT COUNT(DISTINCT customer)
+                FROM `tabPOS Invoice`
+                WHERE company = %s
+                    AND pos_profile IN %s
+                    AND docstatus = 1
+                    AND posting_date BETWEEN %s AND %s
+            """,
+				self._values(),
+			)[0][0]
+
+		total_invoices = int(totals.total_invoices or 0)
+		total_sales = totals.total_sales or 0
+		return {
+			"total_invoices": total_invoices,
+			"total_sales": total_sales,
+			"unique_customers": unique_customers,
+			"avg_transaction_value": (total_sales / total_invoices) if total_invoices else 0,
+		}
+
+
+def get_sales_invoice_rollup(filters, date_from, date_to, columns, group_by=None):
+	"""
+	Agregat harian Sales Invoice dari ringkasan harian, setara GROUP BY DATE(posting_date)
+	pada `tabSales Invoice` dengan filter customer_group / territory opsional.
+
+	Args:
+	    filters: dict dengan company dan opsional customer_group, territory
+	    columns: dict alias -> measure, mis. {'total_sales': 'grand_total'}
+	    group_by: dimensi tambahan per hari ('customer_group' atau 'territory')
+	"""
+	rows = frappe.db.sql(
+		"""
+        SELECT
+            {group_by_column}posting_date as date,
+            {columns}
+        FROM `tabSales Invoice Daily Summary`
+        WHERE company = %(company)s
+            AND posting_date BETWEEN %(date_from)s AND %(date_to)s
+            {customer_group_filter}
+            {territory_filter}
+        GROUP BY {group_by_column}posting_date
+        HAVING SUM(invoice_count) > 0
+        ORDER BY posting_date
+    """.format(
+			group_by_column=f"`{group_by}`, " if group_by in ("customer_group", "territory") else "",
+			columns=",\n            ".join(
+				f"SUM(`{measure}`) as {alias}" for alias, measure in columns.items()
+			),
+			**sales_invoice_filters(filters),
+		),
+		sales_invoice_values(filters, date_from, date_to),
+		as_dict=1,
+	)
+
+	counts = [alias for alias, measure in columns.items() if measure == "invoice_count"]
+	for row in rows:
+		for alias in counts:
+			row[alias] = int(row[alias] or 0)
+	return rows
@@ -0,0 +1,95 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe import _
+
+from data_analyst.api.perf import perf_section
+
+# Default jumlah section yang berjalan bersamaan (= koneksi database tambahan)
+DEFAULT_SECTION_WORKERS = 3
+
+
+def select_sections(sections, available):
+	"""
+	Nama section yang diminta, dalam urutan `available`.
+
+	Args:
+	    sections: list, JSON list atau string dipisah koma; kosong berarti semua section
+	    available: nama section yang disediakan endpoint
+	"""
+	if not sections:
+		return list(available)
+	if isinstance(sections, str):
+		sections = json.loads(sections) if sections.lstrip().startswith("[") else sections.split(",")
+
+	requested = {name.strip() for name in sections if name and name.strip()}
+	unknown = requested - set(available)
+	if unknown:
+		frappe.throw(
+			_("Section tidak dikenal: {0}. Pilihan: {1}").format(
+				", ".join(sorted(unknown)), ", ".join(available)
+			)
+		)
+	return [name for name in available if name in requested] or list(available)
+
+
+def run_sections(sections, perf=None):
+	"""
+	Jalankan section prediksi yang saling independen.
+
+	Section yang gagal menghasilkan blok `status: error` tanpa menggagalkan
+	section lain. Jika `parallel_sections` aktif di Data Analyst Settings,
+	section berjalan bersamaan di thread pool berukuran `max_section_workers`,
+	masing-masing dengan koneksi database sendiri.
+
+	Args:
+	    sections: dict nama section -> callable tanpa argumen
+	    perf: PerfRecorder opsional untuk instrumentasi per section
+
+	Returns:
+	    (results, timings): hasil per section dan durasi per section (ms)
+	"""
+	settings = frappe.get_cached_doc("Data Analyst Settings")
+	workers = min(settings.max_section_workers or DEFAULT_SECTION_WORKERS, len(sections))
+
+	if not settings.parallel_sections or workers < 2:
+		outcomes = {name: _run_section(name, fn, perf) for name, fn in sections.items()}
+	else:
+		site, sites_path, user = frappe.local.site, frappe.local.sites_path, frappe.session.user
+		with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="data_analyst_section") as pool:
+			futures = {
+				name: pool.submit(_run_section_in_thread, site, sites_path, user, name, fn, perf)
+				for name, fn in sections.items()
+			}
+			outcomes = {name: future.result() for name, future in futures.items()}
+
+	results = {name: result for name, (result, _elapsed) in outcomes.items()}
+	timings = {name: elapsed for name, (_result, elapsed) in outcomes.items()}
+	return results, timings
+
+
+def _run_section(name, fn, perf=None):
+	start = time.perf_counter()
+	try:
+		with perf_section(perf, name):
+			result = fn()
+	except Exception as e:
+		frappe.log_error(title=_("Section prediksi {0} gagal").format(name))
+		result = {"status": "error", "message": _("Section {0} gagal diproses: {1}").format(name, str(e))}
+	return result, round((time.perf_counter() - start) * 1000, 2)
+
+
+def _run_section_in_thread(site, sites_path, user, name, fn, perf=None):
+	"""Context frappe dan koneksi database terpisah per thread"""
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	try:
+		frappe.set_user(user)
+		result = _run_section(name, fn, perf)
+		# Error Log dari section yang gagal
+		frappe.db.commit()
+		return result
+	finally:
+		frappe.destroy()
@@ -0,0 +1,220 @@
+"""
+Sketch HyperLogLog untuk distinct customer yang bisa digabung lintas hari.
+
+Setiap baris rollup harian menyimpan sketch customer-nya (kolom `customer_sketch`).
+Distinct customer untuk rentang tanggal apa pun = gabungan (max per register)
+sketch baris-baris di rentang itu, tanpa COUNT(DISTINCT) ke tabel invoice.
+
+Dengan HLL_PRECISION = 12 (4096 register) standard error estimasi adalah
+1.04 / sqrt(4096) ≈ 1.6%, jadi ~95% hasil berada dalam ±3.3% dari nilai exact.
+Sketch kecil disimpan sparse (3 byte per register terisi), sketch besar dense
+(4 KB), keduanya base64.
+"""
+
+import base64
+import hashlib
+
+import frappe
+import numpy as np
+
+from data_analyst.api.filters import sales_invoice_filters, sales_invoice_values
+
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_STANDARD_ERROR = 1.04 / HLL_REGISTERS**0.5
+
+_SPARSE, _DENSE = b"S", b"D"
+_RANK_BITS = 64 - HLL_PRECISION
+_RANK_MASK = (1 << _RANK_BITS) - 1
+_SPARSE_DTYPE = np.dtype([("index", ">u2"), ("rank", "u1")])
+
+
+def approximate_distinct():
+	"""Apakah distinct customer dihitung dari sketch HyperLogLog (Data Analyst Settings)"""
+	return bool(frappe.db.get_single_value("Data Analyst Settings", "approximate_distinct"))
+
+
+def customer_register(customer):
+	"""(index register, rank) untuk satu customer"""
+	h = int.from_bytes(hashlib.blake2b(str(customer).encode(), digest_size=8).digest(), "big")
+	rest = h & _RANK_MASK
+	return h >> _RANK_BITS, _RANK_BITS - rest.bit_length() + 1
+
+
+class HyperLogLog:
+	def __init__(self, registers=None):
+		self.registers = registers if registers is not None else np.zeros(HLL_REGISTERS, dtype=np.uint8)
+
+	@classmethod
+	def from_registers(cls, index, rank):
+		"""Sketch dari pasangan (index, rank) hasil customer_register"""
+		sketch = cls()
+		if len(index):
+			np.maximum.at(
+				sketch.registers, np.asarray(index, dtype=np.int64), np.asarray(rank, dtype=np.uint8)
+			)
+		return sketch
+
+	@classmethod
+	def from_customers(cls, customers):
+		pairs = [customer_register(c) for c in customers if c]
+		return cls.from_registers([p[0] for p in pairs], [p[1] for p in pairs])
+
+	@classmethod
+	def decode(cls, value):
+		"""Sketch dari nilai kolom `customer_sketch`; kosong = sketch kosong"""
+		if not value:
+			return cls()
+
+		raw = base64.b64decode(value)
+		if raw[:1] == _DENSE:
+			return cls(np.frombuffer(raw[1:], dtype=np.uint8).copy())
+
+		pairs = np.frombuffer(raw[1:], dtype=_SPARSE_DTYPE)
+		return cls.from_registers(pairs["index"], pairs["rank"])
+
+	def encode(self):
+		filled = np.flatnonzero(self.registers)
+		if len(filled) * _SPARSE_DTYPE.itemsize < HLL_REGISTERS:
+			pairs = np.empty(len(filled), dtype=_SPARSE_DTYPE)
+			pairs["index"] = filled
+			pairs["rank"] = self.registers[filled]
+			raw = _SPARSE + pairs.tobytes()
+		else:
+			raw = _DENSE + self.registers.tobytes()
+		return base64.b64encode(raw).decode()
+
+	def add(self, customer):
+		index, rank = customer_register(customer)
+		self.registers[index] = max(self.registers[index], rank)
+
+	def merge(self, other):
+		np.maximum(self.registers, other.registers, out=self.registers)
+		return self
+
+	def count(self):
+		m = HLL_REGISTERS
+		estimate = (
+			(0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+		)
+
+		# Linear counting untuk kardinalitas kecil
+		zeros = int(np.count_nonzero(self.registers == 0))
+		if estimate <= 2.5 * m and zeros:
+			estimate = m * np.log(m / zeros)
+		return int(round(estimate))
+
+
+def merge_sketches(values):
+	sketch = HyperLogLog()
+	for value in values:
+		if value:
+			sketch.merge(HyperLogLog.decode(value))
+	return sketch
+
+
+def group_sketches(groups, customers):
+	"""
+	Sketch ter-encode per grup.
+
+	Args:
+	    groups: kunci grup per baris (hashable)
+	    customers: customer per baris (None diabaikan)
+
+	Returns:
+	    dict grup -> nilai `customer_sketch`
+	"""
+	registers = {}
+	by_group = {}
+	for group, customer in zip(groups, customers, strict=False):
+		if not customer:
+			by_group.setdefault(group, [])
+			continue
+		if customer not in registers:
+			registers[customer] = customer_register(customer)
+		by_group.setdefault(group, []).append(registers[customer])
+
+	return {
+		group: HyperLogLog.from_registers([p[0] for p in pairs], [p[1] for p in pairs]).encode()
+		for group, pairs in by_group.items()
+	}
+
+
+# ========================== Query ===============================
+def pos_customer_count(company, pos_profiles, date_from, date_to):
+	"""Perkiraan COUNT(DISTINCT customer) POS Invoice dari sketch POS Daily Sales"""
+	rows = frappe.db.sql(
+		"""
+        SELECT customer_sketch
+        FROM `tabPOS Daily Sales`
+        WHERE company = %s
+            AND pos_profile IN %s
+            AND posting_date BETWEEN %s AND %s
+    """,
+		(company, pos_profiles, date_from, date_to),
+	)
+	return merge_sketches(r[0] for r in rows).count()
+
+
+def pos_item_customer_counts(company, pos_profiles, date_from, date_to, item_codes):
+	"""Perkiraan COUNT(DISTINCT customer) per item dari sketch POS Daily Item Sales"""
+	if not item_codes:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+        SELECT item_code, customer_sketch
+        FROM `tabPOS Daily Item Sales`
+        WHERE company = %s
+            AND pos_profile IN %s
+            AND posting_date BETWEEN %s AND %s
+            AND item_code IN %s
+    """,
+		(company, pos_profiles, date_from, date_to, item_codes),
+	)
+	return _counts_by_key(rows)
+
+
+def sales_invoice_customer_count(filters, date_from, date_to):
+	"""Perkiraan COUNT(DISTINCT customer) Sales Invoice dari sketch Sales Invoice Daily Summary"""
+	rows = frappe.db.sql(
+		"""
+        SELECT customer_sketch
+        FROM `tabSales Invoice Daily Summary`
+        WHERE company = %(company)s
+            AND posting_date BETWEEN %(date_from)s AND %(date_to)s
+            {customer_group_filter}
+            {territory_filter}
+    """.format(**sales_invoice_filters(filters)),
+		sales_invoice_values(filters, date_from, date_to),
+	)
+	return merge_sketches(r[0] for r in rows).count()
+
+
+def sales_invoice_item_customer_counts(filters, date_from, date_to, item_codes):
+	"""Perkiraan COUNT(DISTINCT customer) per item dari Sales Invoice Daily Item Sketch"""
+	if not item_codes:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+        SELECT item_code, customer_sketch
+        FROM `tabSales Invoice Daily Item Sketch`
+        WHERE company = %(company)s
+            AND posting_date BETWEEN %(date_from)s AND %(date_to)s
+            AND item_code IN %(item_codes)s
+            {customer_group_filter}
+            {territory_filter}
+    """.format(**sales_invoice_filters(filters)),
+		dict(sales_invoice_values(filters, date_from, date_to), item_codes=item_codes),
+	)
+	return _counts_by_key(rows)
+
+
+def _counts_by_key(rows):
+	sketches = {}
+	for key, value in rows:
+		sketch = sketches.setdefault(key, HyperLogLog())
+		if value:
+			sketch.merge(HyperLogLog.decode(value))
+	return {key: sketch.count() for key, sketch in sketches.items()}
@@ -0,0 +1,192 @@
+"""
+Ringkasan top-K item (Space-Saving) per (company, POS Profile, hari).
+
+Setiap baris POS Daily Sales menyimpan counter Space-Saving untuk qty, amount
+dan invoice_count (kolom `top_items`, JSON). Counter bersifat overestimate
+dengan batas error per item; ringkasan beberapa hari bisa digabung dengan
+menganggap item yang tidak tercatat di suatu hari bernilai counter terkecil
+hari itu. Item yang benar-benar masuk top-K selalu ada di ringkasan gabungan,
+jadi ringkasan dipakai untuk memilih kandidat lalu angka exact diambil dari
+rollup hanya untuk kandidat tersebut.
+"""
+
+import json
+
+import frappe
+from frappe.utils import getdate
+
+# Jumlah counter per ringkasan; harus >= jumlah item terbanyak yang diminta predictor
+TOP_ITEM_COUNTERS = 64
+
+TOP_ITEM_MEASURES = ("qty", "amount", "invoice_count")
+
+
+def use_top_item_sketch():
+	"""Apakah kandidat item terlaris dipilih dari ringkasan top-K (Data Analyst Settings)"""
+	return bool(frappe.db.get_single_value("Data Analyst Settings", "use_top_item_sketch"))
+
+
+class SpaceSaving:
+	def __init__(self, counters=None, capacity=TOP_ITEM_COUNTERS):
+		# item_code -> [count, error]
+		self.counters = counters or {}
+		self.capacity = capacity
+
+	@classmethod
+	def from_totals(cls, totals, capacity=TOP_ITEM_COUNTERS):
+		"""Ringkasan dari nilai exact per item (top `capacity`, error 0)"""
+		top = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:capacity]
+		return cls({item: [value, 0] for item, value in top}, capacity)
+
+	def add(self, item, weight):
+		counters = self.counters
+		if item in counters:
+			counters[item][0] += weight
+		elif len(counters) < self.capacity:
+			counters[item] = [weight, 0]
+		else:
+			victim = min(counters, key=lambda k: counters[k][0])
+			floor = counters.pop(victim)[0]
+			counters[item] = [floor + weight, floor]
+
+	def floor(self):
+		"""Batas atas nilai item yang tidak tercatat"""
+		if len(self.counters) < self.capacity:
+			return 0
+		return min(count for count, _error in self.counters.values())
+
+	def top(self, limit):
+		"""[(item_code, estimate, error)] terurut menurun"""
+		ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:limit]
+		return [(item, count, error) for item, (count, error) in ranked]
+
+	@classmethod
+	def merge(cls, summaries, capacity=TOP_ITEM_COUNTERS):
+		summaries = list(summaries)
+		items = set().union(*(s.counters for s in summaries)) if summaries else set()
+		floors = [s.floor() for s in summaries]
+
+		merged = {}
+		for item in items:
+			count = error = 0
+			for summary, floor in zip(summaries, floors, strict=False):
+				counter = summary.counters.get(item)
+				if counter:
+					count += counter[0]
+					error += counter[1]
+				else:
+					count += floor
+					error += floor
+			merged[item] = [count, error]
+
+		top = sorted(merged.items(), key=lambda kv: kv[1][0], reverse=True)[:capacity]
+		return cls(dict(top), capacity)
+
+
+def encode_top_items(summaries):
+	return json.dumps(
+		{measure: summaries[measure].counters for measure in TOP_ITEM_MEASURES}, separators=(",", ":")
+	)
+
+
+def decode_top_items(value):
+	data = json.loads(value) if value else {}
+	return {measure: SpaceSaving(data.get(measure)) for measure in TOP_ITEM_MEASURES}
+
+
+def day_top_items(item_rows):
+	"""Nilai `top_items` dari baris rollup item satu hari (dict dengan item_code dan measure)"""
+	return encode_top_items(
+		{
+			measure: SpaceSaving.from_totals({row["item_code"]: row[measure] or 0 for row in item_rows})
+			for measure in TOP_ITEM_MEASURES
+		}
+	)
+
+
+# ========================== Doc Events ===============================
+def apply_pos_top_items(doc, sign):
+	"""
+	Perbarui ringkasan top-K hari invoice ini.
+
+	Submit menambah counter Space-Saving; cancel dan invoice dengan nilai negatif
+	(retur) dihitung ulang dari baris rollup item hari itu karena Space-Saving
+	tidak mendukung pengurangan.
+	"""
+	values = (doc.company, doc.pos_profile, getdate(doc.posting_date))
+	items = {}
+	for d in doc.items:
+		if d.item_code:
+			totals = items.setdefault(d.item_code, {"qty": 0, "amount": 0, "invoice_count": 1})
+			totals["qty"] += d.qty or 0
+			totals["amount"] += d.amount or 0
+
+	if sign < 0 or any(t["qty"] < 0 or t["amount"] < 0 for t in items.values()):
+		rebuild_day_top_items(*values)
+		return
+
+	current = frappe.db.sql(
+		"""
+        SELECT top_items
+        FROM `tabPOS Daily Sales`
+        WHERE company = %s AND pos_profile = %s AND posting_date = %s
+    """,
+		values,
+	)
+	summaries = decode_top_items(current[0][0] if current else None)
+	for item_code, totals in items.items():
+		for measure in TOP_ITEM_MEASURES:
+			summaries[measure].add(item_code, totals[measure])
+
+	_write_day_top_items(values, encode_top_items(summaries))
+
+
+def rebuild_day_top_items(company, pos_profile, posting_date):
+	rows = frappe.db.sql(
+		"""
+        SELECT item_code, qty, amount, invoice_count
+        FROM `tabPOS Daily Item Sales`
+        WHERE company = %s AND pos_profile = %s AND posting_date = %s
+    """,
+		(company, pos_profile, posting_date),
+		as_dict=1,
+	)
+	_write_day_top_items((company, pos_profile, posting_date), day_top_items(rows))
+
+
+def _write_day_top_items(values, top_items):
+	frappe.db.sql(
+		"""
+        UPDATE `tabPOS Daily Sales`
+        SET top_items = %s
+        WHERE company = %s AND pos_profile = %s AND posting_date = %s
+    """,
+		(top_items, *values),
+	)
+
+
+# ========================== Query ===============================
+def merged_top_items(company, pos_profiles, date_from, date_to):
+	"""Ringkasan gabungan per measure untuk rentang tanggal, tanpa membaca tabel invoice"""
+	rows = frappe.db.sql(
+		"""
+        SELECT top_items
+        FROM `tabPOS Daily Sales`
+        WHERE company = %s
+            AND pos_profile IN %s
+            AND posting_date BETWEEN %s AND %s
+    """,
+		(company, pos_profiles, date_from, date_to),
+	)
+
+	days = [decode_top_items(r[0]) for r in rows]
+	return {measure: SpaceSaving.merge(day[measure] for day in days) for measure in TOP_ITEM_MEASURES}
+
+
+def top_item_candidates(company, pos_profiles, date_from, date_to, limit=TOP_ITEM_COUNTERS):
+	"""Gabungan kandidat top-`limit` item untuk semua measure"""
+	merged = merged_top_items(company, pos_profiles, date_from, date_to)
+	candidates = []
+	for measure in TOP_ITEM_MEASURES:
+		candidates += [item for item, _estimate, _error in merged[measure].top(limit)]
+	return list(dict.fromkeys(candidates))
@@ -0,0 +1,352 @@
+"""
+Statistik cukup regresi trend penjualan harian yang di-update secara inkremental.
+
+Setiap series (POS Profile, atau kombinasi customer_group|territory Sales Invoice)
+menyimpan satu baris per hari dengan Σy dan Σxy kumulatif, x = hari sejak
+TREND_EPOCH dan y = grand_total harian dalam sen (integer, jadi penjumlahan
+exact). Statistik window [a, b] cukup dua baris kumulatif per series; n, Σx dan
+Σx² untuk hari kalender berurutan dihitung dengan rumus tertutup.
+
+Submit/cancel invoice mengubah baris hari itu dan baris kumulatif setelahnya,
+yang untuk invoice hari berjalan hanya satu baris.
+
+Regresi memakai hari kalender (hari tanpa penjualan = 0), sedangkan predictor
+default meregresi hari yang ada penjualan saja; hasil dari sini ditandai
+`basis: calendar_days` (lihat deskripsi use_trend_state di Data Analyst Settings).
+"""
+
+import hashlib
+from datetime import date
+
+import frappe
+from frappe.utils import add_days, getdate, now_datetime
+
+STATE_DOCTYPE = "Sales Trend State"
+
+TREND_EPOCH = date(2020, 1, 1)
+
+# Panjang window awal/akhir untuk growth_rate_percentage
+GROWTH_WINDOW_DAYS = 7
+
+
+def use_trend_state():
+	"""Apakah trend penjualan linear dibaca dari Sales Trend State (Data Analyst Settings)"""
+	return bool(frappe.db.get_single_value("Data Analyst Settings", "use_trend_state"))
+
+
+def day_number(posting_date):
+	return (getdate(posting_date) - TREND_EPOCH).days
+
+
+def to_cents(amount):
+	return int(round((amount or 0) * 100))
+
+
+def si_series_keys(customer_group=None, territory=None):
+	"""Semua kombinasi filter Sales Invoice yang mencakup invoice ini ('' = tanpa filter)"""
+	return list(
+		dict.fromkeys(
+			f"{group}|{area}" for group in ("", customer_group or "") for area in ("", territory or "")
+		)
+	)
+
+
+def lock_company(company, exclusive=False):
+	"""
+	Lock per company (baris Company) sampai transaksi commit. Doc event memakai
+	shared lock, jadi invoice satu company tetap bisa submit bersamaan; backfill
+	memakai exclusive lock yang menunggu invoice yang sedang di-update commit dan
+	menahan invoice baru sampai statistik company itu selesai dibangun ulang.
+	"""
+	mode = "FOR UPDATE" if exclusive else "LOCK IN SHARE MODE"
+	frappe.db.sql(f"SELECT name FROM `tabCompany` WHERE name = %s {mode}", company)
+
+
+# ========================== Doc Events ===============================
+def on_pos_invoice_submit(doc, method=None):
+	if use_trend_state():
+		apply_sales(
+			"POS Invoice", doc.company, [doc.pos_profile], doc.posting_date, to_cents(doc.grand_total)
+		)
+
+
+def on_pos_invoice_cancel(doc, method=None):
+	if use_trend_state():
+		apply_sales(
+			"POS Invoice", doc.company, [doc.pos_profile], doc.posting_date, -to_cents(doc.grand_total)
+		)
+
+
+def on_sales_invoice_submit(doc, method=None):
+	if use_trend_state():
+		apply_sales(
+			"Sales Invoice",
+			doc.company,
+			si_series_keys(doc.customer_group, doc.territory),
+			doc.posting_date,
+			to_cents(doc.grand_total),
+		)
+
+
+def on_sales_invoice_cancel(doc, method=None):
+	if use_trend_state():
+		apply_sales(
+			"Sales Invoice",
+			doc.company,
+			si_series_keys(doc.customer_group, doc.territory),
+			doc.posting_date,
+			-to_cents(doc.grand_total),
+		)
+
+
+def apply_sales(series_type, company, series_keys, posting_date, cents):
+	"""Tambahkan `cents` ke hari posting_date dan ke Σy / Σxy kumulatif hari itu dan sesudahnya"""
+	if not cents:
+		return
+
+	lock_company(company)
+	posting_date = getdate(posting_date)
+	x = day_number(posting_date)
+
+	for series_key in series_keys:
+		ensure_day(series_type, company, series_key, posting_date)
+		frappe.db.sql(
+			"""
+            UPDATE `tabSales Trend State`
+            SET cum_sales = cum_sales + %(cents)s,
+                cum_day_sales = cum_day_sales + %(weighted)s,
+                day_sales = day_sales + IF(posting_date = %(posting_date)s, %(cents)s, 0),
+                modified = %(now)s
+            WHERE series_type = %(series_type)s
+                AND company = %(company)s
+                AND series_key = %(series_key)s
+                AND posting_date >= %(posting_date)s
+        """,
+			{
+				"cents": cents,
+				"weighted": cents * x,
+				"posting_date": posting_date,
+				"now": now_datetime(),
+				"series_type": series_type,
+				"company": company,
+				"series_key": series_key,
+			},
+		)
+
+
+def ensure_day(series_type, company, series_key, posting_date):
+	"""Baris hari posting_date, kumulatif diawali dari baris sebelumnya"""
+	previous = frappe.db.sql(
+		"""
+        SELECT cum_sales, cum_day_sales
+        FROM `tabSales Trend State`
+        WHERE series_type = %s AND company = %s AND series_key = %s AND posting_date < %s
+        ORDER BY posting_date DESC
+        LIMIT 1
+    """,
+		(series_type, company, series_key, posting_date),
+	)
+	cum_sales, cum_day_sales = previous[0] if previous else (0, 0)
+
+	now = now_datetime()
+	user = frappe.session.user
+	frappe.db.sql(
+		"""
+        INSERT IGNORE INTO `tabSales Trend State`
+            (name, creation, modified, modified_by, owner, docstatus, idx,
+             series_type, company, series_key, posting_date, day_sales, cum_sales, cum_day_sales)
+        VALUES (%s, %s, %s, %s, %s, 0, 0, %s, %s, %s, %s, 0, %s, %s)
+    """,
+		(
+			state_name(series_type, company, series_key, posting_date),
+			now,
+			now,
+			user,
+			user,
+			series_type,
+			company,
+			series_key,
+			posting_date,
+			cum_sales,
+			cum_day_sales,
+		),
+	)
+
+
+def state_name(series_type, company, series_key, posting_date):
+	key = f"{STATE_DOCTYPE}|{series_type}|{company}|{series_key}|{posting_date}"
+	return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+# ========================== Query ===============================
+def cumulative_at(series_type, company, series_keys, as_of):
+	"""(Σy, Σxy) kumulatif sampai as_of, dijumlah atas series_keys"""
+	row = frappe.db.sql(
+		"""
+        SELECT SUM(s.cum_sales), SUM(s.cum_day_sales)
+        FROM `tabSales Trend State` s
+        INNER JOIN (
+            SELECT series_key, MAX(posting_date) as posting_date
+            FROM `tabSales Trend State`
+            WHERE series_type = %(series_type)s
+                AND company = %(company)s
+                AND series_key IN %(series_keys)s
+                AND posting_date <= %(as_of)s
+            GROUP BY series_key
+        ) latest ON latest.series_key = s.series_key AND latest.posting_date = s.posting_date
+        WHERE s.series_type = %(series_type)s AND s.company = %(company)s
+    """,
+		{"series_type": series_type, "company": company, "series_keys": series_keys, "as_of": as_of},
+	)[0]
+	return int(row[0] or 0), int(row[1] or 0)
+
+
+def trend_summary(series_type, company, series_keys, date_from, date_to):
+	"""
+	Rata-rata harian, slope dan growth rate untuk window [date_from, date_to].
+
+	Hari tanpa penjualan dihitung 0 (regresi atas hari kalender). Growth rate
+	membandingkan total GROWTH_WINDOW_DAYS hari terakhir dengan hari pertama window.
+
+	Returns:
+	    dict days, total_sales, avg_daily_sales, slope, growth_rate
+	"""
+	date_from, date_to = getdate(date_from), getdate(date_to)
+	n = (date_to - date_from).days + 1
+	if n <= 0:
+		return {"days": 0, "total_sales": 0.0, "avg_daily_sales": 0.0, "slope": 0.0, "growth_rate": 0.0}
+
+	def at(as_of):
+		return cumulative_at(series_type, company, series_keys, as_of)
+
+	before_y, before_xy = at(add_days(date_from, -1))
+	end_y, end_xy = at(date_to)
+	sum_y, sum_xy = end_y - before_y, end_xy - before_xy
+
+	# x berurutan dari day_number(date_from): mean x dan Sxx = n(n²-1)/12
+	x_mean = day_number(date_from) + (n - 1) / 2
+	sxx = n * (n * n - 1) / 12
+	slope = (sum_xy - x_mean * sum_y) / sxx if sxx else 0.0
+
+	growth_rate = 0.0
+	if n >= GROWTH_WINDOW_DAYS:
+		older = at(add_days(date_from, GROWTH_WINDOW_DAYS - 1))[0] - before_y
+		recent = end_y - at(add_days(date_to, -GROWTH_WINDOW_DAYS))[0]
+		growth_rate = ((recent - older) / older * 100) if older > 0 else 0.0
+
+	return {
+		"days": n,
+		"total_sales": sum_y / 100,
+		"avg_daily_sales": sum_y / n / 100,
+		"slope": slope / 100,
+		"growth_rate": growth_rate,
+	}
+
+
+# ========================== Backfill ===============================
+def backfill_trend_state(company=None):
+	"""
+	Bangun ulang Sales Trend State dari POS Invoice dan Sales Invoice yang sudah submit,
+	per company di bawah exclusive lock_company supaya tidak bersilangan dengan doc event.
+	"""
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+
+	for company in companies:
+		# Transaksi baru sebelum lock, jadi bacaan sesudahnya mencakup semua invoice yang sudah commit
+		frappe.db.commit()
+		lock_company(company, exclusive=True)
+		frappe.db.sql("DELETE FROM `tabSales Trend State` WHERE company = %s", company)
+
+		pos_rows = frappe.db.sql(
+			"""
+            SELECT pos_profile, posting_date, SUM(grand_total)
+            FROM `tabPOS Invoice`
+            WHERE company = %s AND docstatus = 1
+            GROUP BY pos_profile, posting_date
+        """,
+			company,
+		)
+		insert_series(
+			"POS Invoice",
+			company,
+			[(pos_profile, posting_date, to_cents(total)) for pos_profile, posting_date, total in pos_rows],
+		)
+
+		si_rows = frappe.db.sql(
+			"""
+            SELECT customer_group, territory, posting_date, SUM(grand_total)
+            FROM `tabSales Invoice`
+            WHERE company = %s AND docstatus = 1
+            GROUP BY customer_group, territory, posting_date
+        """,
+			company,
+		)
+		insert_series(
+			"Sales Invoice",
+			company,
+			[
+				(series_key, posting_date, to_cents(total))
+				for customer_group, territory, posting_date, total in si_rows
+				for series_key in si_series_keys(customer_group, territory)
+			],
+		)
+		frappe.db.commit()
+
+
+def insert_series(series_type, company, day_rows):
+	"""Tulis baris harian dan kumulatifnya; day_rows = (series_key, posting_date, cents)"""
+	daily = {}
+	for series_key, posting_date, cents in day_rows:
+		key = (series_key, getdate(posting_date))
+		daily[key] = daily.get(key, 0) + cents
+
+	now = now_datetime()
+	user = frappe.session.user
+	values = []
+	cumulative = {}
+	for series_key, posting_date in sorted(daily):
+		cents = daily[(series_key, posting_date)]
+		cum_sales, cum_day_sales = cumulative.get(series_key, (0, 0))
+		cum_sales += cents
+		cum_day_sales += cents * day_number(posting_date)
+		cumulative[series_key] = (cum_sales, cum_day_sales)
+
+		values.append(
+			(
+				state_name(series_type, company, series_key, posting_date),
+				now,
+				now,
+				user,
+				user,
+				0,
+				0,
+				series_type,
+				company,
+				series_key,
+				posting_date,
+				cents,
+				cum_sales,
+				cum_day_sales,
+			)
+		)
+
+	frappe.db.bulk_insert(
+		STATE_DOCTYPE,
+		fields=[
+			"name",
+			"creation",
+			"modified",
+			"modified_by",
+			"owner",
+			"docstatus",
+			"idx",
+			"series_type",
+			"company",
+			"series_key",
+			"posting_date",
+			"day_sales",
+			"cum_sales",
+			"cum_day_sales",
+		],
+		values=values,
+	)
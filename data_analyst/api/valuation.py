@@ -0,0 +1,143 @@
+import frappe
+import numpy as np
+from frappe.utils import to_timedelta
+
+# Jumlah item per query SLE supaya klausa IN tidak terlalu panjang
+SLE_CHUNK_SIZE = 500
+
+_US_PER_DAY = 86400 * 1000000
+
+
+class AsOfValuation:
+	"""
+	Lookup valuation rate Stock Ledger Entry secara as-of.
+
+	Riwayat SLE dimuat sekali per (item_code, warehouse): SLE terakhir sebelum
+	`date_from` sebagai titik awal, ditambah semua SLE dalam periode. Riwayat
+	diurutkan berdasarkan (posting_date, posting_time, creation) lalu setiap
+	transaksi dicari dengan binary search, menggantikan subquery berkorelasi
+	ORDER BY ... LIMIT 1 per baris invoice.
+	"""
+
+	def __init__(self, pairs, date_from, date_to):
+		self.pairs = sorted(
+			{(item_code, warehouse) for item_code, warehouse in pairs if item_code and warehouse}
+		)
+		self._pair_index = {pair: idx for idx, pair in enumerate(self.pairs)}
+
+		rows = self._load_history(date_from, date_to) if self.pairs else []
+		rows = [r for r in rows if (r[0], r[1]) in self._pair_index]
+
+		pair = np.fromiter((self._pair_index[(r[0], r[1])] for r in rows), dtype=np.int64, count=len(rows))
+		timestamp = to_timestamp_us(
+			np.array([r[2] for r in rows], dtype="datetime64[D]"), [r[3] for r in rows]
+		)
+		creation = np.array([r[4] for r in rows], dtype="datetime64[us]")
+		rate = np.array([np.nan if r[5] is None else r[5] for r in rows], dtype=float)
+
+		order = np.lexsort((creation, timestamp, pair))
+		self.sle_pair = pair[order]
+		self.sle_timestamp = timestamp[order]
+		self.sle_rate = rate[order]
+
+	def _load_history(self, date_from, date_to):
+		items = sorted({item_code for item_code, _ in self.pairs})
+		warehouses = sorted({warehouse for _, warehouse in self.pairs})
+
+		rows = []
+		for start in range(0, len(items), SLE_CHUNK_SIZE):
+			values = {
+				"items": items[start : start + SLE_CHUNK_SIZE],
+				"warehouses": warehouses,
+				"date_from": date_from,
+				"date_to": date_to,
+			}
+
+			# SLE terakhir sebelum periode (saldo awal valuation)
+			rows.extend(
+				frappe.db.sql(
+					"""
+                SELECT item_code, warehouse, posting_date, posting_time, creation, valuation_rate
+                FROM (
+                    SELECT
+                        item_code, warehouse, posting_date, posting_time, creation, valuation_rate,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY item_code, warehouse
+                            ORDER BY posting_date DESC, posting_time DESC, creation DESC
+                        ) as rn
+                    FROM `tabStock Ledger Entry`
+                    WHERE item_code IN %(items)s
+                        AND warehouse IN %(warehouses)s
+                        AND posting_date < %(date_from)s
+                ) sle
+                WHERE rn = 1
+            """,
+					values,
+				)
+			)
+
+			# Semua SLE dalam periode
+			rows.extend(
+				frappe.db.sql(
+					"""
+                SELECT item_code, warehouse, posting_date, posting_time, creation, valuation_rate
+                FROM `tabStock Ledger Entry`
+                WHERE item_code IN %(items)s
+                    AND warehouse IN %(warehouses)s
+                    AND posting_date BETWEEN %(date_from)s AND %(date_to)s
+            """,
+					values,
+				)
+			)
+
+		return rows
+
+	def pair_codes(self, pairs):
+		"""Index internal untuk setiap (item_code, warehouse), -1 jika tidak dikenal"""
+		return np.fromiter(
+			(self._pair_index.get(pair, -1) for pair in pairs), dtype=np.int64, count=len(pairs)
+		)
+
+	def lookup(self, pair, timestamp):
+		"""
+		Valuation rate SLE terakhir dengan waktu <= timestamp untuk setiap baris.
+
+		Returns:
+		    (rate, found): rate berisi NaN jika SLE tidak ada atau valuation_rate NULL,
+		    found menandai baris yang memiliki SLE sebelum/saat transaksi
+		"""
+		pair = np.asarray(pair, dtype=np.int64)
+		timestamp = np.asarray(timestamp, dtype=np.int64)
+
+		rate = np.full(len(pair), np.nan)
+		found = np.zeros(len(pair), dtype=bool)
+		if not len(self.sle_pair) or not len(pair):
+			return rate, found
+
+		# Ranking timestamp gabungan supaya (pair, timestamp) bisa jadi satu kunci int64
+		ranks = np.unique(np.concatenate([self.sle_timestamp, timestamp]), return_inverse=True)[1]
+		n_ranks = int(ranks.max()) + 1
+		sle_key = self.sle_pair * n_ranks + ranks[: len(self.sle_pair)]
+		line_key = pair * n_ranks + ranks[len(self.sle_pair) :]
+
+		# Posisi SLE terakhir dengan kunci <= kunci baris (creation terbesar untuk waktu yang sama)
+		pos = np.searchsorted(sle_key, line_key, side="right") - 1
+		valid = (pair >= 0) & (pos >= 0)
+		valid[valid] = self.sle_pair[pos[valid]] == pair[valid]
+
+		found[valid] = True
+		rate[valid] = self.sle_rate[pos[valid]]
+		return rate, found
+
+
+def to_timestamp_us(dates, times):
+	"""Gabungkan posting_date (datetime64[D]) dan posting_time menjadi mikrodetik int64"""
+	time_us = np.fromiter((_time_to_us(t) for t in times), dtype=np.int64, count=len(times))
+	return np.asarray(dates, dtype="datetime64[D]").astype(np.int64) * _US_PER_DAY + time_us
+
+
+def _time_to_us(value):
+	if not value:
+		return 0
+	delta = to_timedelta(value)
+	return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
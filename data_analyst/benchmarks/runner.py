@@ -0,0 +1,202 @@
+"""
+Benchmark predictor dan endpoint terhadap data sintetis (lihat synthetic.py).
+
+Setiap target diukur: waktu (median dari beberapa ulangan), jumlah query SQL
+pada koneksi request, dan peak memory Python (tracemalloc). Hasil bisa disimpan
+sebagai baseline per skala dan dibandingkan pada run berikutnya.
+"""
+
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import partial
+
+import frappe
+
+from data_analyst.benchmarks.synthetic import company_name
+
+# Regresi dilaporkan jika waktu atau memory naik lebih dari batas ini
+REGRESSION_TOLERANCE = 0.25
+
+BASELINE_DIR = ("benchmarks", "baselines")
+
+
+def benchmark_targets(company, pos_profiles, date_from, date_to, prediction_days=30):
+	"""Semua predictor dan endpoint whitelisted dengan parameter benchmark"""
+	from data_analyst.api import pos
+	from data_analyst.api.pos_facts import load_pos_facts
+
+	pos_args = (company, pos_profiles, date_from, date_to, prediction_days)
+	si_filters = {"company": company, "docstatus": 1, "posting_date": ["between", [date_from, date_to]]}
+	si_args = (si_filters, date_from, date_to, prediction_days)
+
+	return {
+		"load_pos_facts": partial(load_pos_facts, company, pos_profiles, date_from, date_to),
+		"predict_sales": partial(pos.predict_sales, *pos_args),
+		"predict_product_demand": partial(pos.predict_product_demand, *pos_args),
+		"predict_profit": partial(pos.predict_profit, *pos_args),
+		"predict_active_customers": partial(pos.predict_active_customers, *pos_args),
+		"predict_bestsellers": partial(pos.predict_bestsellers, *pos_args),
+		"predict_stock_needs": partial(pos.predict_stock_needs, *pos_args),
+		"predict_sales_revenue": partial(pos.predict_sales_revenue, *si_args),
+		"predict_product_demand_si": partial(pos.predict_product_demand_si, *si_args),
+		"predict_profit_si": partial(pos.predict_profit_si, *si_args),
+		"analyze_customers": partial(pos.analyze_customers, *si_args),
+		"predict_bestsellers_si": partial(pos.predict_bestsellers_si, *si_args),
+		"predict_payment_collection": partial(pos.predict_payment_collection, *si_args),
+		"get_pos_predictions": partial(
+			pos.get_pos_predictions,
+			company=company,
+			pos_profiles=pos_profiles,
+			date_from=date_from,
+			date_to=date_to,
+			prediction_days=prediction_days,
+		),
+		"get_pos_dashboard": partial(
+			pos.get_pos_dashboard,
+			company=company,
+			pos_profiles=pos_profiles,
+			date_from=date_from,
+			date_to=date_to,
+		),
+		"get_sales_invoice_predictions": partial(
+			pos.get_sales_invoice_predictions,
+			company=company,
+			date_from=date_from,
+			date_to=date_to,
+			prediction_days=prediction_days,
+		),
+		"get_sales_invoice_dashboard": partial(
+			pos.get_sales_invoice_dashboard, company=company, date_from=date_from, date_to=date_to
+		),
+	}
+
+
+def run(scale, date_from, date_to, pos_profiles=None, repeat=3, only=None):
+	"""
+	Jalankan benchmark untuk company sintetis satu skala.
+
+	Args:
+	    only: list nama target (default semua)
+
+	Returns:
+	    dict hasil per target: seconds (median), queries, peak_mb
+	"""
+	company = company_name(scale)
+	if not pos_profiles:
+		pos_profiles = frappe.get_all("POS Profile", filters={"company": company}, pluck="name", limit=3)
+
+	targets = benchmark_targets(company, pos_profiles, date_from, date_to)
+	if only:
+		targets = {name: fn for name, fn in targets.items() if name in only}
+
+	results = {}
+	frappe.flags.skip_result_cache = True
+	try:
+		for name, fn in targets.items():
+			results[name] = measure(fn, repeat)
+	finally:
+		frappe.flags.skip_result_cache = False
+
+	return {
+		"scale": scale,
+		"company": company,
+		"date_range": {"from": date_from, "to": date_to},
+		"repeat": repeat,
+		"results": results,
+	}
+
+
+def measure(fn, repeat=3):
+	timings = []
+	for i in range(repeat):
+		# Query dan memory cukup diukur pada run pertama
+		if i == 0:
+			with count_queries() as queries:
+				tracemalloc.start()
+				start = time.perf_counter()
+				fn()
+				timings.append(time.perf_counter() - start)
+				peak = tracemalloc.get_traced_memory()[1]
+				tracemalloc.stop()
+		else:
+			start = time.perf_counter()
+			fn()
+			timings.append(time.perf_counter() - start)
+
+	return {
+		"seconds": round(statistics.median(timings), 4),
+		"queries": queries["count"],
+		"peak_mb": round(peak / 1024 / 1024, 2),
+	}
+
+
+@contextmanager
+def count_queries():
+	"""Hitung pemanggilan frappe.db.sql selama blok berjalan (koneksi request saja)"""
+	counter = {"count": 0}
+	db = frappe.db
+	original_sql = db.sql
+
+	def sql(*args, **kwargs):
+		counter["count"] += 1
+		return original_sql(*args, **kwargs)
+
+	db.sql = sql
+	try:
+		yield counter
+	finally:
+		del db.sql
+
+
+# ========================== Baseline ===============================
+def baseline_path(scale):
+	return frappe.get_app_path("data_analyst", *BASELINE_DIR, f"{scale}.json")
+
+
+def save_baseline(report):
+	path = baseline_path(report["scale"])
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, "w") as f:
+		json.dump(report, f, indent=1, sort_keys=True)
+	return path
+
+
+def compare_baseline(report, tolerance=REGRESSION_TOLERANCE):
+	"""
+	Bandingkan hasil dengan baseline skala yang sama.
+
+	Returns:
+	    list regresi: (target, metric, baseline, current); kosong jika tidak ada
+	    atau baseline belum tersedia
+	"""
+	path = baseline_path(report["scale"])
+	if not os.path.exists(path):
+		return []
+
+	with open(path) as f:
+		baseline = json.load(f)["results"]
+
+	regressions = []
+	for name, current in report["results"].items():
+		if name not in baseline:
+			continue
+		for metric in ("seconds", "peak_mb"):
+			if current[metric] > baseline[name][metric] * (1 + tolerance):
+				regressions.append((name, metric, baseline[name][metric], current[metric]))
+		if current["queries"] > baseline[name]["queries"]:
+			regressions.append((name, "queries", baseline[name]["queries"], current["queries"]))
+	return regressions
+
+
+def format_report(report, regressions=()):
+	lines = [f"{'target':<32}{'seconds':>10}{'queries':>10}{'peak_mb':>10}"]
+	for name, r in report["results"].items():
+		lines.append(f"{name:<32}{r['seconds']:>10.4f}{r['queries']:>10}{r['peak_mb']:>10.2f}")
+
+	for name, metric, before, after in regressions:
+		lines.append(f"REGRESSION {name} {metric}: {before} -> {after}")
+	return "\n".join(lines)
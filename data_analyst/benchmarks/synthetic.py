@@ -0,0 +1,446 @@
+"""
+Generator data sintetis untuk benchmark predictor.
+
+Data ditulis langsung dengan frappe.db.bulk_insert (tanpa controller ERPNext)
+ke company terpisah berawalan BENCH_PREFIX, jadi hanya boleh dipakai di site
+benchmark / development.
+"""
+
+from datetime import date, timedelta
+
+import frappe
+import numpy as np
+from frappe.utils import now_datetime
+
+BENCH_PREFIX = "BENCH"
+
+INSERT_CHUNK_SIZE = 10000
+
+# Ukuran data per skala; bisa di-override per parameter
+SCALES = {
+	"xs": {"lines": 10_000, "items": 500, "customers": 1_000, "warehouses": 3, "sle_rows": 20_000},
+	"s": {"lines": 100_000, "items": 2_000, "customers": 10_000, "warehouses": 5, "sle_rows": 200_000},
+	"m": {"lines": 1_000_000, "items": 10_000, "customers": 50_000, "warehouses": 10, "sle_rows": 1_000_000},
+	"l": {
+		"lines": 10_000_000,
+		"items": 50_000,
+		"customers": 200_000,
+		"warehouses": 20,
+		"sle_rows": 5_000_000,
+	},
+}
+
+DEFAULT_CONFIG = {
+	"days": 90,
+	"lines_per_invoice": 4,
+	# Porsi baris Sales Invoice terhadap baris POS
+	"si_share": 0.5,
+	"walk_in_share": 0.3,
+	"seed": 42,
+}
+
+CUSTOMER_GROUPS = ("Commercial", "Individual", "Government", "Non Profit")
+TERRITORIES = ("Jakarta", "Bandung", "Surabaya", "Medan", "Makassar")
+
+
+def scale_config(scale, **overrides):
+	config = dict(DEFAULT_CONFIG, **SCALES[scale])
+	config.update({k: v for k, v in overrides.items() if v is not None})
+	return config
+
+
+def company_name(scale):
+	return f"{BENCH_PREFIX} {scale.upper()}"
+
+
+def generate(scale, date_to=None, **overrides):
+	"""
+	Buat (ulang) satu company sintetis lengkap dengan item, customer, warehouse,
+	POS Profile, POS Invoice, Sales Invoice, Stock Ledger Entry dan Bin.
+
+	Returns:
+	    dict parameter data yang dibuat (company, periode, jumlah baris)
+	"""
+	config = scale_config(scale, **overrides)
+	company = company_name(scale)
+	abbr = f"{BENCH_PREFIX}{scale.upper()}"
+	rng = np.random.default_rng(config["seed"])
+
+	date_to = date_to or date.today()
+	date_from = date_to - timedelta(days=config["days"] - 1)
+
+	cleanup(scale)
+	now = now_datetime()
+
+	_insert(
+		"Company", ["name", "company_name", "abbr", "default_currency"], [(company, company, abbr, "IDR")]
+	)
+
+	# Warehouse dan POS Profile (satu per warehouse)
+	warehouses = [f"{BENCH_PREFIX} Store {i} - {abbr}" for i in range(config["warehouses"])]
+	_insert("Warehouse", ["name", "warehouse_name", "company"], [(w, w, company) for w in warehouses])
+
+	profiles = [f"{BENCH_PREFIX} POS {i} - {abbr}" for i in range(config["warehouses"])]
+	_insert(
+		"POS Profile",
+		["name", "company", "warehouse", "disabled"],
+		[(p, company, w, 0) for p, w in zip(profiles, warehouses, strict=False)],
+	)
+
+	# Item: harga lognormal, popularitas mengikuti power law
+	n_items = config["items"]
+	items = [f"{abbr}-ITEM-{i:06d}" for i in range(n_items)]
+	item_rate = np.round(rng.lognormal(10, 1, n_items), 0)
+	item_cost = np.round(item_rate * rng.uniform(0.5, 0.85, n_items), 2)
+	item_weight = 1 / np.arange(1, n_items + 1) ** 1.1
+	item_weight /= item_weight.sum()
+	_insert(
+		"Item",
+		["name", "item_code", "item_name", "item_group", "stock_uom", "valuation_rate", "last_purchase_rate"],
+		[
+			(code, code, f"Item {i}", "Products", "Nos", float(item_cost[i]), float(item_cost[i]))
+			for i, code in enumerate(items)
+		],
+	)
+
+	# Customer
+	n_customers = config["customers"]
+	customers = [f"{abbr}-CUST-{i:07d}" for i in range(n_customers)]
+	customer_group = rng.integers(0, len(CUSTOMER_GROUPS), n_customers)
+	customer_territory = rng.integers(0, len(TERRITORIES), n_customers)
+	_insert(
+		"Customer",
+		["name", "customer_name", "customer_group", "territory"],
+		[
+			(c, f"Customer {i}", CUSTOMER_GROUPS[customer_group[i]], TERRITORIES[customer_territory[i]])
+			for i, c in enumerate(customers)
+		],
+	)
+
+	pos_lines = int(config["lines"])
+	si_lines = int(config["lines"] * config["si_share"])
+
+	_generate_invoices(
+		"POS Invoice",
+		"POS Invoice Item",
+		pos_lines,
+		config,
+		rng,
+		company,
+		abbr,
+		date_from,
+		now,
+		items,
+		item_rate,
+		item_weight,
+		customers,
+		customer_group,
+		customer_territory,
+		warehouses,
+		profiles,
+	)
+	_generate_invoices(
+		"Sales Invoice",
+		"Sales Invoice Item",
+		si_lines,
+		config,
+		rng,
+		company,
+		abbr,
+		date_from,
+		now,
+		items,
+		item_rate,
+		item_weight,
+		customers,
+		customer_group,
+		customer_territory,
+		warehouses,
+		profiles,
+	)
+	_generate_stock(config, rng, company, date_from, now, items, item_cost, item_weight, warehouses)
+
+	frappe.db.commit()
+
+	return {
+		"scale": scale,
+		"company": company,
+		"pos_profiles": profiles,
+		"date_from": str(date_from),
+		"date_to": str(date_to),
+		"config": config,
+		"rows": {"pos_lines": pos_lines, "si_lines": si_lines, "sle_rows": config["sle_rows"]},
+	}
+
+
+def _generate_invoices(
+	doctype,
+	child_doctype,
+	n_lines,
+	config,
+	rng,
+	company,
+	abbr,
+	date_from,
+	now,
+	items,
+	item_rate,
+	item_weight,
+	customers,
+	customer_group,
+	customer_territory,
+	warehouses,
+	profiles,
+):
+	n_invoices = max(n_lines // config["lines_per_invoice"], 1)
+	is_pos = doctype == "POS Invoice"
+	prefix = f'{abbr}-{"PINV" if is_pos else "SINV"}'
+
+	# Tanggal dengan pola mingguan (akhir pekan lebih ramai)
+	day_offset = np.arange(config["days"])
+	weekday = np.array([(date_from + timedelta(days=int(d))).weekday() for d in day_offset])
+	day_weight = np.where(weekday >= 5, 1.6, 1.0) * np.linspace(0.9, 1.1, config["days"])
+	invoice_day = np.sort(rng.choice(config["days"], n_invoices, p=day_weight / day_weight.sum()))
+	invoice_seconds = rng.integers(8 * 3600, 22 * 3600, n_invoices)
+
+	invoice_customer = rng.integers(0, len(customers), n_invoices)
+	walk_in = rng.random(n_invoices) < config["walk_in_share"]
+	invoice_store = rng.integers(0, len(warehouses), n_invoices)
+
+	# Baris per invoice >= 1, total tepat n_lines
+	line_invoice = np.sort(
+		np.concatenate([np.arange(n_invoices), rng.integers(0, n_invoices, max(n_lines - n_invoices, 0))])
+	)
+	line_item = rng.choice(len(items), len(line_invoice), p=item_weight)
+	line_qty = rng.poisson(1.5, len(line_invoice)) + 1
+	line_rate = item_rate[line_item]
+	line_amount = line_qty * line_rate
+	line_idx = np.arange(len(line_invoice)) - np.searchsorted(line_invoice, line_invoice) + 1
+	grand_total = np.bincount(line_invoice, weights=line_amount, minlength=n_invoices)
+
+	child_rows = (
+		(
+			f"{prefix}-{line_invoice[i]:08d}-{line_idx[i]}",
+			f"{prefix}-{line_invoice[i]:08d}",
+			doctype,
+			"items",
+			int(line_idx[i]),
+			items[line_item[i]],
+			f"Item {line_item[i]}",
+			"Products",
+			"Nos",
+			float(line_qty[i]),
+			float(line_rate[i]),
+			float(line_amount[i]),
+		)
+		for i in range(len(line_invoice))
+	)
+	_insert(
+		child_doctype,
+		[
+			"name",
+			"parent",
+			"parenttype",
+			"parentfield",
+			"idx",
+			"item_code",
+			"item_name",
+			"item_group",
+			"uom",
+			"qty",
+			"rate",
+			"amount",
+		],
+		child_rows,
+	)
+
+	def posting(i):
+		seconds = int(invoice_seconds[i])
+		return (
+			date_from + timedelta(days=int(invoice_day[i])),
+			f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+		)
+
+	if is_pos:
+		header_rows = (
+			(
+				f"{prefix}-{i:08d}",
+				company,
+				profiles[invoice_store[i]],
+				*posting(i),
+				None if walk_in[i] else customers[invoice_customer[i]],
+				None if walk_in[i] else f"Customer {invoice_customer[i]}",
+				float(grand_total[i]),
+				warehouses[invoice_store[i]],
+				1,
+				now,
+				now,
+			)
+			for i in range(n_invoices)
+		)
+		_insert(
+			doctype,
+			[
+				"name",
+				"company",
+				"pos_profile",
+				"posting_date",
+				"posting_time",
+				"customer",
+				"customer_name",
+				"grand_total",
+				"set_warehouse",
+				"docstatus",
+				"creation",
+				"modified",
+			],
+			header_rows,
+		)
+		return
+
+	# Sales Invoice: pajak 11%, sebagian belum lunas
+	paid_share = np.where(rng.random(n_invoices) < 0.7, 1.0, rng.uniform(0, 1, n_invoices))
+	header_rows = (
+		(
+			f"{prefix}-{i:08d}",
+			company,
+			*posting(i),
+			customers[invoice_customer[i]],
+			f"Customer {invoice_customer[i]}",
+			CUSTOMER_GROUPS[customer_group[invoice_customer[i]]],
+			TERRITORIES[customer_territory[invoice_customer[i]]],
+			float(grand_total[i] * 1.11),
+			float(grand_total[i] * 1.11),
+			float(grand_total[i]),
+			float(grand_total[i] * 0.11),
+			0.0,
+			float(grand_total[i] * 1.11 * (1 - paid_share[i])),
+			float(grand_total[i] * 1.11 * paid_share[i]),
+			date_from + timedelta(days=int(invoice_day[i]) + 30),
+			1,
+			now,
+			now,
+		)
+		for i in range(n_invoices)
+	)
+	_insert(
+		doctype,
+		[
+			"name",
+			"company",
+			"posting_date",
+			"posting_time",
+			"customer",
+			"customer_name",
+			"customer_group",
+			"territory",
+			"grand_total",
+			"base_grand_total",
+			"net_total",
+			"total_taxes_and_charges",
+			"discount_amount",
+			"outstanding_amount",
+			"paid_amount",
+			"due_date",
+			"docstatus",
+			"creation",
+			"modified",
+		],
+		header_rows,
+	)
+
+
+def _generate_stock(config, rng, company, date_from, now, items, item_cost, item_weight, warehouses):
+	n_sle = int(config["sle_rows"])
+	sle_item = rng.choice(len(items), n_sle, p=item_weight)
+	sle_warehouse = rng.integers(0, len(warehouses), n_sle)
+	# Sebagian SLE sebelum periode sebagai saldo awal valuation
+	sle_day = rng.integers(-30, config["days"], n_sle)
+	sle_seconds = rng.integers(0, 86400, n_sle)
+	sle_rate = item_cost[sle_item] * rng.uniform(0.95, 1.05, n_sle)
+	sle_qty = rng.integers(-5, 20, n_sle)
+
+	_insert(
+		"Stock Ledger Entry",
+		[
+			"name",
+			"company",
+			"item_code",
+			"warehouse",
+			"posting_date",
+			"posting_time",
+			"creation",
+			"modified",
+			"actual_qty",
+			"valuation_rate",
+			"is_cancelled",
+			"docstatus",
+		],
+		(
+			(
+				f"{BENCH_PREFIX}-SLE-{company}-{i:09d}",
+				company,
+				items[sle_item[i]],
+				warehouses[sle_warehouse[i]],
+				date_from + timedelta(days=int(sle_day[i])),
+				f"{sle_seconds[i] // 3600:02d}:{sle_seconds[i] // 60 % 60:02d}:{sle_seconds[i] % 60:02d}",
+				now,
+				now,
+				float(sle_qty[i]),
+				float(sle_rate[i]),
+				0,
+				1,
+			)
+			for i in range(n_sle)
+		),
+	)
+
+	# Bin per pasangan (item, warehouse) yang punya SLE
+	pairs = np.unique(sle_item.astype(np.int64) * len(warehouses) + sle_warehouse)
+	actual = rng.integers(0, 200, len(pairs))
+	_insert(
+		"Bin",
+		["name", "item_code", "warehouse", "actual_qty", "projected_qty", "reserved_qty", "ordered_qty"],
+		(
+			(
+				f"{BENCH_PREFIX}-BIN-{company}-{k}",
+				items[key // len(warehouses)],
+				warehouses[key % len(warehouses)],
+				float(actual[k]),
+				float(actual[k]),
+				0.0,
+				0.0,
+			)
+			for k, key in enumerate(pairs.tolist())
+		),
+	)
+
+
+def cleanup(scale):
+	"""Hapus semua data sintetis milik satu skala"""
+	company = company_name(scale)
+	abbr = f"{BENCH_PREFIX}{scale.upper()}"
+
+	for parent, child in (("POS Invoice", "POS Invoice Item"), ("Sales Invoice", "Sales Invoice Item")):
+		frappe.db.sql(
+			f"""
+            DELETE child FROM `tab{child}` child
+            INNER JOIN `tab{parent}` parent ON child.parent = parent.name
+            WHERE parent.company = %s
+        """,
+			company,
+		)
+		frappe.db.sql(f"DELETE FROM `tab{parent}` WHERE company = %s", company)
+
+	frappe.db.sql("DELETE FROM `tabStock Ledger Entry` WHERE company = %s", company)
+	frappe.db.sql("DELETE FROM `tabBin` WHERE name LIKE %s", f"{BENCH_PREFIX}-BIN-{company}-%")
+	frappe.db.sql("DELETE FROM `tabPOS Profile` WHERE company = %s", company)
+	frappe.db.sql("DELETE FROM `tabWarehouse` WHERE company = %s", company)
+	frappe.db.sql("DELETE FROM `tabItem` WHERE name LIKE %s", f"{abbr}-ITEM-%")
+	frappe.db.sql("DELETE FROM `tabCustomer` WHERE name LIKE %s", f"{abbr}-CUST-%")
+	frappe.db.sql("DELETE FROM `tabCompany` WHERE name = %s", company)
+	frappe.db.commit()
+
+
+def _insert(doctype, fields, rows):
+	frappe.db.bulk_insert(doctype, fields, rows, chunk_size=INSERT_CHUNK_SIZE)
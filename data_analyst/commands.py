@@ -0,0 +1,160 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("backfill-pos-rollup")
+@click.option("--company", help="Hanya company ini (default: semua company)")
+@click.option("--from-date", help="Tanggal mulai (default: POS Invoice pertama)")
+@click.option("--to-date", help="Tanggal akhir (default: POS Invoice terakhir)")
+@pass_context
+def backfill_pos_rollup(context, company=None, from_date=None, to_date=None):
+	"""Bangun ulang rollup harian POS dari POS Invoice yang sudah submit"""
+	import frappe
+
+	from data_analyst.api.rollup import backfill_pos_rollup
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		backfill_pos_rollup(company=company, date_from=from_date, date_to=to_date)
+	finally:
+		frappe.destroy()
+
+
+@click.command("backfill-sales-invoice-rollup")
+@click.option("--company", help="Hanya company ini (default: semua company)")
+@click.option("--from-date", help="Tanggal mulai (default: Sales Invoice pertama)")
+@click.option("--to-date", help="Tanggal akhir (default: Sales Invoice terakhir)")
+@pass_context
+def backfill_sales_invoice_rollup(context, company=None, from_date=None, to_date=None):
+	"""Bangun ulang ringkasan harian Sales Invoice"""
+	import frappe
+
+	from data_analyst.api.rollup import backfill_sales_invoice_rollup
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		backfill_sales_invoice_rollup(company=company, date_from=from_date, date_to=to_date)
+	finally:
+		frappe.destroy()
+
+
+@click.command("backfill-trend-state")
+@click.option("--company", help="Hanya company ini (default: semua company)")
+@pass_context
+def backfill_trend_state(context, company=None):
+	"""Bangun ulang statistik trend penjualan (Sales Trend State) dari invoice yang sudah submit"""
+	import frappe
+
+	from data_analyst.api.trend_state import backfill_trend_state
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		backfill_trend_state(company=company)
+	finally:
+		frappe.destroy()
+
+
+@click.command("data-analyst-benchmark")
+@click.option("--scale", type=click.Choice(["xs", "s", "m", "l"]), default="xs", help="Ukuran data sintetis")
+@click.option("--generate", is_flag=True, help="Buat ulang data sintetis sebelum benchmark")
+@click.option("--cleanup", is_flag=True, help="Hapus data sintetis setelah benchmark")
+@click.option("--lines", type=int, help="Override jumlah baris POS Invoice Item")
+@click.option("--items", type=int, help="Override jumlah item")
+@click.option("--customers", type=int, help="Override jumlah customer")
+@click.option("--warehouses", type=int, help="Override jumlah warehouse / POS Profile")
+@click.option("--sle-rows", type=int, help="Override jumlah Stock Ledger Entry")
+@click.option("--repeat", type=int, default=3, help="Jumlah ulangan per target (median)")
+@click.option("--only", multiple=True, help="Hanya target ini (boleh berulang)")
+@click.option("--save-baseline", is_flag=True, help="Simpan hasil sebagai baseline skala ini")
+@pass_context
+def data_analyst_benchmark(
+	context,
+	scale,
+	generate=False,
+	cleanup=False,
+	lines=None,
+	items=None,
+	customers=None,
+	warehouses=None,
+	sle_rows=None,
+	repeat=3,
+	only=None,
+	save_baseline=False,
+):
+	"""Benchmark predictor dan endpoint pada data sintetis; exit 1 jika ada regresi terhadap baseline"""
+	import frappe
+	from frappe.utils import add_days, nowdate
+
+	from data_analyst.benchmarks import runner, synthetic
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		if not frappe.conf.developer_mode:
+			click.echo("Benchmark menulis data sintetis; jalankan hanya di site dengan developer_mode")
+			raise SystemExit(1)
+
+		days = synthetic.DEFAULT_CONFIG["days"]
+		if generate:
+			synthetic.generate(
+				scale, lines=lines, items=items, customers=customers, warehouses=warehouses, sle_rows=sle_rows
+			)
+
+		report = runner.run(
+			scale,
+			date_from=add_days(nowdate(), -(days - 1)),
+			date_to=nowdate(),
+			repeat=repeat,
+			only=list(only) or None,
+		)
+		regressions = runner.compare_baseline(report)
+		click.echo(runner.format_report(report, regressions))
+
+		if save_baseline:
+			click.echo(f"Baseline disimpan: {runner.save_baseline(report)}")
+
+		if cleanup:
+			synthetic.cleanup(scale)
+
+		if regressions and not save_baseline:
+			raise SystemExit(1)
+	finally:
+		frappe.destroy()
+
+
+@click.command("data-analyst-index-advice")
+@click.option("--company", required=True, help="Company yang dianalisis")
+@click.option("--from-date", help="Tanggal mulai (default: 90 hari yang lalu)")
+@click.option("--to-date", help="Tanggal akhir (default: hari ini)")
+@click.option("--create-indexes", is_flag=True, help="Buat index analytics yang belum ada sebelum EXPLAIN")
+@pass_context
+def data_analyst_index_advice(context, company, from_date=None, to_date=None, create_indexes=False):
+	"""EXPLAIN query setiap predictor dan laporkan full scan / filesort beserta index yang belum dibuat"""
+	import json
+
+	import frappe
+
+	from data_analyst.api.indexes import ensure_analytics_indexes, get_index_advice
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		frappe.set_user("Administrator")
+		if create_indexes:
+			ensure_analytics_indexes()
+		advice = get_index_advice(company=company, date_from=from_date, date_to=to_date)
+		click.echo(json.dumps(advice, indent=1, default=str))
+	finally:
+		frappe.destroy()
+
+
+commands = [
+	backfill_pos_rollup,
+	backfill_sales_invoice_rollup,
+	backfill_trend_state,
+	data_analyst_benchmark,
+	data_analyst_index_advice,
+]
@@ -0,0 +1,28 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+# Setting -> backfill yang dijalankan saat setting diaktifkan. Doc event hanya
+# meng-update data turunan selama setting aktif, jadi data dari periode nonaktif
+# dibangun ulang dari invoice yang sudah submit.
+BACKFILL_ON_ENABLE = {
+	"use_pos_rollup": "data_analyst.api.rollup.backfill_pos_rollup",
+	"use_sales_invoice_rollup": "data_analyst.api.rollup.backfill_sales_invoice_rollup",
+	"use_trend_state": "data_analyst.api.trend_state.backfill_trend_state",
+}
+
+
+class DataAnalystSettings(Document):
+	def on_update(self):
+		for fieldname, method in BACKFILL_ON_ENABLE.items():
+			if self.get(fieldname) and self.has_value_changed(fieldname):
+				frappe.enqueue(
+					method,
+					queue="long",
+					timeout=4 * 60 * 60,
+					job_id=f"data_analyst:backfill:{fieldname}",
+					deduplicate=True,
+					enqueue_after_commit=True,
+				)
@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class POSDailyItemSales(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"POS Daily Item Sales",
+		["company", "pos_profile", "posting_date", "item_code"],
+		constraint_name="unique_pos_daily_item_sales",
+	)
@@ -0,0 +1,13 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class POSRollupEntry(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique("POS Rollup Entry", ["pos_invoice"], constraint_name="unique_pos_rollup_entry")
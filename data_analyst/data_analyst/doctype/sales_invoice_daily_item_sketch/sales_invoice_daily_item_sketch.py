@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SalesInvoiceDailyItemSketch(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Sales Invoice Daily Item Sketch",
+		["company", "posting_date", "customer_group", "territory", "item_code"],
+		constraint_name="unique_sales_invoice_daily_item_sketch",
+	)
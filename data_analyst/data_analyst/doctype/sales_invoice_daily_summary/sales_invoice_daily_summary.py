@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SalesInvoiceDailySummary(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Sales Invoice Daily Summary",
+		["company", "posting_date", "customer_group", "territory"],
+		constraint_name="unique_sales_invoice_daily_summary",
+	)
@@ -0,0 +1,17 @@
+# Copyright (c) 2026, Ekasa Technology and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SalesTrendState(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique(
+		"Sales Trend State",
+		["series_type", "company", "series_key", "posting_date"],
+		constraint_name="unique_sales_trend_state",
+	)
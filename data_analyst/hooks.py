@@ -145,6 +145,53 @@ app_license = "mit"
 # 	}
 # }
 
+doc_events = {
+	"POS Invoice": {
+		"on_submit": [
+			"data_analyst.api.rollup.on_pos_invoice_submit",
+			"data_analyst.api.trend_state.on_pos_invoice_submit",
+			"data_analyst.api.cache.on_pos_invoice_change",
+		],
+		"on_cancel": [
+			"data_analyst.api.rollup.on_pos_invoice_cancel",
+			"data_analyst.api.trend_state.on_pos_invoice_cancel",
+			"data_analyst.api.cache.on_pos_invoice_change",
+		],
+	},
+	"Sales Invoice": {
+		"on_submit": [
+			"data_analyst.api.rollup.on_sales_invoice_change",
+			"data_analyst.api.trend_state.on_sales_invoice_submit",
+			"data_analyst.api.cache.on_sales_invoice_change",
+		],
+		"on_cancel": [
+			"data_analyst.api.rollup.on_sales_invoice_change",
+			"data_analyst.api.trend_state.on_sales_invoice_cancel",
+			"data_analyst.api.cache.on_sales_invoice_change",
+		],
+	},
+	"Payment Entry": {
+		"on_submit": [
+			"data_analyst.api.rollup.on_payment_entry_change",
+			"data_analyst.api.cache.on_payment_change",
+		],
+		"on_cancel": [
+			"data_analyst.api.rollup.on_payment_entry_change",
+			"data_analyst.api.cache.on_payment_change",
+		],
+	},
+	"Journal Entry": {
+		"on_submit": [
+			"data_analyst.api.rollup.on_journal_entry_change",
+			"data_analyst.api.cache.on_payment_change",
+		],
+		"on_cancel": [
+			"data_analyst.api.rollup.on_journal_entry_change",
+			"data_analyst.api.cache.on_payment_change",
+		],
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -241,4 +288,3 @@ app_license = "mit"
 # default_log_clearing_doctypes = {
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
-
@@ -0,0 +1,5 @@
+from data_analyst.api.indexes import ensure_analytics_indexes
+
+
+def execute():
+	ensure_analytics_indexes()
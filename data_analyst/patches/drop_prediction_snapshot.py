@@ -0,0 +1,6 @@
+import frappe
+
+
+def execute():
+	# Snapshot malam dihapus: DocType dan tabelnya (DROP TABLE lewat delete_doc)
+	frappe.delete_doc("DocType", "Prediction Snapshot", ignore_missing=True, force=True)
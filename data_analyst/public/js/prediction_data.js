@@ -0,0 +1,299 @@
+// Data layer bersama dashboard prediksi (POS dan Sales Invoice)
+// Dimuat halaman www lewat /assets/data_analyst/js/prediction_data.js
+(function() {
+    'use strict';
+
+    // ==================== CLIENT DATA LAYER ====================
+    // Response disimpan di IndexedDB per user dan URL request. Dalam CACHE_FRESH_MS
+    // dipakai tanpa request; setelahnya direvalidasi dengan If-None-Match (ETag).
+    // Entry milik user lain (logout / ganti user di browser yang sama) dan entry
+    // kadaluarsa dihapus saat database dibuka; tanpa login tidak ada yang disimpan.
+    const CACHE_DB = 'data_analyst_predictions';
+    const CACHE_STORE = 'responses';
+    const CACHE_FRESH_MS = 60 * 1000;
+    const CACHE_MAX_AGE_MS = 24 * 60 * 60 * 1000;
+
+    // Request yang sedang berjalan per URL; request identik memakai promise yang sama
+    const inflight = {};
+    const memoryCache = {};
+    let cacheDb = null;
+
+    function currentUser() {
+        const user = decodeURIComponent(getCookie('user_id') || '');
+        return user && user !== 'Guest' ? user : null;
+    }
+
+    function cacheKey(user, url) {
+        return `${user}|${url}`;
+    }
+
+    function openCacheDb() {
+        if (cacheDb) return cacheDb;
+        cacheDb = new Promise(resolve => {
+            if (!window.indexedDB) return resolve(null);
+            const request = indexedDB.open(CACHE_DB, 2);
+            request.onupgradeneeded = () => {
+                // Versi 1 menyimpan entry tanpa user
+                if (request.result.objectStoreNames.contains(CACHE_STORE)) {
+                    request.result.deleteObjectStore(CACHE_STORE);
+                }
+                request.result.createObjectStore(CACHE_STORE, { keyPath: 'key' });
+            };
+            request.onsuccess = () => {
+                purgeCache(request.result);
+                resolve(request.result);
+            };
+            request.onerror = () => resolve(null);
+        });
+        return cacheDb;
+    }
+
+    function purgeCache(db) {
+        const user = currentUser();
+        const store = db.transaction(CACHE_STORE, 'readwrite').objectStore(CACHE_STORE);
+        store.openCursor().onsuccess = event => {
+            const cursor = event.target.result;
+            if (!cursor) return;
+            if (cursor.value.user !== user || Date.now() - cursor.value.storedAt > CACHE_MAX_AGE_MS) cursor.delete();
+            cursor.continue();
+        };
+    }
+
+    function cacheGet(url) {
+        const user = currentUser();
+        if (!user) {
+            // Tanpa login: hapus sisa data user sebelumnya, tidak ada yang dibaca
+            openCacheDb();
+            return Promise.resolve(null);
+        }
+
+        const key = cacheKey(user, url);
+        if (memoryCache[key]) return Promise.resolve(memoryCache[key]);
+        return openCacheDb().then(db => new Promise(resolve => {
+            if (!db) return resolve(null);
+            const request = db.transaction(CACHE_STORE, 'readonly').objectStore(CACHE_STORE).get(key);
+            request.onsuccess = () => {
+                const entry = request.result;
+                if (entry && entry.user === user && Date.now() - entry.storedAt <= CACHE_MAX_AGE_MS) {
+                    memoryCache[key] = entry;
+                    resolve(entry);
+                } else {
+                    resolve(null);
+                }
+            };
+            request.onerror = () => resolve(null);
+        }));
+    }
+
+    function cachePut(url, etag, message) {
+        const user = currentUser();
+        if (!user) return;
+
+        const key = cacheKey(user, url);
+        const entry = { key: key, user: user, etag: etag, message: message, storedAt: Date.now() };
+        memoryCache[key] = entry;
+        openCacheDb().then(db => {
+            if (db) db.transaction(CACHE_STORE, 'readwrite').objectStore(CACHE_STORE).put(entry);
+        });
+    }
+
+    // Hasil dengan section error tidak disimpan supaya request berikutnya menghitung ulang
+    function isCacheable(message) {
+        return !Object.values(message).some(value => value && value.status === 'error');
+    }
+
+    // ==================== REQUEST ====================
+    /**
+     * GET endpoint prediksi dengan cache IndexedDB, revalidasi ETag dan polling job background.
+     *
+     * options.paramsKey: filter pemilik request (lihat abortSuperseded)
+     * options.onBackground: dipanggil saat server memindahkan request ke background job
+     * Hasil: { result, notModified }
+     */
+    function request(requestUrl, options) {
+        options = options || {};
+        if (inflight[requestUrl]) return inflight[requestUrl].promise;
+
+        const controller = new AbortController();
+        const promise = cacheGet(requestUrl)
+            .then(cached => {
+                // Masih segar: dipakai tanpa request
+                if (cached && Date.now() - cached.storedAt < CACHE_FRESH_MS) {
+                    return { result: cached.message, notModified: true };
+                }
+                return fetchResponse(requestUrl, cached, controller.signal, options.onBackground);
+            })
+            .finally(() => {
+                if (inflight[requestUrl] && inflight[requestUrl].promise === promise) delete inflight[requestUrl];
+            });
+
+        inflight[requestUrl] = { promise: promise, controller: controller, paramsKey: options.paramsKey };
+        return promise;
+    }
+
+    function fetchResponse(requestUrl, cached, signal, onBackground) {
+        const headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'X-Frappe-CSRF-Token': getCookie('csrf_token')
+        };
+        if (cached && cached.etag) headers['If-None-Match'] = cached.etag;
+
+        // no-store: revalidasi ETag ditangani di sini supaya 304 terlihat oleh halaman
+        return fetch(requestUrl, {
+            method: 'GET',
+            headers: headers,
+            cache: 'no-store',
+            signal: signal
+        })
+        .then(response => {
+            if (response.status === 304 && cached) {
+                cachePut(requestUrl, cached.etag, cached.message);
+                return { message: cached.message, notModified: true };
+            }
+            if (!response.ok) {
+                return response.json().then(err => {
+                    throw new Error(err.message || 'API request failed');
+                });
+            }
+            const etag = response.headers.get('ETag');
+            return readResponse(response).then(data => {
+                const message = data.message;
+                if (message && !message.job_id && isCacheable(message)) cachePut(requestUrl, etag, message);
+                return data;
+            });
+        })
+        .then(data => {
+            if (data.message && data.message.job_id) {
+                if (onBackground) onBackground();
+                return pollPredictionJob(data.message.job_id, signal).then(result => {
+                    if (isCacheable(result)) cachePut(requestUrl, null, result);
+                    return { result: result, notModified: false };
+                });
+            }
+            if (!data.message) {
+                throw new Error('No data received from API');
+            }
+            return { result: data.message, notModified: !!data.notModified };
+        });
+    }
+
+    // Batalkan request milik filter lama; job background ikut dibatalkan di server
+    function abortSuperseded(paramsKey) {
+        Object.keys(inflight).forEach(url => {
+            if (inflight[url].paramsKey !== paramsKey) {
+                inflight[url].controller.abort();
+                delete inflight[url];
+            }
+        });
+    }
+
+    function cancelPredictionJob(jobId) {
+        fetch('/api/method/data_analyst.api.jobs.cancel_prediction_job', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-Frappe-CSRF-Token': getCookie('csrf_token')
+            },
+            body: new URLSearchParams({ job_id: jobId }),
+            keepalive: true
+        }).catch(error => console.error('Cancel job error:', error));
+    }
+
+    // ==================== ASYNC JOB POLLING ====================
+    const JOB_POLL_INTERVAL = 2000;
+
+    function pollPredictionJob(jobId, signal) {
+        // Request digantikan saat polling: job di server ikut dihentikan
+        const onAbort = () => cancelPredictionJob(jobId);
+        signal.addEventListener('abort', onAbort, { once: true });
+        return pollJobStatus(jobId, signal)
+            .finally(() => signal.removeEventListener('abort', onAbort));
+    }
+
+    function pollJobStatus(jobId, signal) {
+        return fetch(`/api/method/data_analyst.api.jobs.get_prediction_job?job_id=${encodeURIComponent(jobId)}&format=columnar`, {
+            method: 'GET',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'X-Frappe-CSRF-Token': getCookie('csrf_token')
+            },
+            signal: signal
+        })
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(err => {
+                    throw new Error(err.message || 'API request failed');
+                });
+            }
+            return readResponse(response);
+        })
+        .then(data => {
+            const job = data.message || {};
+            if (job.status === 'finished') {
+                return job.result;
+            } else if (job.status === 'failed' || job.status === 'cancelled') {
+                throw new Error(job.error || 'Job ' + job.status);
+            }
+            return new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL))
+                .then(() => pollJobStatus(jobId, signal));
+        });
+    }
+
+    // ==================== RESPONSE DECODING ====================
+    // format=columnar: body JSON ter-gzip (didekode browser)
+    function readResponse(response) {
+        return response.json().then(data => {
+            if (data && data.message) data.message = decodeColumnar(data.message);
+            return data;
+        });
+    }
+
+    // Kebalikan data_analyst.api.encoding.columnar: tabel $columns/$values, referensi $slice dan $aliases
+    function decodeColumnar(value) {
+        if (Array.isArray(value)) return value.map(decodeColumnar);
+        if (!value || typeof value !== 'object') return value;
+
+        if (value.$columns) {
+            const columns = value.$columns;
+            const values = value.$values.map(decodeColumnar);
+            const length = values.length ? values[0].length : 0;
+            const rows = [];
+            for (let i = 0; i < length; i++) {
+                const row = {};
+                columns.forEach((column, j) => { row[column] = values[j][i]; });
+                rows.push(row);
+            }
+            return rows;
+        }
+
+        const result = {};
+        Object.keys(value).forEach(key => {
+            if (key !== '$aliases') result[key] = decodeColumnar(value[key]);
+        });
+        Object.keys(result).forEach(key => {
+            const ref = result[key];
+            if (ref && typeof ref === 'object' && ref.$slice !== undefined) {
+                result[key] = result[ref.$slice].slice(0, ref.$limit);
+            }
+        });
+        Object.keys(value.$aliases || {}).forEach(key => {
+            result[key] = value.$aliases[key].split('.').reduce((obj, part) => obj && obj[part], result);
+        });
+        return result;
+    }
+
+    function getCookie(name) {
+        const value = `; ${document.cookie}`;
+        const parts = value.split(`; ${name}=`);
+        if (parts.length === 2) return parts.pop().split(';').shift();
+        return '';
+    }
+
+    window.PredictionData = {
+        request: request,
+        abortSuperseded: abortSuperseded,
+        decodeColumnar: decodeColumnar
+    };
+})();
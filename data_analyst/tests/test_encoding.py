@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from data_analyst.api.encoding import columnar
+
+RESULT = {
+	"daily": [
+		{"date": "2025-01-01", "revenue": 100.0},
+		{"date": "2025-01-02", "revenue": 150.0},
+	],
+	"all_bestsellers": [
+		{"item_code": "A", "qty": 7},
+		{"item_code": "B", "qty": 5},
+		{"item_code": "C", "qty": 2},
+	],
+	"top_bestsellers": [
+		{"item_code": "A", "qty": 7},
+		{"item_code": "B", "qty": 5},
+	],
+	"historical": {"revenue": 250.0, "days": 2},
+	"current_total_revenue": 250.0,
+	"data_period_days": 2,
+	"prediction_days": 30,
+	"tags": ["a", "b"],
+}
+
+ENCODED = {
+	"daily": {"$columns": ["date", "revenue"], "$values": [["2025-01-01", "2025-01-02"], [100.0, 150.0]]},
+	"all_bestsellers": {"$columns": ["item_code", "qty"], "$values": [["A", "B", "C"], [7, 5, 2]]},
+	"top_bestsellers": {"$slice": "all_bestsellers", "$limit": 2},
+	"historical": {"revenue": 250.0, "days": 2},
+	# Tidak ada prediction.days: tetap dikirim apa adanya
+	"prediction_days": 30,
+	"tags": ["a", "b"],
+	"$aliases": {"current_total_revenue": "historical.revenue", "data_period_days": "historical.days"},
+}
+
+
+def decode(value):
+	"""Kebalikan columnar (sama dengan decodeColumnar di public/js/prediction_data.js)"""
+	if isinstance(value, list):
+		return [decode(v) for v in value]
+	if not isinstance(value, dict):
+		return value
+
+	if "$columns" in value:
+		values = [decode(column) for column in value["$values"]]
+		return [dict(zip(value["$columns"], row, strict=False)) for row in zip(*values, strict=False)]
+
+	result = {key: decode(v) for key, v in value.items() if key != "$aliases"}
+	for key, ref in result.items():
+		if isinstance(ref, dict) and "$slice" in ref:
+			result[key] = result[ref["$slice"]][: ref["$limit"]]
+	for key, path in value.get("$aliases", {}).items():
+		target = result
+		for part in path.split("."):
+			target = target[part]
+		result[key] = target
+	return result
+
+
+class TestColumnar(TestCase):
+	def test_encode(self):
+		self.assertEqual(columnar(RESULT), ENCODED)
+
+	def test_round_trip(self):
+		self.assertEqual(decode(columnar(RESULT)), RESULT)
+
+	def test_alias_requires_equal_value(self):
+		result = {"historical": {"revenue": 250.0}, "current_total_revenue": 249.0}
+		self.assertEqual(columnar(result), result)
+
+	def test_mixed_rows_stay_list(self):
+		rows = [{"a": 1}, {"b": 2}]
+		self.assertEqual(columnar({"rows": rows}), {"rows": rows})
+		self.assertEqual(columnar({"rows": []}), {"rows": []})
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+
+from data_analyst.api.forecast import (
+	fit_holt_winters,
+	fit_linear_trends,
+	forecast_breakdown,
+	series_day_matrix,
+)
+
+# Pola mingguan murni tanpa trend: level 40, indeks musiman -30 .. +30
+WEEKLY_PATTERN = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0]
+SEASONAL_INDICES = [-30.0, -20.0, -10.0, 0.0, 10.0, 20.0, 30.0]
+
+
+class TestSeriesDayMatrix(TestCase):
+	def test_sums_per_series_and_day(self):
+		matrix = series_day_matrix(
+			series_idx=[0, 1, 0, 0, 1],
+			dates=np.array(
+				["2025-01-01", "2025-01-01", "2025-01-01", "2025-01-03", "2025-01-04"], dtype="datetime64[D]"
+			),
+			values=[1.0, 2.0, 3.0, 4.0, 5.0],
+			n_series=2,
+			date_from="2025-01-01",
+			date_to="2025-01-03",
+		)
+		# Baris 2025-01-04 di luar periode
+		self.assertEqual(matrix.tolist(), [[4.0, 0.0, 4.0], [2.0, 0.0, 0.0]])
+
+
+class TestForecast(TestCase):
+	def test_linear_trend(self):
+		# y = 1 + 2x
+		fit = fit_linear_trends(np.array([[1.0, 3.0, 5.0, 7.0, 9.0]]), horizon=2)
+
+		np.testing.assert_allclose(fit["slope"], [2.0])
+		np.testing.assert_allclose(fit["level"], [9.0])
+		np.testing.assert_allclose(fit["residual_std"], [0.0], atol=1e-9)
+		np.testing.assert_allclose(fit["daily_forecast"], [[11.0, 13.0]])
+		np.testing.assert_allclose(fit["forecast"], [24.0])
+
+	def test_holt_winters_seasonal_indices(self):
+		matrix = np.array([WEEKLY_PATTERN * 4, [5.0] * 28])
+		fit = fit_holt_winters(matrix, horizon=7)
+
+		# Data tepat di pola: error nol, indeks musiman tidak berubah dari inisialisasi
+		np.testing.assert_allclose(fit["seasonal"][0], SEASONAL_INDICES)
+		np.testing.assert_allclose(fit["seasonal"][1], [0.0] * 7)
+		np.testing.assert_allclose(fit["level"], [40.0, 5.0])
+		np.testing.assert_allclose(fit["slope"], [0.0, 0.0])
+		np.testing.assert_allclose(fit["residual_std"], [0.0, 0.0])
+		np.testing.assert_allclose(fit["daily_forecast"], [WEEKLY_PATTERN, [5.0] * 7])
+		np.testing.assert_allclose(fit["forecast"], [280.0, 35.0])
+
+	def test_holt_winters_short_history_uses_linear(self):
+		fit = fit_holt_winters(np.array([WEEKLY_PATTERN + WEEKLY_PATTERN[:6]]), horizon=3)
+		self.assertNotIn("seasonal", fit)
+
+	def test_breakdown_weekly_pattern(self):
+		# 2025-01-06 hari Senin
+		fit, breakdown = forecast_breakdown(
+			["POS 1", "POS 2"], np.array([WEEKLY_PATTERN * 4, [0.0] * 28]), "2025-01-06", horizon=2
+		)
+
+		self.assertEqual(breakdown["dates"], ["2025-02-03", "2025-02-04"])
+		self.assertEqual(breakdown["total"], [10.0, 20.0])
+		self.assertEqual(breakdown["series"], {"POS 1": [10.0, 20.0], "POS 2": [0.0, 0.0]})
+		self.assertEqual(
+			breakdown["weekly_pattern"],
+			dict(
+				zip(
+					("Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"),
+					SEASONAL_INDICES,
+					strict=False,
+				)
+			),
+		)
@@ -0,0 +1,56 @@
+import inspect
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+import frappe
+
+from data_analyst.api import jobs
+
+
+def echo(**kwargs):
+	return kwargs
+
+
+class TestPredictionJobs(TestCase):
+	def setUp(self):
+		for target, value in (
+			("_set_job", None),
+			("_is_final", False),
+			("_claim_final", True),
+		):
+			patcher = patch.object(jobs, target, return_value=value)
+			setattr(self, target, patcher.start())
+			self.addCleanup(patcher.stop)
+
+		patcher = patch.object(frappe, "session", SimpleNamespace(user="analyst@example.com"))
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_enqueue_matches_enqueue_and_job_signatures(self):
+		# autospec: argumen yang bentrok dengan parameter frappe.enqueue langsung TypeError
+		with patch.object(frappe, "enqueue", autospec=True) as enqueue:
+			response = jobs.enqueue_prediction(f"{__name__}.echo", company="ABC", prediction_days=30)
+
+		self.assertEqual(response["status"], "queued")
+		call = inspect.signature(frappe.enqueue).bind(*enqueue.call_args.args, **enqueue.call_args.kwargs)
+		self.assertEqual(call.arguments["method"], "data_analyst.api.jobs.run_prediction_job")
+		self.assertEqual(call.arguments["job_id"], f"{jobs.JOB_PREFIX}{response['job_id']}")
+
+		# Sisa kwargs diteruskan frappe.enqueue ke run_prediction_job
+		job_kwargs = call.arguments["kwargs"]
+		with patch.object(frappe, "flags", frappe._dict()), patch.object(frappe, "publish_realtime"):
+			jobs.run_prediction_job(**job_kwargs)
+
+		job = self._set_job.call_args.args[1]
+		self.assertEqual(job["status"], "finished")
+		self.assertEqual(job["method"], f"{__name__}.echo")
+		self.assertEqual(job["result"], {"company": "ABC", "prediction_days": 30})
+
+	def test_cancelled_job_is_not_run(self):
+		self._is_final.return_value = True
+		with patch.object(frappe, "get_attr") as get_attr:
+			jobs.run_prediction_job("abc", f"{__name__}.echo", "analyst@example.com", {})
+
+		get_attr.assert_not_called()
+		self._set_job.assert_not_called()
@@ -0,0 +1,42 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import frappe
+
+from data_analyst.api.indexes import capture_queries
+from data_analyst.api.perf import PerfRecorder
+
+
+class FakeDatabase:
+	def sql(self, query, values=(), *args, **kwargs):
+		return [(query,)]
+
+
+class TestWrapDbSql(TestCase):
+	def setUp(self):
+		patcher = patch.object(frappe, "db", FakeDatabase())
+		self.db = patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_nested_capture_restores_outer_wrapper(self):
+		with capture_queries() as outer:
+			frappe.db.sql("SELECT 1")
+			with capture_queries() as inner:
+				frappe.db.sql("SELECT 2")
+			frappe.db.sql("SELECT 3")
+
+		self.assertEqual([q for q, _values in outer], ["SELECT 1", "SELECT 2", "SELECT 3"])
+		self.assertEqual([q for q, _values in inner], ["SELECT 2"])
+		self.assertNotIn("sql", vars(self.db))
+
+	def test_perf_section_inside_capture(self):
+		perf = PerfRecorder("test")
+		with capture_queries() as queries:
+			with perf.section("summary"):
+				self.assertEqual(frappe.db.sql("SELECT 1"), [("SELECT 1",)])
+			frappe.db.sql("SELECT 2")
+
+		self.assertEqual(perf.sections["summary"]["sql_count"], 1)
+		self.assertEqual(perf.sections["summary"]["rows"], 1)
+		self.assertEqual([q for q, _values in queries], ["SELECT 1", "SELECT 2"])
+		self.assertNotIn("sql", vars(self.db))
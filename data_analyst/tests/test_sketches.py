@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+import numpy as np
+
+from data_analyst.api.sketches import HLL_REGISTERS, HyperLogLog, customer_register, merge_sketches
+
+
+def sketch(registers):
+	"""Sketch dari {index: rank}"""
+	return HyperLogLog.from_registers(list(registers), list(registers.values()))
+
+
+class TestHyperLogLog(TestCase):
+	def test_encode_sparse(self):
+		# 'S' + (index >u2, rank u1) per register terisi
+		self.assertEqual(sketch({5: 3, 7: 1}).encode(), "UwAFAwAHAQ==")
+
+	def test_decode_sparse(self):
+		registers = HyperLogLog.decode("UwAFAwAHAQ==").registers
+		self.assertEqual(np.flatnonzero(registers).tolist(), [5, 7])
+		self.assertEqual(registers[[5, 7]].tolist(), [3, 1])
+
+	def test_encode_decode_dense(self):
+		registers = np.ones(HLL_REGISTERS, dtype=np.uint8)
+		registers[10] = 9
+		encoded = HyperLogLog(registers.copy()).encode()
+
+		self.assertEqual(encoded[:4], "RAEB")  # 'D' + register 0 dan 1
+		np.testing.assert_array_equal(HyperLogLog.decode(encoded).registers, registers)
+
+	def test_decode_empty(self):
+		self.assertEqual(HyperLogLog.decode(None).count(), 0)
+		self.assertEqual(HyperLogLog.decode("").registers.sum(), 0)
+
+	def test_merge_takes_register_max(self):
+		merged = merge_sketches([sketch({1: 2, 2: 5}).encode(), None, sketch({2: 3, 4: 1}).encode()])
+		self.assertEqual(np.flatnonzero(merged.registers).tolist(), [1, 2, 4])
+		self.assertEqual(merged.registers[[1, 2, 4]].tolist(), [2, 5, 1])
+
+	def test_count(self):
+		# Linear counting: 4096 * ln(4096 / 4093) = 3.0007
+		self.assertEqual(sketch({1: 1, 2: 4, 3: 2}).count(), 3)
+
+		# Semua register = 1: 0.7213 / (1 + 1.079 / 4096) * 4096² / (4096 * 0.5) = 5907.3
+		self.assertEqual(HyperLogLog(np.ones(HLL_REGISTERS, dtype=np.uint8)).count(), 5907)
+
+	def test_add_matches_from_customers(self):
+		customers = ["CUST-1", "CUST-2", "CUST-1", "CUST-3"]
+		added = HyperLogLog()
+		for customer in customers:
+			added.add(customer)
+
+		np.testing.assert_array_equal(added.registers, HyperLogLog.from_customers(customers).registers)
+		self.assertEqual(added.count(), len({customer_register(c)[0] for c in customers}))
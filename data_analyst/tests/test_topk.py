@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from data_analyst.api.topk import SpaceSaving, decode_top_items, encode_top_items
+
+# Nilai exact per item untuk dua hari
+DAY_1 = {"A": 5, "B": 3, "C": 1}
+DAY_2 = {"B": 6}
+
+
+def summary(totals, capacity=2):
+	summary = SpaceSaving(capacity=capacity)
+	for item, weight in totals.items():
+		summary.add(item, weight)
+	return summary
+
+
+class TestSpaceSaving(TestCase):
+	def test_add_replaces_smallest_counter(self):
+		day = summary(DAY_1)
+
+		# C menggantikan B (counter terkecil 3): estimate 3 + 1, error 3
+		self.assertEqual(day.counters, {"A": [5, 0], "C": [4, 3]})
+		self.assertEqual(day.floor(), 4)
+		self.assertEqual(summary(DAY_2).floor(), 0)
+
+	def test_merge(self):
+		merged = SpaceSaving.merge([summary(DAY_1), summary(DAY_2)], capacity=2)
+
+		# B tidak tercatat di hari 1: dihitung floor hari 1 (4) sebagai count dan error
+		self.assertEqual(merged.top(2), [("B", 10, 4), ("A", 5, 0)])
+
+	def test_merge_bounds(self):
+		days = [DAY_1, DAY_2, {"A": 2, "C": 7, "D": 1}]
+		merged = SpaceSaving.merge([summary(day) for day in days], capacity=4)
+
+		for item, (count, error) in merged.counters.items():
+			exact = sum(day.get(item, 0) for day in days)
+			self.assertLessEqual(count - error, exact, item)
+			self.assertGreaterEqual(count, exact, item)
+
+	def test_merge_exact_totals(self):
+		merged = SpaceSaving.merge([SpaceSaving.from_totals(DAY_1), SpaceSaving.from_totals(DAY_2)])
+		self.assertEqual(merged.top(3), [("B", 9, 0), ("A", 5, 0), ("C", 1, 0)])
+
+	def test_encode_decode(self):
+		summaries = {
+			"qty": SpaceSaving.from_totals(DAY_1),
+			"amount": SpaceSaving.from_totals(DAY_2),
+			"invoice_count": SpaceSaving(),
+		}
+		decoded = decode_top_items(encode_top_items(summaries))
+
+		self.assertEqual(decoded["qty"].counters, {"A": [5, 0], "B": [3, 0], "C": [1, 0]})
+		self.assertEqual(decoded["amount"].counters, {"B": [6, 0]})
+		self.assertEqual(decoded["invoice_count"].counters, {})
+		self.assertEqual(decode_top_items(None)["qty"].counters, {})
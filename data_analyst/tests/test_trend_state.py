@@ -0,0 +1,54 @@
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from frappe.utils import add_days, getdate
+
+from data_analyst.api import trend_state
+
+# Penjualan harian (sen) dengan satu hari tanpa penjualan (2025-01-03)
+DAY_SALES = {
+	date(2025, 1, 1): 10000,
+	date(2025, 1, 2): 20000,
+	date(2025, 1, 4): 40000,
+}
+
+
+def cumulative_at(series_type, company, series_keys, as_of):
+	as_of = getdate(as_of)
+	days = [(trend_state.day_number(day), cents) for day, cents in DAY_SALES.items() if day <= as_of]
+	return sum(cents for _x, cents in days), sum(x * cents for x, cents in days)
+
+
+class TestTrendSummary(TestCase):
+	def summary(self, date_from, date_to):
+		with patch.object(trend_state, "cumulative_at", cumulative_at):
+			return trend_state.trend_summary("POS Invoice", "ABC", ["POS 1"], date_from, date_to)
+
+	def test_calendar_day_basis(self):
+		summary = self.summary("2025-01-01", "2025-01-04")
+
+		# y = [100, 200, 0, 400] atas 4 hari kalender: Sxy = 350, Sxx = 5
+		self.assertEqual(summary["days"], 4)
+		self.assertEqual(summary["total_sales"], 700.0)
+		self.assertAlmostEqual(summary["avg_daily_sales"], 175.0)
+		self.assertAlmostEqual(summary["slope"], 70.0)
+
+	def test_differs_from_sales_day_basis(self):
+		# Basis predictor default: hanya 3 hari yang ada penjualan
+		sales_days = [cents / 100 for cents in DAY_SALES.values()]
+		self.assertAlmostEqual(np.mean(sales_days), 700 / 3)
+		self.assertAlmostEqual(np.polyfit(range(len(sales_days)), sales_days, 1)[0], 150.0)
+
+		summary = self.summary("2025-01-01", "2025-01-04")
+		self.assertNotAlmostEqual(summary["avg_daily_sales"], np.mean(sales_days))
+		self.assertNotAlmostEqual(summary["slope"], 150.0)
+
+	def test_window_excludes_days_before(self):
+		summary = self.summary("2025-01-02", add_days("2025-01-02", 2))
+
+		# y = [200, 0, 400]: Sxy = -200 + 400 = 200, Sxx = 2
+		self.assertEqual(summary["days"], 3)
+		self.assertEqual(summary["total_sales"], 600.0)
+		self.assertAlmostEqual(summary["slope"], 100.0)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from data_analyst.api.valuation import AsOfValuation, to_timestamp_us
+
+# (item_code, warehouse, posting_date, posting_time, creation, valuation_rate)
+SLE_HISTORY = [
+	("A", "W1", "2025-01-05", timedelta(hours=9), datetime(2025, 1, 5, 9, 0, 2), 125.0),
+	("A", "W1", "2024-12-20", timedelta(hours=10), datetime(2024, 12, 20, 10), 100.0),
+	("A", "W1", "2025-01-05", timedelta(hours=9), datetime(2025, 1, 5, 9, 0, 1), 120.0),
+	("B", "W1", "2025-01-03", timedelta(0), datetime(2025, 1, 3), None),
+	# Pair yang tidak diminta diabaikan
+	("C", "W1", "2025-01-02", timedelta(0), datetime(2025, 1, 2), 50.0),
+]
+
+
+class TestAsOfValuation(TestCase):
+	def setUp(self):
+		with patch.object(AsOfValuation, "_load_history", return_value=SLE_HISTORY):
+			self.valuation = AsOfValuation([("A", "W1"), ("B", "W1")], "2025-01-01", "2025-01-31")
+
+	def lookup(self, lines):
+		pair = self.valuation.pair_codes([(item, "W1") for item, _date, _time in lines])
+		timestamp = to_timestamp_us(
+			np.array([date for _item, date, _time in lines], dtype="datetime64[D]"),
+			[time for _item, _date, time in lines],
+		)
+		return self.valuation.lookup(pair, timestamp)
+
+	def test_lookup_takes_last_entry_at_or_before_transaction(self):
+		rate, found = self.lookup(
+			[
+				("A", "2024-12-19", timedelta(hours=23)),
+				("A", "2024-12-20", timedelta(hours=10)),
+				("A", "2025-01-05", timedelta(hours=8, minutes=59)),
+				("A", "2025-01-05", timedelta(hours=9)),
+				("A", "2025-01-31", timedelta(0)),
+			]
+		)
+
+		self.assertEqual(found.tolist(), [False, True, True, True, True])
+		self.assertTrue(np.isnan(rate[0]))
+		# Dua SLE pada waktu yang sama: creation terakhir yang dipakai
+		self.assertEqual(rate[1:].tolist(), [100.0, 100.0, 125.0, 125.0])
+
+	def test_null_rate_and_unknown_pair(self):
+		rate, found = self.lookup(
+			[
+				("B", "2025-01-04", timedelta(0)),
+				("B", "2025-01-02", timedelta(0)),
+				("C", "2025-01-04", timedelta(0)),
+			]
+		)
+
+		self.assertEqual(found.tolist(), [True, False, False])
+		self.assertTrue(np.isnan(rate).all())
+
+	def test_to_timestamp_us(self):
+		timestamp = to_timestamp_us(
+			np.array(["1970-01-02"], dtype="datetime64[D]"), [timedelta(hours=1, microseconds=5)]
+		)
+		self.assertEqual(timestamp.tolist(), [(86400 + 3600) * 1000000 + 5])
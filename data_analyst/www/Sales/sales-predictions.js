@@ -5,6 +5,20 @@
     // ==================== GLOBAL VARIABLES ====================
     let predictions = null;
     let chartInstances = {};
+    let currentParams = null;
+    let sectionState = {};
+    let requestSeq = 0;
+
+    // Tab hasil; `key` = nama section di parameter `sections` API
+    const SECTIONS = [
+        { key: 'sales_prediction', id: 'sales-section', label: 'Sales', render: renderSalesPrediction, chart: renderSalesChart },
+        { key: 'product_demand_prediction', id: 'products-section', label: 'Product', render: renderProductDemand, chart: renderProductDemandChart },
+        { key: 'profit_prediction', id: 'profit-section', label: 'Profit', render: renderProfitPrediction, chart: renderProfitChart },
+        { key: 'customer_analysis', id: 'customers-section', label: 'Customer', render: renderCustomerAnalysis, chart: renderCustomerChart },
+        { key: 'bestseller_prediction', id: 'bestsellers-section', label: 'Bestseller', render: renderBestsellerPrediction, chart: renderBestsellerChart },
+        { key: 'payment_prediction', id: 'payment-section', label: 'Payment', render: renderPaymentPrediction, chart: renderPaymentChart }
+    ];
+    let activeSection = SECTIONS[0].key;
     let allCompanies = [];
 
     // ==================== INITIALIZATION ====================
@@ -225,11 +239,68 @@
     }
 
     // ==================== API CALL ====================
+    // Tab yang terlihat dimuat lebih dulu, tab lain menyusul di background
     function fetchPredictions(params) {
-        showLoading(true);
         hideError();
-        clearResults();
 
+        const seq = ++requestSeq;
+        PredictionData.abortSuperseded(JSON.stringify(params));
+        // Refresh dengan filter yang sama: tab yang sudah tampil dipertahankan
+        const refresh = predictions && JSON.stringify(params) === JSON.stringify(currentParams);
+        if (!refresh) {
+            clearResults();
+            destroyCharts();
+            predictions = null;
+            sectionState = {};
+        }
+        currentParams = params;
+
+        const first = activeSection;
+        const rest = SECTIONS.map(s => s.key).filter(key => key !== first);
+
+        showLoading(true);
+        loadSections(params, [first], seq, true)
+            .then(() => {
+                if (seq !== requestSeq) return;
+                showLoading(false);
+                setLoadingText('Fetching predictions...');
+                return loadSections(params, rest, seq, false);
+            })
+            .catch(error => {
+                if (seq !== requestSeq) return;
+                showLoading(false);
+                setLoadingText('Fetching predictions...');
+                showError('Failed to fetch predictions: ' + error.message);
+                console.error('Fetch error:', error);
+            });
+    }
+
+    function loadSections(params, keys, seq, foreground) {
+        const pending = keys.filter(key => sectionState[key] !== 'loaded');
+        pending.forEach(key => { sectionState[key] = 'loading'; });
+        if (predictions) pending.forEach(renderSection);
+
+        return requestPredictions(params, keys, foreground)
+            .then(({ result, notModified }) => {
+                if (seq !== requestSeq) return;
+                const isFirst = !predictions;
+                predictions = Object.assign(predictions || {}, result);
+                keys.forEach(key => { sectionState[key] = 'loaded'; });
+                if (isFirst) renderResults();
+                // 304: tab yang sudah tampil tidak dirender ulang
+                (notModified ? pending : keys).forEach(renderSection);
+            })
+            .catch(error => {
+                if (seq !== requestSeq) return;
+                pending.forEach(key => { sectionState[key] = 'failed'; });
+                if (foreground || !predictions) throw error;
+                // Tab yang gagal dimuat ulang saat dibuka
+                pending.forEach(renderSection);
+                console.error('Section fetch error:', error);
+            });
+    }
+
+    function requestPredictions(params, sections, foreground) {
         const url = '/api/method/data_analyst.api.pos.get_sales_invoice_predictions';
         const queryParams = new URLSearchParams();
         
@@ -239,87 +310,61 @@
         if (params.date_from) queryParams.append('date_from', params.date_from);
         if (params.date_to) queryParams.append('date_to', params.date_to);
         queryParams.append('prediction_days', params.prediction_days);
+        queryParams.append('sections', sections.join(','));
+        queryParams.append('format', 'columnar');
+        // Server memindahkan request besar ke background job
+        queryParams.append('run_async', 'auto');
 
-        fetch(`${url}?${queryParams.toString()}`, {
-            method: 'GET',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-Frappe-CSRF-Token': getCookie('csrf_token')
-            }
-        })
-        .then(response => {
-            if (!response.ok) {
-                return response.json().then(err => {
-                    throw new Error(err.message || 'API request failed');
-                });
-            }
-            return response.json();
-        })
-        .then(data => {
-            showLoading(false);
-            if (data.message) {
-                predictions = data.message;
-                renderResults();
-            } else {
-                showError('No data received from API');
-            }
-        })
-        .catch(error => {
-            showLoading(false);
-            showError('Failed to fetch predictions: ' + error.message);
-            console.error('Fetch error:', error);
+        return PredictionData.request(`${url}?${queryParams.toString()}`, {
+            paramsKey: JSON.stringify(params),
+            onBackground: foreground ? () => setLoadingText('Data besar, prediksi diproses di background...') : null
         });
     }
 
+    function setLoadingText(text) {
+        const loadingText = document.querySelector('#loading p');
+        if (loadingText) loadingText.textContent = text;
+    }
+
     // ==================== RENDER RESULTS ====================
+    // Kerangka hasil: header, navigasi dan wadah kosong per tab
     function renderResults() {
         if (!predictions) return;
 
-        // Destroy existing charts
-        Object.keys(chartInstances).forEach(key => {
-            if (chartInstances[key]) {
-                chartInstances[key].destroy();
-            }
-        });
-        chartInstances = {};
-
         let html = '';
         html += renderInfoHeader();
-        
-        if (predictions.sales_prediction?.status === 'success') {
-            html += `<div id="sales-section" class="tab-section">${renderSalesPrediction()}</div>`;
-        }
-        if (predictions.product_demand_prediction?.status === 'success') {
-            html += `<div id="products-section" class="tab-section">${renderProductDemand()}</div>`;
-        }
-        if (predictions.profit_prediction?.status === 'success') {
-            html += `<div id="profit-section" class="tab-section">${renderProfitPrediction()}</div>`;
-        }
-        if (predictions.customer_analysis?.status === 'success') {
-            html += `<div id="customers-section" class="tab-section">${renderCustomerAnalysis()}</div>`;
-        }
-        if (predictions.bestseller_prediction?.status === 'success') {
-            html += `<div id="bestsellers-section" class="tab-section">${renderBestsellerPrediction()}</div>`;
-        }
-        if (predictions.payment_prediction?.status === 'success') {
-            html += `<div id="payment-section" class="tab-section">${renderPaymentPrediction()}</div>`;
-        }
+        SECTIONS.forEach(section => {
+            html += `<div id="${section.id}" class="tab-section"></div>`;
+        });
         
         document.getElementById('results-container').innerHTML = html;
         document.getElementById('results-nav').innerHTML = renderResultsNav();
         document.getElementById('results-nav').style.display = 'block';
         
         setupNavigation();
-        
-        // Show first tab
-        const firstTab = document.querySelector('.nav-btn');
-        if (firstTab) {
-            showTab(firstTab.dataset.target);
-            firstTab.classList.add('active');
-        }
+        showSection(activeSection);
+    }
+
+    function renderSection(key) {
+        const section = SECTIONS.find(s => s.key === key);
+        const container = section ? document.getElementById(section.id) : null;
+        if (!container) return;
 
-        // Render charts after DOM update
-        setTimeout(() => renderCharts(), 100);
+        const state = sectionState[key];
+        const result = predictions[key];
+        destroyChartsIn(container);
+        if (state === 'loading') {
+            container.innerHTML = '<div class="loading"><div class="spinner"></div><p>Memuat data...</p></div>';
+        } else if (state === 'failed') {
+            container.innerHTML = '<div class="error-box">Gagal memuat data. Buka tab ini lagi untuk mencoba ulang.</div>';
+        } else if (result?.status === 'success') {
+            container.innerHTML = section.render();
+            // Render chart after DOM update
+            setTimeout(() => section.chart(), 100);
+        } else {
+            const message = result?.message || 'Tidak ada data untuk periode ini';
+            container.innerHTML = `<div class="error-box">${message}</div>`;
+        }
     }
 
     function renderInfoHeader() {
@@ -355,24 +400,9 @@
 
     function renderResultsNav() {
         let navHtml = '<div class="results-nav-inner">';
-        if (predictions.sales_prediction?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="sales-section">Sales</button>`;
-        }
-        if (predictions.product_demand_prediction?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="products-section">Product</button>`;
-        }
-        if (predictions.profit_prediction?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="profit-section">Profit</button>`;
-        }
-        if (predictions.customer_analysis?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="customers-section">Customer</button>`;
-        }
-        if (predictions.bestseller_prediction?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="bestsellers-section">Bestseller</button>`;
-        }
-        if (predictions.payment_prediction?.status === 'success') {
-            navHtml += `<button class="nav-btn" data-target="payment-section">Payment</button>`;
-        }
+        SECTIONS.forEach(section => {
+            navHtml += `<button class="nav-btn" data-section="${section.key}">${section.label}</button>`;
+        });
         navHtml += '</div>';
         return navHtml;
     }
@@ -381,14 +411,27 @@
         const buttons = document.querySelectorAll('.nav-btn');
         buttons.forEach(btn => {
             btn.addEventListener('click', function() {
-                const target = this.getAttribute('data-target');
-                showTab(target);
-                buttons.forEach(b => b.classList.remove('active'));
-                this.classList.add('active');
+                showSection(this.dataset.section);
             });
         });
     }
 
+    function showSection(key) {
+        const section = SECTIONS.find(s => s.key === key);
+        if (!section) return;
+
+        activeSection = key;
+        document.querySelectorAll('.nav-btn').forEach(btn => {
+            btn.classList.toggle('active', btn.dataset.section === key);
+        });
+        showTab(section.id);
+
+        // Tab yang belum termuat (mis. request background gagal) diambil saat dibuka
+        if (currentParams && (!sectionState[key] || sectionState[key] === 'failed')) {
+            loadSections(currentParams, [key], requestSeq, false);
+        }
+    }
+
     function showTab(id) {
         const sections = document.querySelectorAll('.tab-section');
         sections.forEach(sec => sec.classList.remove('active'));
@@ -398,16 +441,25 @@
         }
     }
 
-    // ==================== RENDER CHARTS ====================
-    function renderCharts() {
-        if (predictions.sales_prediction?.status === 'success') renderSalesChart();
-        if (predictions.product_demand_prediction?.status === 'success') renderProductDemandChart();
-        if (predictions.profit_prediction?.status === 'success') renderProfitChart();
-        if (predictions.customer_analysis?.status === 'success') renderCustomerChart();
-        if (predictions.bestseller_prediction?.status === 'success') renderBestsellerChart();
-        if (predictions.payment_prediction?.status === 'success') renderPaymentChart();
+    function destroyChartsIn(container) {
+        Object.keys(chartInstances).forEach(key => {
+            if (chartInstances[key] && container.contains(chartInstances[key].canvas)) {
+                chartInstances[key].destroy();
+                delete chartInstances[key];
+            }
+        });
     }
 
+    function destroyCharts() {
+        Object.keys(chartInstances).forEach(key => {
+            if (chartInstances[key]) {
+                chartInstances[key].destroy();
+            }
+        });
+        chartInstances = {};
+    }
+
+    // ==================== RENDER CHARTS ====================
     function renderSalesChart() {
         const canvas = document.getElementById('salesChart');
         if (!canvas) return;